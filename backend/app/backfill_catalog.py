@@ -0,0 +1,193 @@
+"""
+Bring an existing database up to date: columns and indexes added since it
+was created, canonical muscle/equipment names, taxonomy bitmasks and
+normalized name keys
+Run with: python -m app.backfill_catalog
+
+Safe to re-run: rows that are already up to date are left untouched. Run it
+after upgrading an existing database or adding aliases/ids to app/taxonomy.py.
+"""
+from app.database import SessionLocal, engine
+from app.models import Base, Exercise, GymProfile
+from app.services.catalog import bump_catalog_version, exercise_name_key, get_catalog_version
+from app.services.gym_eligibility import refresh_gym_profile
+from app.taxonomy import normalize_exercise_fields
+
+BATCH_SIZE = 1000
+TAXONOMY_FIELDS = ("muscle_groups", "equipment", "muscle_mask", "equipment_mask")
+
+# create_all() does not alter existing tables, so older databases get the
+# newer columns (and the indexes hot queries rely on) here
+ADD_COLUMNS = (
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS timezone VARCHAR",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS is_admin BOOLEAN NOT NULL DEFAULT false",
+    "ALTER TABLE ai_training_programs ADD COLUMN IF NOT EXISTS snapshot_json TEXT",
+    "ALTER TABLE ai_adaptation_insights ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE",
+    # Existing insights sort by when they were written, not by when the column was added
+    "UPDATE ai_adaptation_insights SET updated_at = created_at WHERE updated_at IS NULL",
+    "ALTER TABLE ai_adaptation_insights ALTER COLUMN updated_at SET DEFAULT now()",
+    "ALTER TABLE exercises ADD COLUMN IF NOT EXISTS name_key VARCHAR",
+    "ALTER TABLE exercises ADD COLUMN IF NOT EXISTS muscle_mask BIGINT NOT NULL DEFAULT 0",
+    "ALTER TABLE exercises ADD COLUMN IF NOT EXISTS equipment_mask BIGINT NOT NULL DEFAULT 0",
+    "ALTER TABLE exercises ADD COLUMN IF NOT EXISTS source VARCHAR",
+    "ALTER TABLE exercises ADD COLUMN IF NOT EXISTS source_uuid VARCHAR",
+    "ALTER TABLE exercises ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "ALTER TABLE exercises ADD COLUMN IF NOT EXISTS is_archived BOOLEAN NOT NULL DEFAULT false",
+    "ALTER TABLE exercises ADD COLUMN IF NOT EXISTS merged_into_id INTEGER REFERENCES exercises (id)",
+    "ALTER TABLE exercises ADD COLUMN IF NOT EXISTS image_sha256 VARCHAR(64)",
+    "ALTER TABLE exercises ADD COLUMN IF NOT EXISTS thumbnail_sha256 VARCHAR(64)",
+    "ALTER TABLE exercises ADD COLUMN IF NOT EXISTS video_sha256 VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS ix_exercises_source_uuid ON exercises (source, source_uuid)",
+    "ALTER TABLE gym_profiles ADD COLUMN IF NOT EXISTS equipment_mask BIGINT NOT NULL DEFAULT 0",
+    "ALTER TABLE gym_profiles ADD COLUMN IF NOT EXISTS eligible_exercise_ids JSON",
+    "ALTER TABLE gym_profiles ADD COLUMN IF NOT EXISTS eligible_catalog_version INTEGER",
+    "CREATE INDEX IF NOT EXISTS ix_workout_logs_user_date ON workout_logs (user_id, date)",
+    "CREATE INDEX IF NOT EXISTS ix_ai_training_programs_user_id ON ai_training_programs (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_ai_weekly_plans_training_program_id ON ai_weekly_plans (training_program_id)",
+    "CREATE INDEX IF NOT EXISTS ix_ai_daily_workouts_training_program_id ON ai_daily_workouts (training_program_id)",
+    "CREATE INDEX IF NOT EXISTS ix_ai_daily_workouts_weekly_plan_id ON ai_daily_workouts (weekly_plan_id)",
+    "CREATE INDEX IF NOT EXISTS ix_ai_daily_workout_exercises_daily_workout_id ON ai_daily_workout_exercises (daily_workout_id)",
+    "CREATE INDEX IF NOT EXISTS ix_ai_program_schedule_training_program_id ON ai_program_schedule (training_program_id)",
+)
+
+
+# Created after name keys are filled, so existing rows can't violate it
+CREATE_NAME_KEY_INDEX = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_exercises_template_name_key "
+    "ON exercises (name_key) WHERE is_template"
+)
+
+
+# Insights used to be appended on every run; keep only the newest row per
+# (user, type) so the unique index the insights job relies on can be built
+DEDUPE_INSIGHTS = (
+    "DELETE FROM ai_adaptation_insights older USING ai_adaptation_insights newer "
+    "WHERE older.user_id = newer.user_id AND older.insight_type = newer.insight_type "
+    "AND older.id < newer.id"
+)
+CREATE_INSIGHT_TYPE_INDEX = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_ai_adaptation_insights_user_type "
+    "ON ai_adaptation_insights (user_id, insight_type)"
+)
+
+
+# Snapshots are API responses rendered with the schemas of the release that
+# stored them; fields added since (e.g. local media URLs) only appear once
+# they are rendered again, which happens lazily on the next read
+CLEAR_PROGRAM_SNAPSHOTS = "UPDATE ai_training_programs SET snapshot_json = NULL WHERE snapshot_json IS NOT NULL"
+
+
+def add_columns():
+    with engine.begin() as connection:
+        for statement in ADD_COLUMNS:
+            connection.exec_driver_sql(statement)
+
+
+def create_name_key_index():
+    with engine.begin() as connection:
+        connection.exec_driver_sql(CREATE_NAME_KEY_INDEX)
+
+
+def clear_program_snapshots() -> int:
+    with engine.begin() as connection:
+        return connection.exec_driver_sql(CLEAR_PROGRAM_SNAPSHOTS).rowcount
+
+
+def dedupe_insights() -> int:
+    with engine.begin() as connection:
+        removed = connection.exec_driver_sql(DEDUPE_INSIGHTS).rowcount
+        connection.exec_driver_sql(CREATE_INSIGHT_TYPE_INDEX)
+    return removed
+
+
+def backfill_exercises(db) -> int:
+    updated = 0
+    duplicates = 0
+    last_id = 0
+
+    # Keys already owned by a template row; a second row with the same key would
+    # violate the unique index, so it keeps a NULL key until the duplicates are merged
+    taken_keys = {
+        name_key for (name_key,) in db.query(Exercise.name_key).filter(
+            Exercise.is_template == True,
+            Exercise.name_key != None
+        )
+    }
+
+    while True:
+        exercises = db.query(Exercise).filter(
+            Exercise.id > last_id
+        ).order_by(Exercise.id).limit(BATCH_SIZE).all()
+        if not exercises:
+            if duplicates:
+                print(f"  {duplicates} template exercises share a name with another and were left without a name key")
+            return updated
+
+        for exercise in exercises:
+            normalized = normalize_exercise_fields({
+                "muscle_groups": exercise.muscle_groups,
+                "equipment": exercise.equipment
+            })
+
+            name_key = exercise_name_key(exercise.name)
+            if exercise.is_template and exercise.name_key != name_key:
+                if name_key in taken_keys:
+                    name_key = None
+                    duplicates += 1
+                else:
+                    taken_keys.add(name_key)
+
+            if exercise.name_key != name_key or any(
+                getattr(exercise, field) != normalized[field] for field in TAXONOMY_FIELDS
+            ):
+                for field in TAXONOMY_FIELDS:
+                    setattr(exercise, field, normalized[field])
+                exercise.name_key = name_key
+                updated += 1
+
+        db.commit()
+        last_id = exercises[-1].id
+        print(f"  Exercises checked up to id {last_id}, {updated} updated")
+
+
+def backfill_gym_profiles(db, catalog_version: int) -> int:
+    profiles = db.query(GymProfile).all()
+    for profile in profiles:
+        refresh_gym_profile(db, profile, catalog_version)
+    db.commit()
+    return len(profiles)
+
+
+def backfill():
+    db = SessionLocal()
+    try:
+        exercise_count = backfill_exercises(db)
+
+        # Cached candidates and skeletons were built from the old names
+        if exercise_count:
+            bump_catalog_version(db)
+            db.commit()
+
+        profile_count = backfill_gym_profiles(db, get_catalog_version(db))
+
+        print(f"\n✓ Catalog backfill complete!")
+        print(f"  Exercises updated: {exercise_count}")
+        print(f"  Gym profiles refreshed: {profile_count}")
+
+    except Exception as e:
+        print(f"Error during backfill: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    # Create tables if they don't exist
+    Base.metadata.create_all(bind=engine)
+    add_columns()
+    removed = dedupe_insights()
+    if removed:
+        print(f"  Removed {removed} duplicate adaptation insights")
+    backfill()
+    create_name_key_index()
+    print(f"  Program snapshots cleared: {clear_program_snapshots()}")
@@ -1,9 +1,78 @@
+import logging
+from typing import Dict, Optional
+
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.sql_instrumentation import instrument_engine
+
+logger = logging.getLogger(__name__)
+
+
+def pool_options(workers: Optional[int] = None) -> Dict:
+    """Per-process pool settings; with DB_CONNECTION_BUDGET the budget is split across workers"""
+    pool_size, max_overflow = settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    if settings.DB_CONNECTION_BUDGET:
+        per_worker = max(2, settings.DB_CONNECTION_BUDGET // (workers or settings.WEB_CONCURRENCY))
+        # Keep about a third as overflow, opened only under bursts
+        pool_size = max(1, per_worker * 2 // 3)
+        max_overflow = per_worker - pool_size
+
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def check_connection_budget(workers: int) -> Optional[str]:
+    """Warn when every worker's full pool would exceed PostgreSQL's max_connections.
+
+    Run once at server start (gunicorn.conf.py). Returns the warning, if any.
+    """
+    if engine.dialect.name != "postgresql":
+        return None
+    options = pool_options(workers)
+    needed = workers * (options["pool_size"] + options["max_overflow"])
+    try:
+        with engine.connect() as connection:
+            max_connections = int(connection.exec_driver_sql("SHOW max_connections").scalar())
+            # Connections reserved for superusers are not available to the app
+            superuser_reserved = int(connection.exec_driver_sql("SHOW superuser_reserved_connections").scalar())
+    except Exception as e:
+        logger.warning("Could not check the database connection limit: %s", e)
+        return None
+    finally:
+        # Don't hand this connection down to forked workers
+        engine.dispose()
+
+    available = max_connections - superuser_reserved - settings.DB_RESERVED_CONNECTIONS
+    if needed <= available:
+        logger.info(
+            "Database connections: %d workers x %d pool + %d overflow = %d of %d available",
+            workers, options["pool_size"], options["max_overflow"], needed, available
+        )
+        return None
+
+    message = (
+        f"{workers} workers x ({options['pool_size']} pool + {options['max_overflow']} overflow) = "
+        f"{needed} connections, but the database allows {max_connections} "
+        f"({superuser_reserved} reserved for superusers, {settings.DB_RESERVED_CONNECTIONS} kept free "
+        f"by DB_RESERVED_CONNECTIONS). Lower WEB_CONCURRENCY, DB_POOL_SIZE/DB_MAX_OVERFLOW, set "
+        f"DB_CONNECTION_BUDGET, or raise max_connections."
+    )
+    logger.warning(message)
+    return message
+
+
+engine_options = {} if settings.DATABASE_URL.startswith("sqlite") else pool_options()
+engine = create_engine(settings.DATABASE_URL, **engine_options)
 
-engine = create_engine(settings.DATABASE_URL)
+# Statement counts, DB time and repeated statements per request (see app.sql_instrumentation)
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
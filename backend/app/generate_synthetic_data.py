@@ -0,0 +1,427 @@
+"""
+Generate a reproducible synthetic dataset for performance testing
+Run with: python -m app.generate_synthetic_data --users 1000 [--years 2] [--logs-per-week 12] [--seed 42]
+
+Every user gets a fitness profile, gym profiles, workout plans, AI training
+programs (the newest one active and scheduled) and a workout history drawn
+from the exercise catalog, which is seeded with app.seed_data when empty
+(on any database; only the bulk loading below differs).
+Each user draws from its own RNG seeded with (--seed, user number), so the
+same options, catalog and --end-date always produce the same rows (password
+hashes aside), whatever the batch size. 1000 users with the defaults come to
+roughly 800,000 logs.
+
+Rows are written with explicit ids in batches of --batch-users users, with
+COPY on PostgreSQL (executemany elsewhere), and the id sequences are moved
+past them at the end: don't run it while the app is writing to the same
+database. All synthetic users share --password, so load tests can log in
+as <prefix>1, <prefix>2, ...
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import time
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func
+
+from app.auth import get_password_hash
+from app.database import Base, SessionLocal, engine
+from app.models import Exercise, User
+from app.seed_data import seed_exercises
+from app.services.program_engine import (
+    BLOCK_THEMES, GOAL_PRESCRIPTIONS, GOAL_PRIORITY, LEVEL_TO_DIFFICULTY, MESOCYCLE_WEEKS,
+    SESSION_NAMES, choose_split, training_day_offsets
+)
+from app.taxonomy import canonicalize_equipment, equipment_mask
+
+# Columns written per table, in insert order (parents before children)
+TABLE_COLUMNS = {
+    "users": (
+        "id", "email", "username", "hashed_password", "full_name", "is_active", "created_at",
+        "weight_kg", "height_cm", "fitness_level", "fitness_goals", "weight_unit",
+        "distance_unit", "measurement_unit", "age", "sex", "timezone"
+    ),
+    "gym_profiles": ("id", "user_id", "name", "gym_chain", "equipment", "equipment_mask", "created_at"),
+    "workout_plans": (
+        "id", "name", "description", "user_id", "is_template", "difficulty",
+        "duration_weeks", "days_per_week", "created_at"
+    ),
+    "workout_exercise_association": (
+        "workout_plan_id", "exercise_id", "sets", "reps", "rest_seconds", "order"
+    ),
+    "ai_training_programs": (
+        "id", "user_id", "program_type", "name", "description", "fitness_level", "fitness_goals",
+        "available_equipment", "training_preferences", "duration_weeks", "days_per_week",
+        "difficulty", "ai_rationale", "generation_model", "status", "accepted_at", "started_at",
+        "completed_at", "created_at"
+    ),
+    "ai_weekly_plans": ("id", "training_program_id", "week_number", "theme", "created_at"),
+    "ai_daily_workouts": (
+        "id", "training_program_id", "weekly_plan_id", "day_number", "workout_name",
+        "focus_areas", "estimated_duration_minutes", "created_at"
+    ),
+    "ai_daily_workout_exercises": (
+        "id", "daily_workout_id", "exercise_id", "order", "sets", "reps", "rest_seconds",
+        "intensity_level"
+    ),
+    "ai_program_schedule": (
+        "id", "user_id", "training_program_id", "daily_workout_id", "scheduled_date",
+        "week_number", "day_number"
+    ),
+    "workout_logs": (
+        "id", "user_id", "workout_plan_id", "exercise_id", "date", "sets_completed", "reps",
+        "weight_kg", "duration_seconds", "distance_km", "difficulty_rating"
+    ),
+}
+ID_TABLES = [name for name, columns in TABLE_COLUMNS.items() if columns[0] == "id"]
+
+FITNESS_LEVELS = list(LEVEL_TO_DIFFICULTY)
+FITNESS_LEVEL_WEIGHTS = [5, 20, 20, 30, 20, 5]
+TIMEZONES = [
+    None, "UTC", "America/Toronto", "America/New_York", "America/Los_Angeles",
+    "Europe/London", "Europe/Berlin", "Asia/Tokyo", "Australia/Sydney"
+]
+GYM_SETUPS = [
+    ("Home", None, ["dumbbells", "bench", "pull-up bar"]),
+    ("Garage Gym", None, ["barbell", "dumbbells", "bench", "squat rack", "pull-up bar"]),
+    ("Goodlife Fitness", "Goodlife Fitness", [
+        "barbell", "dumbbells", "bench", "cable machine", "squat rack", "pull-up bar",
+        "leg press", "kettlebell", "treadmill", "rowing machine"
+    ]),
+    ("Hotel Gym", None, ["dumbbells", "treadmill"]),
+    ("Bodyweight", None, []),
+]
+INTENSITY_LEVELS = ["warm_up", "working", "working", "heavy"]
+
+
+class IdAllocator:
+    """Hands out ids above the current maximum of each table"""
+
+    def __init__(self, connection):
+        self.next_ids = {
+            table: (connection.exec_driver_sql(f"SELECT MAX(id) FROM {table}").scalar() or 0) + 1
+            for table in ID_TABLES
+        }
+
+    def __call__(self, table: str) -> int:
+        value = self.next_ids[table]
+        self.next_ids[table] = value + 1
+        return value
+
+
+def parse_range(value: str) -> Tuple[int, int]:
+    """"3-5" -> (3, 5), "4" -> (4, 4)"""
+    low, _, high = value.partition("-")
+    low, high = int(low), int(high or low)
+    if not 1 <= low <= high:
+        raise argparse.ArgumentTypeError(f"invalid range: {value}")
+    return low, high
+
+
+def load_catalog(db) -> List[Dict]:
+    if not db.query(Exercise.id).filter(Exercise.is_archived == False).first():
+        seed_exercises()
+    rows = db.query(
+        Exercise.id, Exercise.category, Exercise.difficulty, Exercise.muscle_groups, Exercise.equipment_mask
+    ).filter(
+        Exercise.is_archived == False,
+        Exercise.is_template == True
+    ).order_by(Exercise.id).all()
+    return [
+        {
+            "id": row.id, "category": row.category, "difficulty": row.difficulty,
+            "muscle_groups": row.muscle_groups or [], "equipment_mask": row.equipment_mask or 0
+        }
+        for row in rows
+    ]
+
+
+class UserGenerator:
+    """Builds all rows of one synthetic user into per-table lists"""
+
+    def __init__(self, options, catalog: List[Dict], hashed_password: str, next_id: IdAllocator):
+        self.options = options
+        self.catalog = catalog
+        self.hashed_password = hashed_password
+        self.next_id = next_id
+        self.end = datetime.combine(options.end_date, dt_time(18, 0), tzinfo=timezone.utc)
+        self.history_days = max(1, int(options.years * 365))
+        self.cardio_ids = {exercise["id"] for exercise in catalog if exercise["category"] == "cardio"}
+
+    def generate(self, number: int, out: Dict[str, List[Tuple]]):
+        rng = random.Random(f"{self.options.seed}-{number}")
+        user_id = self.next_id("users")
+        # Later users joined later, so history depth varies between users
+        history_days = int(self.history_days * rng.uniform(0.25, 1.0))
+        joined = self.end - timedelta(days=history_days)
+
+        level = rng.choices(FITNESS_LEVELS, FITNESS_LEVEL_WEIGHTS)[0]
+        goals = rng.sample(GOAL_PRIORITY, rng.randint(1, 2))
+        sex = rng.choice(["male", "female"])
+        weight = round(rng.gauss(82 if sex == "male" else 66, 10), 1)
+        out["users"].append((
+            user_id, f"{self.options.prefix}{number}@example.com", f"{self.options.prefix}{number}",
+            self.hashed_password, f"Synthetic User {number}", rng.random() > 0.05, joined,
+            weight, round(rng.gauss(178 if sex == "male" else 165, 7), 1), level, goals,
+            "kg", "km", "cm", rng.randint(18, 65), sex, rng.choice(TIMEZONES)
+        ))
+
+        gym_mask, gym_equipment = self._gym_profiles(rng, user_id, joined, out)
+        available = [
+            exercise for exercise in self.catalog
+            if exercise["equipment_mask"] & ~gym_mask == 0
+        ] or self.catalog
+        difficulty = LEVEL_TO_DIFFICULTY[level]
+
+        plans = self._workout_plans(rng, user_id, joined, difficulty, available, out)
+        self._programs(rng, user_id, joined, level, goals, gym_equipment, difficulty, available, out)
+        self._workout_logs(rng, user_id, joined, plans, available, out)
+
+    def _gym_profiles(self, rng, user_id: int, joined: datetime, out) -> Tuple[int, List[str]]:
+        first_mask, first_equipment = 0, []
+        for index, (name, chain, equipment) in enumerate(
+            rng.sample(GYM_SETUPS, min(self.options.gyms_per_user, len(GYM_SETUPS)))
+        ):
+            equipment = canonicalize_equipment(equipment)
+            mask = equipment_mask(equipment)
+            # Eligible exercise ids are left NULL and materialized on first use
+            out["gym_profiles"].append((
+                self.next_id("gym_profiles"), user_id, name, chain, equipment, mask, joined
+            ))
+            if index == 0:
+                first_mask, first_equipment = mask, equipment
+        return first_mask, first_equipment
+
+    def _workout_plans(self, rng, user_id, joined, difficulty, available, out) -> List[Tuple[int, List[int]]]:
+        plans = []
+        for index in range(self.options.plans_per_user):
+            plan_id = self.next_id("workout_plans")
+            exercise_ids = [
+                exercise["id"] for exercise in
+                rng.sample(available, min(len(available), rng.randint(4, 8)))
+            ]
+            out["workout_plans"].append((
+                plan_id, f"Plan {index + 1}", "Synthetic workout plan", user_id, False, difficulty,
+                rng.choice([4, 6, 8, 12]), rng.randint(2, 5), joined + timedelta(days=index * 30)
+            ))
+            for order, exercise_id in enumerate(exercise_ids):
+                out["workout_exercise_association"].append((
+                    plan_id, exercise_id, rng.randint(3, 5), rng.choice([5, 8, 10, 12, 15]),
+                    rng.choice([60, 90, 120]), order
+                ))
+            plans.append((plan_id, exercise_ids))
+        return plans
+
+    def _programs(self, rng, user_id, joined, level, goals, gym_equipment, difficulty, available, out):
+        count = self.options.programs_per_user
+        prescription = GOAL_PRESCRIPTIONS[goals[0]]
+        for index in range(count):
+            active = index == count - 1
+            program_id = self.next_id("ai_training_programs")
+            weeks = rng.choice([4, 6, 8])
+            days_per_week = rng.randint(3, 5)
+            # Programs follow each other back to back, the active one started recently
+            started = self.end - timedelta(weeks=weeks * (count - index - 1) + rng.randint(0, weeks - 1))
+            started = max(started, joined)
+            out["ai_training_programs"].append((
+                program_id, user_id, "multi_week", f"{weeks}-Week {goals[0].replace('_', ' ').title()} Program",
+                "Synthetic training program", level, goals, gym_equipment,
+                {"focus": goals[0], "time_per_session": 60}, weeks, days_per_week, difficulty,
+                "Generated for performance testing", "synthetic", "active" if active else "completed",
+                started, started, None if active else started + timedelta(weeks=weeks), started
+            ))
+
+            split = choose_split(days_per_week, level)
+            offsets = training_day_offsets(days_per_week)
+            for week in range(1, weeks + 1):
+                weekly_plan_id = self.next_id("ai_weekly_plans")
+                theme = BLOCK_THEMES[((week - 1) // MESOCYCLE_WEEKS) % len(BLOCK_THEMES)]
+                out["ai_weekly_plans"].append((weekly_plan_id, program_id, week, theme, started))
+                workouts = {}
+                for day, session in enumerate(split, start=1):
+                    workout_id = self.next_id("ai_daily_workouts")
+                    picks = rng.sample(available, min(len(available), rng.randint(4, 6)))
+                    focus = sorted({muscle for exercise in picks for muscle in exercise["muscle_groups"]})
+                    out["ai_daily_workouts"].append((
+                        workout_id, program_id, weekly_plan_id, day, SESSION_NAMES[session],
+                        focus, rng.choice([45, 60, 75]), started
+                    ))
+                    for order, exercise in enumerate(picks):
+                        sets = prescription["sets"]
+                        out["ai_daily_workout_exercises"].append((
+                            self.next_id("ai_daily_workout_exercises"), workout_id, exercise["id"], order,
+                            sets, [prescription["reps"][(week - 1) % MESOCYCLE_WEEKS]] * sets,
+                            prescription["rest"], rng.choice(INTENSITY_LEVELS)
+                        ))
+                    workouts[day] = workout_id
+
+                if active:
+                    by_offset = dict(zip(offsets, sorted(workouts)))
+                    for offset in range(7):
+                        day = by_offset.get(offset)
+                        out["ai_program_schedule"].append((
+                            self.next_id("ai_program_schedule"), user_id, program_id, workouts.get(day),
+                            started.date() + timedelta(days=(week - 1) * 7 + offset), week, day
+                        ))
+
+    def _workout_logs(self, rng, user_id, joined, plans, available, out):
+        options = self.options
+        sessions_per_week = max(1.0, options.logs_per_week / options.exercises_per_session)
+        min_sets, max_sets = options.sets
+        # Working weight per exercise, progressing slowly with plateaus
+        working_weights: Dict[int, float] = {}
+        moment = joined
+        while True:
+            moment += timedelta(days=rng.expovariate(sessions_per_week / 7))
+            if moment >= self.end:
+                break
+            if plans and rng.random() < 0.7:
+                plan_id, exercise_ids = rng.choice(plans)
+                session = rng.sample(exercise_ids, min(len(exercise_ids), options.exercises_per_session))
+            else:
+                plan_id = None
+                session = [
+                    exercise["id"] for exercise in
+                    rng.sample(available, min(len(available), options.exercises_per_session))
+                ]
+            started = moment.replace(hour=rng.choice([6, 7, 12, 17, 18, 19]), minute=rng.randint(0, 59))
+
+            for index, exercise_id in enumerate(session):
+                logged = started + timedelta(minutes=10 * index)
+                if exercise_id in self.cardio_ids:
+                    out["workout_logs"].append((
+                        self.next_id("workout_logs"), user_id, plan_id, exercise_id, logged, 1, [1],
+                        None, rng.randint(600, 3600), round(rng.uniform(1.5, 12.0), 2), rng.randint(3, 9)
+                    ))
+                    continue
+
+                sets = rng.randint(min_sets, max_sets)
+                weight = working_weights.get(exercise_id) or rng.choice([10, 20, 30, 40, 60, 80])
+                if rng.random() < 0.15:
+                    weight += 2.5
+                working_weights[exercise_id] = weight
+                reps = [max(1, rng.randint(6, 12) - set_index) for set_index in range(sets)]
+                out["workout_logs"].append((
+                    self.next_id("workout_logs"), user_id, plan_id, exercise_id, logged, sets, reps,
+                    [weight] * sets, None, None, rng.randint(4, 10)
+                ))
+
+
+def _copy_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _copy_rows(connection, table: str, columns: Tuple[str, ...], rows: List[Tuple]):
+    """COPY ... FROM STDIN in CSV format, where an unquoted empty field is NULL"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(value) for value in row])
+    buffer.seek(0)
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def write_batch(out: Dict[str, List[Tuple]]):
+    with engine.begin() as connection:
+        for table, columns in TABLE_COLUMNS.items():
+            rows = out[table]
+            if not rows:
+                continue
+            if connection.dialect.name == "postgresql":
+                _copy_rows(connection, table, columns, rows)
+            else:
+                connection.execute(
+                    Base.metadata.tables[table].insert(),
+                    [dict(zip(columns, row)) for row in rows]
+                )
+
+
+def reset_sequences():
+    """Move the id sequences past the explicitly inserted ids (PostgreSQL only)"""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as connection:
+        for table in ID_TABLES:
+            connection.exec_driver_sql(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+            )
+
+
+def generate(options) -> Dict[str, int]:
+    db = SessionLocal()
+    try:
+        if db.query(func.count(User.id)).filter(User.username.like(f"{options.prefix}%")).scalar():
+            raise SystemExit(f"Users named {options.prefix}* already exist; pick another --prefix")
+        catalog = load_catalog(db)
+    finally:
+        db.close()
+    if not catalog:
+        raise SystemExit("The exercise catalog is empty")
+
+    with engine.connect() as connection:
+        next_id = IdAllocator(connection)
+    generator = UserGenerator(options, catalog, get_password_hash(options.password), next_id)
+
+    totals = {table: 0 for table in TABLE_COLUMNS}
+    started = time.time()
+    for batch_start in range(1, options.users + 1, options.batch_users):
+        out = {table: [] for table in TABLE_COLUMNS}
+        for number in range(batch_start, min(batch_start + options.batch_users, options.users + 1)):
+            generator.generate(number, out)
+        write_batch(out)
+
+        for table, rows in out.items():
+            totals[table] += len(rows)
+        elapsed = time.time() - started
+        print(
+            f"  {number}/{options.users} users, {totals['workout_logs']} logs "
+            f"({totals['workout_logs'] / elapsed:,.0f} logs/s)"
+        )
+
+    reset_sequences()
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a reproducible synthetic dataset")
+    parser.add_argument("--users", type=int, default=100, help="Number of users to create")
+    parser.add_argument("--years", type=float, default=2.0, help="Maximum years of workout history per user")
+    parser.add_argument("--logs-per-week", type=float, default=12.0, help="Average workout logs (one per exercise) per week")
+    parser.add_argument("--exercises-per-session", type=int, default=4, help="Exercises logged per workout session")
+    parser.add_argument("--sets", type=parse_range, default=(3, 5), help="Sets per logged exercise, e.g. 3-5")
+    parser.add_argument("--gyms-per-user", type=int, default=1)
+    parser.add_argument("--plans-per-user", type=int, default=2)
+    parser.add_argument("--programs-per-user", type=int, default=2, help="AI programs per user; the newest is active")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--end-date", type=date.fromisoformat, default=date.today(),
+        help="Last day of generated history (YYYY-MM-DD); fix it to reproduce a dataset exactly"
+    )
+    parser.add_argument("--prefix", default="synth", help="Username prefix of the generated users")
+    parser.add_argument("--password", default="synthetic-password", help="Password of every generated user")
+    parser.add_argument("--batch-users", type=int, default=200, help="Users written per transaction")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    print(f"Generating {args.users} users (seed {args.seed}, history until {args.end_date})...")
+    started = time.time()
+    totals = generate(args)
+    print(f"Done in {time.time() - started:.1f}s:")
+    for table, count in totals.items():
+        print(f"  {table}: {count}")
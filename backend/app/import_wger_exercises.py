@@ -1,16 +1,46 @@
 """
 Import exercises from wger.de API into WRXS database
 Run with: python -m app.import_wger_exercises
+
+The first run crawls the whole catalog. Later runs are incremental: they read
+exercises newest-first (by last_update_global) until reaching the stored
+watermark, then archive exercises listed in wger's deletion log. Pass --full
+to force a complete crawl, which also archives exercises no longer upstream.
+Afterwards new images and videos are copied into the local media store
+(MEDIA_ROOT), unless --skip-media is given.
 """
-import requests
-import time
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+from contextlib import aclosing
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
 from app.database import SessionLocal, engine
-from app.models import Base, Exercise
+from app.models import Base, CatalogSyncState, Exercise
+from app.services.catalog import (
+    archive_source_exercises, bump_catalog_version, catalog_content_hash,
+    get_source_hashes, upsert_catalog_exercises
+)
+from app.services.catalog_dedupe import detect_duplicate_exercises
+from app.services.media_store import cache_exercise_media
+from app.taxonomy import canonicalize_equipment, canonicalize_muscles, normalize_exercise_fields
 
 
 # wger API configuration
-WGER_API_BASE = "https://wger.de/api/v2"
-WGER_EXERCISE_INFO = f"{WGER_API_BASE}/exerciseinfo/"
+WGER_API_BASE = os.environ.get("WGER_API_BASE", "https://wger.de/api/v2")
+PAGE_SIZE = 100
+CONCURRENCY = 4  # pages in flight; keep it modest, wger is a free community service
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 1.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CHECKPOINT_FILE = ".wger_import_checkpoint.json"
+SOURCE = "wger"
 
 # Mapping wger categories to WRXS categories
 CATEGORY_MAPPING = {
@@ -24,85 +54,128 @@ CATEGORY_MAPPING = {
     "Cardio": "cardio",
 }
 
-# Muscle group name mapping (wger uses different names)
-MUSCLE_MAPPING = {
-    "Biceps brachii": "biceps",
-    "Anterior deltoid": "shoulders",
-    "Serratus anterior": "chest",
-    "Pectoralis major": "chest",
-    "Triceps brachii": "triceps",
-    "Latissimus dorsi": "back",
-    "Brachialis": "biceps",
-    "Obliquus externus abdominis": "abs",
-    "Trapezius": "back",
-    "Gluteus maximus": "glutes",
-    "Quadriceps femoris": "quadriceps",
-    "Biceps femoris": "hamstrings",
-    "Gastrocnemius": "calves",
-    "Soleus": "calves",
-    "Rectus abdominis": "abs",
-    "Deltoid": "shoulders",
-    "Erector spinae": "lower back",
-}
-
-# Equipment name mapping
-EQUIPMENT_MAPPING = {
-    "Barbell": "barbell",
-    "Dumbbell": "dumbbells",
-    "Gym mat": "mat",
-    "Swiss Ball": "swiss ball",
-    "Pull-up bar": "pull-up bar",
-    "none (bodyweight exercise)": None,
-    "Bench": "bench",
-    "Incline bench": "bench",
-    "Kettlebell": "kettlebell",
-    "EZ Bar": "ez bar",
-    "Cable": "cable machine",
-    "Cables": "cable machine",
-}
-
-
-def fetch_wger_exercises(limit=None):
-    """
-    Fetch exercises from wger API
-
-    Args:
-        limit: Maximum number of exercises to fetch (None for all)
-    """
-    exercises = []
-    url = WGER_EXERCISE_INFO
-    page = 1
-
-    print(f"Fetching exercises from {WGER_API_BASE}...")
 
-    while url:
+class ImportCheckpoint:
+    """Page offsets already loaded, persisted so an interrupted import can resume"""
+
+    def __init__(self, path: Optional[str], base_url: str, page_size: int):
+        self.path = path
+        self.base_url = base_url
+        self.page_size = page_size
+        self.done_offsets = set()
+        self.crawl_started_at = None  # when the crawl these offsets belong to began
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            data = json.load(f)
+        # Offsets only mean something for the same source and page size
+        if data.get("base_url") == self.base_url and data.get("page_size") == self.page_size:
+            self.done_offsets = set(data.get("done_offsets", []))
+            self.crawl_started_at = parse_timestamp(data.get("crawl_started_at"))
+
+    def mark_done(self, offset: int):
+        self.done_offsets.add(offset)
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "base_url": self.base_url,
+                "page_size": self.page_size,
+                "crawl_started_at": self.crawl_started_at.isoformat() if self.crawl_started_at else None,
+                "done_offsets": sorted(self.done_offsets)
+            }, f)
+        os.replace(tmp_path, self.path)  # atomic, so a crash never leaves a torn file
+
+    def clear(self):
+        self.done_offsets = set()
+        self.crawl_started_at = None
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+async def fetch_page(
+    client: httpx.AsyncClient,
+    offset: int,
+    page_size: int,
+    path: str = "exerciseinfo/",
+    params: Optional[Dict] = None,
+    retries: int = MAX_RETRIES
+) -> Dict:
+    """Fetch one page of a wger list endpoint, retrying transient failures with exponential backoff"""
+    params = {"language": 2, "limit": page_size, "offset": offset, **(params or {})}  # 2 = English
+
+    for attempt in range(retries + 1):
         try:
-            response = requests.get(url, params={"language": 2})  # 2 = English
+            response = await client.get(path, params=params)
+            if response.status_code in RETRY_STATUSES:
+                raise httpx.HTTPStatusError(
+                    f"Retryable status {response.status_code}", request=response.request, response=response
+                )
             response.raise_for_status()
-            data = response.json()
+            return response.json()
+
+        except (httpx.TransportError, httpx.HTTPStatusError) as e:
+            retryable = not isinstance(e, httpx.HTTPStatusError) or e.response.status_code in RETRY_STATUSES
+            if not retryable or attempt == retries:
+                raise
+            delay = BACKOFF_SECONDS * (2 ** attempt) + random.uniform(0, BACKOFF_SECONDS)
+            print(f"Page at offset {offset} failed ({e}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+async def iter_wger_pages(
+    client: httpx.AsyncClient,
+    checkpoint: ImportCheckpoint,
+    limit: Optional[int] = None,
+    page_size: int = PAGE_SIZE,
+    concurrency: int = CONCURRENCY
+) -> AsyncIterator[Tuple[int, List[Dict]]]:
+    """Yield (offset, exercises) as pages arrive, fetching up to `concurrency` pages at once.
+
+    Pages listed in the checkpoint are skipped. Order of arrival is not page order.
+    """
+    # The first page tells us how many exercises there are
+    first = await fetch_page(client, 0, page_size)
+    total = first.get("count", len(first.get("results", [])))
+    if limit:
+        total = min(total, limit)
 
-            results = data.get("results", [])
-            exercises.extend(results)
+    offsets = [offset for offset in range(0, total, page_size) if offset not in checkpoint.done_offsets]
+    print(f"{total} exercises in {len(range(0, total, page_size))} pages, {len(offsets)} pages to fetch")
 
-            print(f"Fetched page {page}: {len(results)} exercises (Total: {len(exercises)})")
+    semaphore = asyncio.Semaphore(concurrency)
 
-            # Check if we've reached the limit
-            if limit and len(exercises) >= limit:
-                exercises = exercises[:limit]
-                break
+    async def fetch(offset: int) -> Tuple[int, List[Dict]]:
+        if offset == 0:
+            return offset, first.get("results", [])
+        async with semaphore:
+            data = await fetch_page(client, offset, page_size)
+        return offset, data.get("results", [])
+
+    tasks = [asyncio.create_task(fetch(offset)) for offset in offsets]
+    try:
+        for next_page in asyncio.as_completed(tasks):
+            offset, results = await next_page
+            yield offset, results[:max(0, total - offset)]
+    finally:
+        for task in tasks:
+            task.cancel()
 
-            # Get next page
-            url = data.get("next")
-            page += 1
 
-            # Rate limiting - be nice to the API
-            time.sleep(0.5)
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """wger ISO timestamps, as timezone-aware datetimes"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
 
-        except requests.RequestException as e:
-            print(f"Error fetching exercises: {e}")
-            break
 
-    return exercises
+def last_update(wger_exercise: Dict) -> Optional[datetime]:
+    # last_update_global also moves when a translation, image or video changes
+    return parse_timestamp(wger_exercise.get("last_update_global") or wger_exercise.get("last_update"))
 
 
 def transform_wger_exercise(wger_exercise):
@@ -120,44 +193,17 @@ def transform_wger_exercise(wger_exercise):
     category_name = category_data.get("name", "")
     wrxs_category = CATEGORY_MAPPING.get(category_name, "strength")
 
-    # Get primary muscles
-    muscles = []
-    for muscle in wger_exercise.get("muscles", []):
-        # Try name_en first (cleaner), fallback to name
-        muscle_name_en = muscle.get("name_en", "").strip()
-        muscle_name = muscle.get("name", "").strip()
-
-        # Use name_en if available and not empty
-        if muscle_name_en:
-            mapped_muscle = muscle_name_en.lower()
-        else:
-            mapped_muscle = MUSCLE_MAPPING.get(muscle_name, muscle_name.lower())
-
-        if mapped_muscle and mapped_muscle not in muscles:
-            muscles.append(mapped_muscle)
-
-    # Get secondary muscles
-    for muscle in wger_exercise.get("muscles_secondary", []):
-        # Try name_en first (cleaner), fallback to name
-        muscle_name_en = muscle.get("name_en", "").strip()
-        muscle_name = muscle.get("name", "").strip()
-
-        # Use name_en if available and not empty
-        if muscle_name_en:
-            mapped_muscle = muscle_name_en.lower()
-        else:
-            mapped_muscle = MUSCLE_MAPPING.get(muscle_name, muscle_name.lower())
-
-        if mapped_muscle and mapped_muscle not in muscles:
-            muscles.append(mapped_muscle)
+    # Primary then secondary muscles; name_en is cleaner but often empty, the
+    # Latin name is covered by the taxonomy aliases
+    muscles = canonicalize_muscles(
+        muscle.get("name_en", "").strip() or muscle.get("name", "").strip()
+        for muscle in wger_exercise.get("muscles", []) + wger_exercise.get("muscles_secondary", [])
+    )
 
-    # Get equipment
-    equipment_list = []
-    for equip in wger_exercise.get("equipment", []):
-        equip_name = equip.get("name", "")
-        mapped_equip = EQUIPMENT_MAPPING.get(equip_name, equip_name.lower())
-        if mapped_equip and mapped_equip not in equipment_list:
-            equipment_list.append(mapped_equip)
+    # Get equipment ("none (bodyweight exercise)" is dropped)
+    equipment_list = canonicalize_equipment(
+        equip.get("name", "") for equip in wger_exercise.get("equipment", [])
+    )
 
     # Get exercise name and description from translations
     translations = wger_exercise.get("translations", [])
@@ -181,7 +227,6 @@ def transform_wger_exercise(wger_exercise):
     # Clean HTML from description if present
     if description:
         # Simple HTML tag removal (for basic cases)
-        import re
         description = re.sub('<[^<]+?>', '', description)
         description = description.replace('&nbsp;', ' ').strip()
 
@@ -210,7 +255,7 @@ def transform_wger_exercise(wger_exercise):
         else:
             difficulty = "intermediate"
 
-    return {
+    exercise_data = normalize_exercise_fields({
         "name": name,
         "description": description[:500] if description else None,  # Limit description length
         "category": wrxs_category,
@@ -222,87 +267,368 @@ def transform_wger_exercise(wger_exercise):
         "image_url": image_url,
         "is_template": True,
         "created_by_id": None
+    })
+    exercise_data["source"] = SOURCE
+    exercise_data["source_uuid"] = wger_exercise.get("uuid")
+    exercise_data["content_hash"] = catalog_content_hash(exercise_data)
+    return exercise_data
+
+
+def new_stats() -> Dict:
+    return {
+        "inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0, "archived": 0,
+        "newest_update": None, "seen_uuids": set()
     }
 
 
-def import_exercises(limit=None, skip_existing=True, force=False):
+def load_page(db, wger_exercises: List[Dict], stats: Dict, known_hashes: Dict[str, str]) -> Dict[str, int]:
+    """Transform one page and upsert the entries whose content changed. Caller commits.
+
+    Adds to the running stats and returns this page's counts.
     """
-    Import exercises from wger into WRXS database
+    rows = []
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+
+    for wger_ex in wger_exercises:
+        updated_at = last_update(wger_ex)
+        if updated_at and (stats["newest_update"] is None or updated_at > stats["newest_update"]):
+            stats["newest_update"] = updated_at
+        if wger_ex.get("uuid"):
+            stats["seen_uuids"].add(wger_ex["uuid"])
+
+        try:
+            exercise_data = transform_wger_exercise(wger_ex)
+        except Exception as e:
+            print(f"Error transforming exercise: {e}")
+            exercise_data = None
+
+        if not exercise_data or not exercise_data.get("name"):
+            counts["skipped"] += 1
+            continue
+
+        # Same hash as the stored row: nothing to send to the database
+        source_uuid = exercise_data["source_uuid"]
+        if source_uuid and known_hashes.get(source_uuid) == exercise_data["content_hash"]:
+            counts["unchanged"] += 1
+            continue
+
+        rows.append(exercise_data)
+        if source_uuid:
+            known_hashes[source_uuid] = exercise_data["content_hash"]
+
+    for key, value in upsert_catalog_exercises(db, rows).items():
+        counts[key] += value
+    for key, value in counts.items():
+        stats[key] += value
+    return counts
+
+
+def _print_page(label: str, counts: Dict[str, int]):
+    print(
+        f"{label}: {counts['inserted']} inserted, {counts['updated']} updated, "
+        f"{counts['unchanged']} unchanged, {counts['skipped']} skipped"
+    )
+
+
+def _make_client(base_url: str, concurrency: int, transport: Optional[httpx.AsyncBaseTransport]) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=base_url.rstrip("/") + "/",
+        timeout=httpx.Timeout(30.0),
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        transport=transport
+    )
+
+
+def _get_sync_state(db) -> CatalogSyncState:
+    state = db.get(CatalogSyncState, SOURCE)
+    if state is None:
+        state = CatalogSyncState(source=SOURCE)
+        db.add(state)
+    return state
+
+
+async def import_exercises_async(
+    limit: Optional[int] = None,
+    base_url: str = WGER_API_BASE,
+    page_size: int = PAGE_SIZE,
+    concurrency: int = CONCURRENCY,
+    checkpoint_path: Optional[str] = CHECKPOINT_FILE,
+    restart: bool = False,
+    transport: Optional[httpx.AsyncBaseTransport] = None
+) -> Dict:
+    """
+    Full crawl: stream every wger page into the database as it arrives
+
+    Each page is committed on its own and then recorded in the checkpoint
+    file, so a rerun after a crash or Ctrl-C only fetches the missing pages.
+    A complete crawl sets the incremental sync watermarks; if it was resumed
+    they are set to when the first attempt started, so the next sync also
+    applies anything that changed while the earlier pages were loading. Only
+    an uninterrupted crawl has seen every exercise, so only it archives the
+    ones that are gone upstream.
 
     Args:
-        limit: Maximum number of exercises to import (None for all)
-        skip_existing: If True, skip import if exercises already exist
-        force: If True, skip confirmation prompt
+        transport: Optional httpx transport (e.g. httpx.MockTransport) for tests
     """
+    checkpoint = ImportCheckpoint(checkpoint_path, base_url, page_size)
+    if restart:
+        checkpoint.clear()
+    else:
+        checkpoint.load()
+        if checkpoint.done_offsets:
+            print(f"Resuming: {len(checkpoint.done_offsets)} pages already imported")
+    resumed = bool(checkpoint.done_offsets)
+    if not resumed:
+        checkpoint.crawl_started_at = datetime.now(timezone.utc)
+
     db = SessionLocal()
+    stats = new_stats()
+    known_hashes = get_source_hashes(db, SOURCE)
+    run_started_at = datetime.now(timezone.utc)
+    client = _make_client(base_url, concurrency, transport)
+
+    print(f"Fetching exercises from {base_url}...")
 
     try:
-        # Check if exercises already exist
-        if skip_existing and not force:
-            existing_count = db.query(Exercise).filter(Exercise.is_template == True).count()
-            if existing_count > 0:
-                print(f"Database already contains {existing_count} template exercises.")
-                response = input("Do you want to continue importing? (yes/no): ")
-                if response.lower() not in ['yes', 'y']:
-                    print("Import cancelled.")
-                    return
-
-        # Fetch exercises from wger
-        wger_exercises = fetch_wger_exercises(limit=limit)
-        print(f"\nFetched {len(wger_exercises)} exercises from wger")
-
-        # Transform and import
-        imported_count = 0
-        skipped_count = 0
-
-        for wger_ex in wger_exercises:
-            try:
-                exercise_data = transform_wger_exercise(wger_ex)
-
-                if not exercise_data or not exercise_data.get("name"):
-                    skipped_count += 1
-                    continue
-
-                # Check if exercise with this name already exists
-                existing = db.query(Exercise).filter(
-                    Exercise.name == exercise_data["name"]
-                ).first()
-
-                if existing:
-                    skipped_count += 1
-                    continue
-
-                # Create new exercise
-                exercise = Exercise(**exercise_data)
-                db.add(exercise)
-                imported_count += 1
-
-                # Commit in batches of 50
-                if imported_count % 50 == 0:
-                    db.commit()
-                    print(f"Imported {imported_count} exercises...")
-
-            except Exception as e:
-                print(f"Error importing exercise: {e}")
-                skipped_count += 1
-                continue
-
-        # Final commit
+        pages = iter_wger_pages(client, checkpoint, limit=limit, page_size=page_size, concurrency=concurrency)
+        async with client, aclosing(pages):
+            async for offset, wger_exercises in pages:
+                counts = load_page(db, wger_exercises, stats, known_hashes)
+                db.commit()
+                checkpoint.mark_done(offset)
+                _print_page(f"Page at offset {offset}", counts)
+
+            # Only a complete crawl knows where to resume from, and only an uninterrupted one what is gone upstream
+            crawl_started_at = checkpoint.crawl_started_at
+            if limit is None and not resumed:
+                live_uuids = set(get_source_hashes(db, SOURCE))
+                stats["archived"] = archive_source_exercises(db, SOURCE, live_uuids - stats["seen_uuids"])
+
+                state = _get_sync_state(db)
+                state.last_update_watermark = stats["newest_update"]
+                state.last_deletion_watermark = crawl_started_at
+                state.last_full_sync_at = crawl_started_at
+                state.last_sync_at = crawl_started_at
+                db.commit()
+            elif limit is None and crawl_started_at is not None:
+                # Pages loaded before the interruption may predate later upstream changes and deletions
+                state = _get_sync_state(db)
+                state.last_update_watermark = crawl_started_at
+                state.last_deletion_watermark = crawl_started_at
+                state.last_sync_at = run_started_at
+                db.commit()
+
+        checkpoint.clear()
+        return stats
+
+    except BaseException:
+        db.rollback()
+        print(f"Import interrupted after {stats['inserted'] + stats['updated']} changes; rerun to resume")
+        raise
+    finally:
+        # Once per run, also covering the pages committed before an interruption
+        if stats["inserted"] or stats["updated"] or stats["archived"]:
+            bump_catalog_version(db)
+            db.commit()
+        db.close()
+
+
+async def sync_exercises_async(
+    base_url: str = WGER_API_BASE,
+    page_size: int = PAGE_SIZE,
+    transport: Optional[httpx.AsyncBaseTransport] = None
+) -> Optional[Dict]:
+    """
+    Incremental sync: apply only what changed upstream since the last sync
+
+    Returns None when there is no watermark yet (a full crawl is needed).
+    """
+    db = SessionLocal()
+    state = db.get(CatalogSyncState, SOURCE)
+    if state is None or state.last_update_watermark is None:
+        db.close()
+        return None
+
+    update_watermark = state.last_update_watermark
+    deletion_watermark = state.last_deletion_watermark
+    stats = new_stats()
+    known_hashes = get_source_hashes(db, SOURCE)
+    sync_started_at = datetime.now(timezone.utc)
+
+    print(f"Syncing changes since {update_watermark.isoformat()} from {base_url}...")
+
+    try:
+        async with _make_client(base_url, 1, transport) as client:
+            # Newest first; stop at the first page that reaches already-applied changes
+            offset = 0
+            while True:
+                data = await fetch_page(client, offset, page_size, params={"ordering": "-last_update_global"})
+                results = data.get("results", [])
+                changed = [r for r in results if last_update(r) is None or last_update(r) > update_watermark]
+
+                counts = load_page(db, changed, stats, known_hashes)
+                db.commit()
+                _print_page(f"Changes at offset {offset}", counts)
+
+                if len(changed) < len(results) or not data.get("next"):
+                    break
+                offset += page_size
+
+            # Exercises deleted upstream are archived, not deleted: workout logs reference them
+            deleted_uuids, newest_deletion = await fetch_deletions(client, deletion_watermark, page_size)
+            stats["archived"] = archive_source_exercises(db, SOURCE, deleted_uuids)
+
+        state.last_update_watermark = max(update_watermark, stats["newest_update"] or update_watermark)
+        state.last_deletion_watermark = newest_deletion or deletion_watermark or sync_started_at
+        state.last_sync_at = sync_started_at
         db.commit()
+        return stats
+
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        if stats["inserted"] or stats["updated"] or stats["archived"]:
+            bump_catalog_version(db)
+            db.commit()
+        db.close()
 
-        print(f"\n✓ Import complete!")
-        print(f"  Imported: {imported_count} exercises")
-        print(f"  Skipped: {skipped_count} exercises")
 
+async def fetch_deletions(
+    client: httpx.AsyncClient,
+    since: Optional[datetime],
+    page_size: int = PAGE_SIZE
+) -> Tuple[List[str], Optional[datetime]]:
+    """uuids of exercises in wger's deletion log after `since`, and the newest deletion time"""
+    uuids = []
+    newest = None
+    offset = 0
+
+    while True:
+        data = await fetch_page(
+            client, offset, page_size,
+            path="deletion-log/",
+            params={"model_type": "base", "ordering": "-timestamp"}
+        )
+        results = data.get("results", [])
+        fresh = []
+        for entry in results:
+            deleted_at = parse_timestamp(entry.get("timestamp"))
+            if since is None or deleted_at is None or deleted_at > since:
+                fresh.append(entry)
+                if deleted_at and (newest is None or deleted_at > newest):
+                    newest = deleted_at
+
+        uuids.extend(entry["uuid"] for entry in fresh if entry.get("uuid"))
+        if len(fresh) < len(results) or not data.get("next"):
+            return uuids, newest
+        offset += page_size
+
+
+def _print_summary(stats: Dict):
+    print(f"\n✓ Import complete!")
+    print(f"  Inserted: {stats['inserted']} exercises")
+    print(f"  Updated: {stats['updated']} exercises")
+    print(f"  Unchanged: {stats['unchanged']} exercises")
+    print(f"  Archived: {stats['archived']} exercises")
+    print(f"  Skipped: {stats['skipped']} exercises")
+
+
+def detect_duplicates(stats: Dict):
+    """Propose merges for near-duplicates the import may have introduced"""
+    if not (stats["inserted"] or stats["updated"]):
+        return
+    db = SessionLocal()
+    try:
+        found = detect_duplicate_exercises(db)
+        db.commit()
+        if found:
+            print(f"  {found} new near-duplicate exercises; review with python -m app.merge_exercises")
     except Exception as e:
-        print(f"Error during import: {e}")
+        print(f"Error detecting duplicates: {e}")
         db.rollback()
     finally:
         db.close()
 
 
+def cache_media(concurrency: int = CONCURRENCY, transport: Optional[httpx.AsyncBaseTransport] = None):
+    """Copy images and videos not cached yet into the local media store"""
+    db = SessionLocal()
+    try:
+        counts = asyncio.run(cache_exercise_media(db, concurrency=concurrency, transport=transport))
+        print(f"  Media: {counts['downloaded']} downloaded, {counts['failed']} failed, {counts['evicted']} evicted")
+    except Exception as e:
+        print(f"Error caching media: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def import_exercises(limit=None, skip_existing=True, force=False, full=False, media=True, **options):
+    """
+    Import exercises from wger into WRXS database
+
+    Args:
+        limit: Maximum number of exercises to import (None for all)
+        skip_existing: If True, skip import if exercises already exist
+        force: If True, skip confirmation prompt
+        full: If True, crawl everything even when an incremental sync is possible
+        media: If True, download new images and videos into the local media store afterwards
+        options: Passed to import_exercises_async (base_url, concurrency, ...)
+    """
+    if not full and limit is None:
+        sync_options = {key: options[key] for key in ("base_url", "page_size", "transport") if key in options}
+        try:
+            stats = asyncio.run(sync_exercises_async(**sync_options))
+        except Exception as e:
+            print(f"Error during sync: {e}")
+            return
+        if stats is not None:
+            _print_summary(stats)
+            detect_duplicates(stats)
+            if media:
+                cache_media(options.get("concurrency", CONCURRENCY))
+            return
+        print("No previous sync found, crawling the full catalog")
+
+    # Check if exercises already exist
+    if skip_existing and not force:
+        db = SessionLocal()
+        try:
+            existing_count = db.query(Exercise).filter(Exercise.is_template == True).count()
+        finally:
+            db.close()
+        if existing_count > 0:
+            print(f"Database already contains {existing_count} template exercises.")
+            response = input("Do you want to continue importing? (yes/no): ")
+            if response.lower() not in ['yes', 'y']:
+                print("Import cancelled.")
+                return
+
+    try:
+        stats = asyncio.run(import_exercises_async(limit=limit, **options))
+    except Exception as e:
+        print(f"Error during import: {e}")
+        return
+
+    _print_summary(stats)
+    detect_duplicates(stats)
+    if media:
+        cache_media(options.get("concurrency", CONCURRENCY))
+
+
 if __name__ == "__main__":
-    import sys
+    parser = argparse.ArgumentParser(description="Import exercises from wger.de")
+    parser.add_argument("-f", "--force", action="store_true", help="Skip the confirmation prompt")
+    parser.add_argument("--full", action="store_true", help="Crawl the whole catalog instead of syncing changes")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of exercises to import")
+    parser.add_argument("--base-url", default=WGER_API_BASE, help="wger API root, e.g. a local fixture server")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Pages fetched in parallel")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="Progress file used to resume")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--skip-media", action="store_true", help="Don't download images and videos")
+    args = parser.parse_args()
 
     print("=" * 60)
     print("WRXS Exercise Import from wger.de")
@@ -311,8 +637,15 @@ if __name__ == "__main__":
     # Create tables if they don't exist
     Base.metadata.create_all(bind=engine)
 
-    # Check for --force flag
-    force = "--force" in sys.argv or "-f" in sys.argv
-
-    # Import exercises (limit to 100 for testing, remove limit for all)
-    import_exercises(limit=None, skip_existing=True, force=force)
+    import_exercises(
+        limit=args.limit,
+        skip_existing=True,
+        force=args.force,
+        full=args.full,
+        media=not args.skip_media,
+        base_url=args.base_url,
+        page_size=args.page_size,
+        concurrency=args.concurrency,
+        checkpoint_path=args.checkpoint,
+        restart=args.restart
+    )
@@ -0,0 +1,101 @@
+"""
+Recompute adaptation insights for all active users
+Run with: python -m app.insights_job [--workers 4] [--batch-size 500] [--full]
+
+Meant to run nightly (cron, k8s CronJob, ...). Users are streamed in id order,
+their workout history is aggregated in one grouped query per batch, insights
+are computed in a process pool and upserted per (user, insight type). A
+per-user watermark (newest analyzed workout log and when it was analyzed)
+skips users whose 30-day window holds the same logs as last time: no new
+logs, and none slid out of the window since. --full ignores it.
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List
+
+from app.database import SessionLocal, engine
+from app.models import Base, User
+from app.services.insights import (
+    HISTORY_DAYS, aggregate_workout_history, compute_adaptation_insights,
+    get_watermarks, needs_recompute, save_adaptation_insights
+)
+
+
+def iter_active_user_ids(db, batch_size: int) -> Iterator[List[int]]:
+    """Keyset-paginate active user ids so memory stays flat regardless of user count"""
+    last_id = 0
+    while True:
+        ids = [
+            user_id for (user_id,) in db.query(User.id).filter(
+                User.is_active == True,
+                User.id > last_id
+            ).order_by(User.id).limit(batch_size)
+        ]
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def run(workers: int = 4, batch_size: int = 500, days: int = HISTORY_DAYS, full: bool = False):
+    db = SessionLocal()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+    started = time.time()
+    scanned = processed = saved = 0
+
+    try:
+        for user_ids in iter_active_user_ids(db, batch_size):
+            scanned += len(user_ids)
+
+            histories = aggregate_workout_history(db, user_ids, days=days)
+            if not full:
+                watermarks = get_watermarks(db, histories.keys())
+                histories = {
+                    user_id: history for user_id, history in histories.items()
+                    if needs_recompute(history, watermarks.get(user_id))
+                }
+            if not histories:
+                continue
+
+            pending = list(histories.items())
+            if executor:
+                chunksize = max(1, len(pending) // (workers * 4))
+                results = executor.map(compute_adaptation_insights, [h for _, h in pending], chunksize=chunksize)
+            else:
+                results = map(compute_adaptation_insights, [h for _, h in pending])
+
+            for (user_id, history), insights in zip(pending, results):
+                saved += len(save_adaptation_insights(db, user_id, insights, history))
+                processed += 1
+
+            db.commit()
+            print(f"  {scanned} users scanned, {processed} recomputed, {saved} insights saved")
+
+    except Exception as e:
+        print(f"Error computing insights: {e}")
+        db.rollback()
+        raise
+    finally:
+        if executor:
+            executor.shutdown()
+        db.close()
+
+    print(f"\n✓ Insights complete in {time.time() - started:.1f}s")
+    print(f"  Users scanned: {scanned}")
+    print(f"  Users recomputed: {processed}")
+    print(f"  Insights saved: {saved}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch-compute adaptation insights for all active users")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes (0 computes in-process)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Users per aggregation query and commit")
+    parser.add_argument("--days", type=int, default=HISTORY_DAYS, help="History window analyzed per user")
+    parser.add_argument("--full", action="store_true", help="Recompute every user, ignoring watermarks")
+    args = parser.parse_args()
+
+    # Create tables if they don't exist
+    Base.metadata.create_all(bind=engine)
+
+    run(workers=args.workers, batch_size=args.batch_size, days=args.days, full=args.full)
@@ -0,0 +1,330 @@
+"""
+Local OpenAI-compatible stand-in for load testing the AI endpoints offline
+Run with: python -m app.llm_stub --port 8100
+
+Point the backend at it with:
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://localhost:8100/v1
+
+Modes:
+    synthetic  Build a valid JSON answer from the prompt (default)
+    replay     Serve recorded responses from --fixtures-dir, synthetic when missing
+    record     Forward to --upstream-url and save every response to --fixtures-dir
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class StubConfig:
+    """Runtime knobs for the stub, settable from the CLI or WRXS_LLM_STUB_* env vars"""
+
+    def __init__(
+        self,
+        mode: str = "synthetic",
+        fixtures_dir: str = "llm_fixtures",
+        upstream_url: str = "https://api.openai.com/v1",
+        latency_ms: float = 0.0,
+        latency_jitter_ms: float = 0.0,
+        failure_rate: float = 0.0,
+        failure_status: int = 500,
+        malformed_rate: float = 0.0,
+        strict_replay: bool = False,
+        seed: Optional[int] = None
+    ):
+        self.mode = mode
+        self.fixtures_dir = fixtures_dir
+        self.upstream_url = upstream_url.rstrip("/")
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.malformed_rate = malformed_rate
+        self.strict_replay = strict_replay
+        self.rng = random.Random(seed)
+
+    @classmethod
+    def from_env(cls) -> "StubConfig":
+        env = os.environ.get
+        return cls(
+            mode=env("WRXS_LLM_STUB_MODE", "synthetic"),
+            fixtures_dir=env("WRXS_LLM_STUB_FIXTURES_DIR", "llm_fixtures"),
+            upstream_url=env("WRXS_LLM_STUB_UPSTREAM_URL", "https://api.openai.com/v1"),
+            latency_ms=float(env("WRXS_LLM_STUB_LATENCY_MS", "0")),
+            latency_jitter_ms=float(env("WRXS_LLM_STUB_LATENCY_JITTER_MS", "0")),
+            failure_rate=float(env("WRXS_LLM_STUB_FAILURE_RATE", "0")),
+            failure_status=int(env("WRXS_LLM_STUB_FAILURE_STATUS", "500")),
+            malformed_rate=float(env("WRXS_LLM_STUB_MALFORMED_RATE", "0")),
+            strict_replay=env("WRXS_LLM_STUB_STRICT_REPLAY", "") in ("1", "true", "yes"),
+            seed=int(env("WRXS_LLM_STUB_SEED")) if env("WRXS_LLM_STUB_SEED") else None
+        )
+
+
+def fixture_key(body: Dict) -> str:
+    """Stable key for a chat request: model plus the full message list"""
+    canonical = json.dumps(
+        {"model": body.get("model"), "messages": body.get("messages", [])},
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def load_fixture(fixtures_dir: str, key: str) -> Optional[Dict]:
+    path = os.path.join(fixtures_dir, f"{key}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)["response"]
+
+
+def save_fixture(fixtures_dir: str, key: str, request_body: Dict, response_body: Dict):
+    os.makedirs(fixtures_dir, exist_ok=True)
+    path = os.path.join(fixtures_dir, f"{key}.json")
+    with open(path, "w") as f:
+        json.dump({"request": request_body, "response": response_body}, f, indent=2)
+
+
+def _estimate_tokens(text: str) -> int:
+    # Rough OpenAI heuristic: ~4 characters per token
+    return max(1, len(text) // 4)
+
+
+def _extract_exercise_names(prompt: str) -> List[str]:
+    """Pull exercise names out of the "- Name (category, ...)" lines of our prompts"""
+    names = []
+    for match in re.finditer(r"^- (.+?) \(", prompt, re.MULTILINE):
+        name = match.group(1).strip()
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def _extract_int(pattern: str, prompt: str, default: int) -> int:
+    match = re.search(pattern, prompt)
+    return int(match.group(1)) if match else default
+
+
+def _synthetic_exercises(rng: random.Random, names: List[str], count: int, reps: str) -> List[Dict]:
+    picked = rng.sample(names, min(count, len(names))) if names else []
+    return [
+        {
+            "exercise_name": name,
+            "sets": 3,
+            "reps": reps,
+            "rest_seconds": 90,
+            "intensity_level": "working",
+            "notes": "Synthetic stub exercise"
+        }
+        for name in picked
+    ]
+
+
+def synthesize_content(prompt: str, rng: random.Random) -> Dict:
+    """Build a response in the JSON shape requested by the prompt"""
+    names = _extract_exercise_names(prompt)
+    minutes = _extract_int(r"~?(\d+) minutes", prompt, 60)
+
+    if '"weeks"' in prompt:
+        duration_weeks = _extract_int(r"Duration: (\d+) weeks", prompt, 4)
+        days_per_week = _extract_int(r"Weekly Structure: (\d+) training days", prompt, 3)
+        weeks = []
+        for week_number in range(1, duration_weeks + 1):
+            deload = week_number % 4 == 0
+            weeks.append({
+                "week_number": week_number,
+                "theme": "Deload" if deload else f"Build week {week_number}",
+                "notes": "Synthetic stub week",
+                "workouts": [
+                    {
+                        "day_number": day,
+                        "workout_name": f"Session {day}",
+                        "focus_areas": ["full_body"],
+                        "estimated_duration_minutes": minutes,
+                        "notes": "Synthetic stub session",
+                        "exercises": _synthetic_exercises(rng, names, 5, "12-15" if deload else "8-12")
+                    }
+                    for day in range(1, days_per_week + 1)
+                ]
+            })
+        return {
+            "program_name": f"{duration_weeks}-Week Stub Program",
+            "program_description": "Synthetic program produced by the local LLM stub.",
+            "program_rationale": "Generated offline for load testing.",
+            "weeks": weeks
+        }
+
+    if '"workout_name"' in prompt:
+        return {
+            "workout_name": "Stub Workout",
+            "focus_areas": ["full_body"],
+            "estimated_duration_minutes": minutes,
+            "rationale": "Generated offline for load testing.",
+            "notes": "Synthetic stub session",
+            "exercises": _synthetic_exercises(rng, names, 6, "8-10")
+        }
+
+    picked = rng.sample(names, min(5, len(names))) if names else []
+    return {
+        "exercises": picked,
+        "rationale": "Generated offline by the local LLM stub for load testing."
+    }
+
+
+def build_completion(model: str, content: str, prompt_text: str) -> Dict:
+    prompt_tokens = _estimate_tokens(prompt_text)
+    completion_tokens = _estimate_tokens(content)
+    return {
+        "id": f"chatcmpl-stub-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+
+def _error_response(status_code: int, message: str, error_type: str = "server_error") -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"error": {"message": message, "type": error_type, "param": None, "code": None}}
+    )
+
+
+def create_app(config: Optional[StubConfig] = None) -> FastAPI:
+    config = config or StubConfig.from_env()
+    stats = {"requests": 0, "failures": 0, "replayed": 0, "recorded": 0, "synthetic": 0}
+
+    app = FastAPI(title="WRXS LLM stub")
+    app.state.config = config
+    app.state.stats = stats
+
+    @app.get("/health")
+    def health():
+        return {"status": "healthy", "mode": config.mode}
+
+    @app.get("/stats")
+    def get_stats():
+        return stats
+
+    @app.get("/v1/models")
+    def list_models():
+        return {"object": "list", "data": [{"id": "gpt-4-turbo-preview", "object": "model", "owned_by": "wrxs-stub"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+
+        delay_ms = config.latency_ms
+        if config.latency_jitter_ms:
+            delay_ms += config.rng.uniform(0, config.latency_jitter_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+
+        if config.failure_rate and config.rng.random() < config.failure_rate:
+            stats["failures"] += 1
+            return _error_response(config.failure_status, "Injected failure from LLM stub")
+
+        model = body.get("model", "gpt-4-turbo-preview")
+        messages = body.get("messages", [])
+        prompt_text = "\n".join(str(m.get("content", "")) for m in messages)
+        key = fixture_key(body)
+
+        if config.mode == "record":
+            headers = {"Authorization": request.headers.get("authorization", "")}
+            try:
+                async with httpx.AsyncClient(timeout=120) as client:
+                    upstream = await client.post(f"{config.upstream_url}/chat/completions", json=body, headers=headers)
+                response_body = upstream.json()
+            except (httpx.HTTPError, ValueError) as e:
+                # Unreachable upstream or a non-JSON body (proxy error page, truncated
+                # response): answer with an API error so the backend falls back as usual
+                stats["failures"] += 1
+                return _error_response(502, f"Upstream request failed: {e}")
+            if upstream.status_code != 200:
+                return JSONResponse(status_code=upstream.status_code, content=response_body)
+            save_fixture(config.fixtures_dir, key, body, response_body)
+            stats["recorded"] += 1
+            return response_body
+
+        if config.mode == "replay":
+            recorded = load_fixture(config.fixtures_dir, key)
+            if recorded is not None:
+                stats["replayed"] += 1
+                return recorded
+            if config.strict_replay:
+                return _error_response(404, f"No recorded response for request {key}", "invalid_request_error")
+
+        if config.malformed_rate and config.rng.random() < config.malformed_rate:
+            content = "Sorry, I can't produce JSON right now."
+        else:
+            user_prompt = next(
+                (m.get("content", "") for m in reversed(messages) if m.get("role") == "user"),
+                prompt_text
+            )
+            content = json.dumps(synthesize_content(user_prompt, config.rng))
+
+        stats["synthetic"] += 1
+        return build_completion(model, content, prompt_text)
+
+    return app
+
+
+def main():
+    defaults = StubConfig.from_env()
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub for WRXS load testing")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--mode", choices=["synthetic", "replay", "record"], default=defaults.mode)
+    parser.add_argument("--fixtures-dir", default=defaults.fixtures_dir)
+    parser.add_argument("--upstream-url", default=defaults.upstream_url)
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="Fixed delay added to every completion")
+    parser.add_argument("--latency-jitter-ms", type=float, default=defaults.latency_jitter_ms, help="Uniform random extra delay")
+    parser.add_argument("--failure-rate", type=float, default=defaults.failure_rate, help="Fraction of requests answered with an error")
+    parser.add_argument("--failure-status", type=int, default=defaults.failure_status, help="HTTP status used for injected failures")
+    parser.add_argument("--malformed-rate", type=float, default=defaults.malformed_rate, help="Fraction of answers that are not valid JSON")
+    parser.add_argument("--strict-replay", action="store_true", default=defaults.strict_replay, help="Fail instead of synthesizing when a fixture is missing")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        mode=args.mode,
+        fixtures_dir=args.fixtures_dir,
+        upstream_url=args.upstream_url,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        failure_rate=args.failure_rate,
+        failure_status=args.failure_status,
+        malformed_rate=args.malformed_rate,
+        strict_replay=args.strict_replay,
+        seed=args.seed
+    )
+
+    import uvicorn
+    print(f"Starting LLM stub in {config.mode} mode on {args.host}:{args.port}")
+    uvicorn.run(create_app(config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,10 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.database import engine, Base
-from app.routers import auth, exercises, workout_plans, workout_logs, ai_suggestions, personal_trainer, gym_profiles, progress_tracking, dashboard_stats
+from app.metrics import setup_metrics
+from app.profiling import ProfilingMiddleware
+from app.sql_instrumentation import SQLInstrumentationMiddleware
+from app.routers import auth, exercises, workout_plans, workout_logs, ai_suggestions, personal_trainer, gym_profiles, progress_tracking, dashboard_stats, media, admin
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -13,6 +16,16 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Opt-in sampling profiler (X-Profile header from admins, PROFILE_SAMPLE_RATE)
+app.add_middleware(ProfilingMiddleware)
+
+# Server-Timing header and N+1 warnings per request
+app.add_middleware(SQLInstrumentationMiddleware)
+
+# Request latency, SQL and pool metrics at /metrics
+if settings.METRICS_ENABLED:
+    setup_metrics(app, engine)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -32,6 +45,8 @@ app.include_router(personal_trainer.router)
 app.include_router(gym_profiles.router)
 app.include_router(progress_tracking.router)
 app.include_router(dashboard_stats.router)
+app.include_router(media.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
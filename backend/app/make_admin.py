@@ -0,0 +1,30 @@
+"""
+Grant or revoke admin access (profiles and other /api/admin endpoints)
+Run with: python -m app.make_admin <username> [--revoke]
+
+On a database created before admin access existed, run
+python -m app.backfill_catalog first: it adds the users.is_admin column.
+"""
+import argparse
+
+from app.database import SessionLocal
+from app.models import User
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grant or revoke admin access")
+    parser.add_argument("username")
+    parser.add_argument("--revoke", action="store_true", help="Remove admin access instead")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == args.username).first()
+        if user is None:
+            print(f"No user named {args.username!r}")
+            raise SystemExit(1)
+        user.is_admin = not args.revoke
+        db.commit()
+        print(f"{user.username} is {'now' if user.is_admin else 'no longer'} an admin")
+    finally:
+        db.close()
@@ -0,0 +1,107 @@
+"""
+Review and merge near-duplicate catalog exercises
+Run with: python -m app.merge_exercises [--detect] [--list] [--merge ID ...] [--reject ID ...]
+
+Candidates are found with MinHash/LSH over name, muscles and equipment
+(app.services.catalog_dedupe), automatically after each wger import or with
+--detect. Merging remaps workout logs, workout plans and AI program
+exercises to the surviving exercise and archives the duplicate.
+"""
+import argparse
+from datetime import datetime, timezone
+
+from app.database import SessionLocal, engine
+from app.models import Base, ExerciseMergeCandidate
+from app.services.catalog_dedupe import detect_duplicate_exercises, merge_exercises
+
+
+def list_candidates(db, min_similarity: float = 0.0):
+    candidates = db.query(ExerciseMergeCandidate).filter(
+        ExerciseMergeCandidate.status == "pending",
+        ExerciseMergeCandidate.similarity >= min_similarity
+    ).order_by(ExerciseMergeCandidate.similarity.desc(), ExerciseMergeCandidate.id).all()
+
+    if not candidates:
+        print("No pending merge candidates.")
+    for candidate in candidates:
+        print(
+            f"  [{candidate.id}] {candidate.similarity:.2f}  "
+            f"keep #{candidate.keep_exercise_id} {candidate.keep_exercise.name!r}  <-  "
+            f"merge #{candidate.merge_exercise_id} {candidate.merge_exercise.name!r}"
+        )
+    return candidates
+
+
+def merge_candidate(db, candidate_id: int, swap: bool = False):
+    candidate = db.get(ExerciseMergeCandidate, candidate_id)
+    if candidate is None or candidate.status != "pending":
+        print(f"  [{candidate_id}] not a pending candidate, skipped")
+        return
+
+    keep_id, merge_id = candidate.keep_exercise_id, candidate.merge_exercise_id
+    if swap:
+        keep_id, merge_id = merge_id, keep_id
+        candidate.keep_exercise_id, candidate.merge_exercise_id = keep_id, merge_id
+        db.flush()
+
+    counts = merge_exercises(db, keep_id, merge_id)
+    db.commit()
+    print(
+        f"  [{candidate_id}] merged #{merge_id} into #{keep_id}: "
+        + ", ".join(f"{count} {table}" for table, count in counts.items())
+    )
+
+
+def reject_candidate(db, candidate_id: int):
+    updated = db.query(ExerciseMergeCandidate).filter(
+        ExerciseMergeCandidate.id == candidate_id,
+        ExerciseMergeCandidate.status == "pending"
+    ).update({"status": "rejected", "resolved_at": datetime.now(timezone.utc)}, synchronize_session=False)
+    db.commit()
+    print(f"  [{candidate_id}] {'rejected' if updated else 'not a pending candidate, skipped'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find and merge near-duplicate catalog exercises")
+    parser.add_argument("--detect", action="store_true", help="Scan the catalog for new candidates first")
+    parser.add_argument("--threshold", type=float, default=None, help="Similarity for --detect (default from settings)")
+    parser.add_argument("--list", action="store_true", help="Show pending candidates")
+    parser.add_argument("--merge", type=int, nargs="+", default=[], metavar="ID", help="Merge these candidates")
+    parser.add_argument("--swap", action="store_true", help="With --merge, keep the other exercise instead")
+    parser.add_argument("--merge-above", type=float, default=None, metavar="SIMILARITY",
+                        help="Merge every pending candidate at least this similar")
+    parser.add_argument("--reject", type=int, nargs="+", default=[], metavar="ID", help="Never propose these again")
+    args = parser.parse_args()
+
+    # Create tables if they don't exist
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        if args.detect:
+            found = detect_duplicate_exercises(db, threshold=args.threshold)
+            db.commit()
+            print(f"Found {found} new merge candidates")
+
+        for candidate_id in args.merge:
+            merge_candidate(db, candidate_id, swap=args.swap)
+
+        if args.merge_above is not None:
+            for candidate in list_candidates(db, min_similarity=args.merge_above):
+                # An earlier merge in this loop may have resolved it already
+                if candidate.status == "pending":
+                    merge_candidate(db, candidate.id)
+
+        for candidate_id in args.reject:
+            reject_candidate(db, candidate_id)
+
+        if args.list or not (args.detect or args.merge or args.merge_above is not None or args.reject):
+            print("Pending merge candidates:")
+            list_candidates(db)
+
+    except Exception as e:
+        print(f"Error merging exercises: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,179 @@
+"""
+Prometheus metrics, exposed at GET /metrics
+
+Recording is a few counter/histogram updates per request, LLM call,
+catalog cache lookup and pool checkout.
+
+Under gunicorn every worker is its own process. With PROMETHEUS_MULTIPROC_DIR
+set (gunicorn.conf.py does), each worker writes its samples there and
+/metrics aggregates all workers, whichever one answers the scrape.
+
+/metrics is meant for an internal Prometheus only: keep the backend port off
+the public network, or set METRICS_TOKEN and scrape with that bearer token.
+"""
+import hmac
+import os
+from time import perf_counter
+from typing import Optional
+
+from fastapi import Header, HTTPException
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from starlette.responses import Response
+
+from app.config import settings
+from app.sql_instrumentation import route_label, track_queries
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "wrxs_http_request_duration_seconds",
+    "HTTP request latency",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "wrxs_db_queries_per_request",
+    "SQL statements executed while handling a request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+)
+DB_SECONDS_PER_REQUEST = Histogram(
+    "wrxs_db_query_seconds_per_request",
+    "Time spent in SQL statements while handling a request",
+    ["route"],
+    buckets=LATENCY_BUCKETS
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "wrxs_db_pool_checkout_wait_seconds",
+    "Time waiting for a pooled database connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+# Per worker; "livesum" adds up the workers that are still running
+DB_POOL_SIZE = Gauge("wrxs_db_pool_size", "Configured pool size", multiprocess_mode="livesum")
+DB_POOL_CHECKED_OUT = Gauge("wrxs_db_pool_checked_out", "Connections currently in use", multiprocess_mode="livesum")
+DB_POOL_OVERFLOW = Gauge(
+    "wrxs_db_pool_overflow", "Connections opened beyond the pool size", multiprocess_mode="livesum"
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "wrxs_llm_request_duration_seconds",
+    "Chat completion latency",
+    ["operation", "model", "outcome"],
+    buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+)
+LLM_TOKENS = Counter(
+    "wrxs_llm_tokens",
+    "Tokens used by chat completions",
+    ["operation", "model", "kind"]
+)
+CACHE_HITS = Counter("wrxs_cache_hits", "Catalog cache hits", ["cache"])
+CACHE_MISSES = Counter("wrxs_cache_misses", "Catalog cache misses", ["cache"])
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: request latency plus per-request query count and time.
+
+    Routes are labelled by template ("/api/exercises/{exercise_id}"), never by
+    raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        with track_queries() as stats:
+            start = perf_counter()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                elapsed = perf_counter() - start
+                route = route_label(scope)
+                HTTP_REQUEST_SECONDS.labels(scope["method"], route, str(status["code"])).observe(elapsed)
+                DB_QUERIES_PER_REQUEST.labels(route).observe(stats.count)
+                DB_SECONDS_PER_REQUEST.labels(route).observe(stats.seconds)
+
+
+def _time_connection_checkout(engine: Engine):
+    """Time Engine.raw_connection(), which every Connection and Session gets its
+    DBAPI connection from; it blocks while the pool is exhausted"""
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection():
+        start = perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            DB_POOL_WAIT_SECONDS.observe(perf_counter() - start)
+
+    engine.raw_connection = timed_raw_connection
+
+
+def _track_pool_usage(pool: QueuePool):
+    """Keep the pool gauges current from the pool's checkout and checkin events"""
+    DB_POOL_SIZE.set(pool.size())
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKED_OUT.inc()
+        # QueuePool counts overflow from -pool_size until the pool is full
+        DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+        DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+
+_installed_engines = set()
+
+
+def instrument_pool(engine: Engine):
+    """Time pool checkouts and export pool usage. Safe to call more than once."""
+    if id(engine) in _installed_engines:
+        return
+    _installed_engines.add(id(engine))
+
+    if isinstance(engine.pool, QueuePool):
+        _time_connection_checkout(engine)
+        _track_pool_usage(engine.pool)
+
+
+def metrics_registry() -> CollectorRegistry:
+    """Registry to serve: every worker's samples in multiprocess mode, else this process's"""
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def setup_metrics(app, engine: Engine):
+    """Install the middleware, pool instrumentation and the /metrics route on an app
+
+    Per-request statement counts come from app.sql_instrumentation, whose
+    engine hooks are installed in app.database.
+    """
+    instrument_pool(engine)
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics(authorization: Optional[str] = Header(None)):
+        if settings.METRICS_TOKEN and not hmac.compare_digest(
+            authorization or "", f"Bearer {settings.METRICS_TOKEN}"
+        ):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+        return Response(generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST)
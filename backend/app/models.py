@@ -1,9 +1,9 @@
 from sqlalchemy import (
-    Column, Integer, String, Float, DateTime, ForeignKey,
-    Boolean, Text, Table, JSON
+    Column, Integer, BigInteger, String, Float, Date, DateTime, ForeignKey,
+    Boolean, Text, Table, JSON, Index, UniqueConstraint
 )
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from app.database import Base
 
 
@@ -30,6 +30,7 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     full_name = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
+    is_admin = Column(Boolean, nullable=False, default=False, server_default=text("false"))  # ops endpoints under /api/admin
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # User fitness profile
@@ -45,6 +46,7 @@ class User(Base):
     age = Column(Integer, nullable=True)
     sex = Column(String, nullable=True)  # male or female
     location = Column(String, nullable=True)  # city, country
+    timezone = Column(String, nullable=True)  # IANA name, e.g. "America/Toronto"; UTC when unset
 
     # Relationships
     workout_plans = relationship("WorkoutPlan", back_populates="user")
@@ -55,14 +57,24 @@ class User(Base):
 
 class Exercise(Base):
     __tablename__ = "exercises"
+    __table_args__ = (
+        # Catalog (template) exercises are unique by normalized name; user-created ones are not
+        Index("uq_exercises_template_name_key", "name_key", unique=True, postgresql_where=text("is_template")),
+        Index("ix_exercises_source_uuid", "source", "source_uuid"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)
+    name_key = Column(String, nullable=True)  # services.catalog.exercise_name_key(name)
     description = Column(Text, nullable=True)
     category = Column(String, nullable=False)  # strength, cardio, flexibility, sports
     muscle_groups = Column(JSON, nullable=False)  # ["chest", "triceps"]
     equipment = Column(JSON, nullable=True)  # ["barbell", "bench"]
     difficulty = Column(String, nullable=False)  # beginner, intermediate, advanced
+
+    # Bitmasks over app.taxonomy ids, kept in sync with muscle_groups / equipment
+    muscle_mask = Column(BigInteger, nullable=False, default=0, server_default="0")
+    equipment_mask = Column(BigInteger, nullable=False, default=0, server_default="0")  # required equipment
     instructions = Column(Text, nullable=True)
     video_url = Column(String, nullable=True)
     image_url = Column(String, nullable=True)
@@ -70,9 +82,33 @@ class Exercise(Base):
     created_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # External catalog sync
+    source = Column(String, nullable=True)  # "wger"; NULL for seed data and user-created exercises
+    source_uuid = Column(String, nullable=True)  # id of the exercise in the source catalog
+    content_hash = Column(String(64), nullable=True)  # sha256 of the imported fields, to skip unchanged rows
+    is_archived = Column(Boolean, nullable=False, default=False, server_default=text("false"))  # deleted upstream or merged
+    merged_into_id = Column(Integer, ForeignKey("exercises.id"), nullable=True)  # survivor of a duplicate merge
+
+    # Local copies of image_url / video_url in the media store (services.media_store)
+    image_sha256 = Column(String(64), nullable=True)
+    thumbnail_sha256 = Column(String(64), nullable=True)
+    video_sha256 = Column(String(64), nullable=True)
+
     # Relationships
     workout_plans = relationship("WorkoutPlan", secondary=workout_exercise_association, back_populates="exercises")
 
+    @property
+    def local_image_url(self):
+        return f"/api/media/{self.image_sha256}" if self.image_sha256 else None
+
+    @property
+    def thumbnail_url(self):
+        return f"/api/media/{self.thumbnail_sha256}" if self.thumbnail_sha256 else None
+
+    @property
+    def local_video_url(self):
+        return f"/api/media/{self.video_sha256}" if self.video_sha256 else None
+
 
 class WorkoutPlan(Base):
     __tablename__ = "workout_plans"
@@ -96,6 +132,10 @@ class WorkoutPlan(Base):
 
 class WorkoutLog(Base):
     __tablename__ = "workout_logs"
+    __table_args__ = (
+        # Every history, stats and dashboard query filters one user's logs by date
+        Index("ix_workout_logs_user_date", "user_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -123,7 +163,7 @@ class AITrainingProgram(Base):
     __tablename__ = "ai_training_programs"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
 
     # Program metadata
     program_type = Column(String, nullable=False)  # "daily" or "multi_week"
@@ -151,6 +191,9 @@ class AITrainingProgram(Base):
     started_at = Column(DateTime(timezone=True), nullable=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
 
+    # Rendered AITrainingProgramResponse JSON; NULL means it must be rebuilt
+    snapshot_json = Column(Text, nullable=True)
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -159,13 +202,14 @@ class AITrainingProgram(Base):
     weekly_plans = relationship("AIWeeklyPlan", back_populates="training_program", cascade="all, delete-orphan")
     daily_workouts = relationship("AIDailyWorkout", back_populates="training_program")
     adaptation_insights = relationship("AIAdaptationInsight", back_populates="training_program")
+    schedule_entries = relationship("AIProgramScheduleEntry", back_populates="training_program", cascade="all, delete-orphan")
 
 
 class AIWeeklyPlan(Base):
     __tablename__ = "ai_weekly_plans"
 
     id = Column(Integer, primary_key=True, index=True)
-    training_program_id = Column(Integer, ForeignKey("ai_training_programs.id"), nullable=False)
+    training_program_id = Column(Integer, ForeignKey("ai_training_programs.id"), nullable=False, index=True)
     week_number = Column(Integer, nullable=False)  # 1, 2, 3, etc.
 
     theme = Column(String, nullable=True)  # e.g., "Strength Foundation", "Progressive Overload"
@@ -182,8 +226,8 @@ class AIDailyWorkout(Base):
     __tablename__ = "ai_daily_workouts"
 
     id = Column(Integer, primary_key=True, index=True)
-    training_program_id = Column(Integer, ForeignKey("ai_training_programs.id"), nullable=False)
-    weekly_plan_id = Column(Integer, ForeignKey("ai_weekly_plans.id"), nullable=True)  # NULL for standalone daily workouts
+    training_program_id = Column(Integer, ForeignKey("ai_training_programs.id"), nullable=False, index=True)
+    weekly_plan_id = Column(Integer, ForeignKey("ai_weekly_plans.id"), nullable=True, index=True)  # NULL for standalone daily workouts
 
     day_number = Column(Integer, nullable=False)  # For multi-week: day within week; For daily: sequential number
     workout_name = Column(String, nullable=False)  # e.g., "Upper Body Strength", "Leg Day"
@@ -204,7 +248,7 @@ class AIDailyWorkoutExercise(Base):
     __tablename__ = "ai_daily_workout_exercises"
 
     id = Column(Integer, primary_key=True, index=True)
-    daily_workout_id = Column(Integer, ForeignKey("ai_daily_workouts.id"), nullable=False)
+    daily_workout_id = Column(Integer, ForeignKey("ai_daily_workouts.id"), nullable=False, index=True)
     exercise_id = Column(Integer, ForeignKey("exercises.id"), nullable=False)
 
     order = Column(Integer, default=0)
@@ -221,8 +265,31 @@ class AIDailyWorkoutExercise(Base):
     exercise = relationship("Exercise")
 
 
+class AIProgramScheduleEntry(Base):
+    __tablename__ = "ai_program_schedule"
+    __table_args__ = (
+        Index("ix_ai_program_schedule_user_date", "user_id", "scheduled_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    training_program_id = Column(Integer, ForeignKey("ai_training_programs.id"), nullable=False, index=True)
+    daily_workout_id = Column(Integer, ForeignKey("ai_daily_workouts.id"), nullable=True)  # NULL = rest day
+
+    scheduled_date = Column(Date, nullable=False)  # calendar date in the user's timezone
+    week_number = Column(Integer, nullable=False)
+    day_number = Column(Integer, nullable=True)  # training day within the week, NULL for rest days
+
+    # Relationships
+    training_program = relationship("AITrainingProgram", back_populates="schedule_entries")
+    daily_workout = relationship("AIDailyWorkout")
+
+
 class AIAdaptationInsight(Base):
     __tablename__ = "ai_adaptation_insights"
+    __table_args__ = (
+        UniqueConstraint("user_id", "insight_type", name="uq_ai_adaptation_insights_user_type"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -236,12 +303,21 @@ class AIAdaptationInsight(Base):
     applied_to_program = Column(Boolean, default=False)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Relationships
     user = relationship("User")
     training_program = relationship("AITrainingProgram", back_populates="adaptation_insights")
 
 
+class InsightWatermark(Base):
+    __tablename__ = "insight_watermarks"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    last_log_id = Column(Integer, nullable=False, default=0)  # newest workout log already analyzed
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class GymProfile(Base):
     __tablename__ = "gym_profiles"
 
@@ -250,9 +326,65 @@ class GymProfile(Base):
     name = Column(String, nullable=False)  # Custom name or gym chain name
     gym_chain = Column(String, nullable=True)  # e.g., "Goodlife Fitness", "Hone Fitness", etc.
     equipment = Column(JSON, nullable=False)  # ["barbell", "dumbbells", "cable machine", ...]
+    equipment_mask = Column(BigInteger, nullable=False, default=0, server_default="0")  # app.taxonomy bits
+
+    # Exercises doable with this equipment, materialized for the catalog version below
+    eligible_exercise_ids = Column(JSON, nullable=True)  # sorted [1, 4, 9, ...]
+    eligible_catalog_version = Column(Integer, nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
     user = relationship("User", back_populates="gym_profiles")
+
+
+class ExerciseMergeCandidate(Base):
+    __tablename__ = "exercise_merge_candidates"
+    __table_args__ = (
+        UniqueConstraint("keep_exercise_id", "merge_exercise_id", name="uq_exercise_merge_candidates_pair"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    keep_exercise_id = Column(Integer, ForeignKey("exercises.id"), nullable=False)  # proposed survivor
+    merge_exercise_id = Column(Integer, ForeignKey("exercises.id"), nullable=False)  # proposed to be merged away
+    similarity = Column(Float, nullable=False)  # estimated Jaccard similarity, 0-1
+    status = Column(String, nullable=False, default="pending")  # pending, merged, rejected, superseded
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    resolved_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    keep_exercise = relationship("Exercise", foreign_keys=[keep_exercise_id])
+    merge_exercise = relationship("Exercise", foreign_keys=[merge_exercise_id])
+
+
+class MediaAsset(Base):
+    __tablename__ = "media_assets"
+
+    sha256 = Column(String(64), primary_key=True)  # content address; file at MEDIA_ROOT/ab/cd/<sha256>
+    kind = Column(String, nullable=False)  # image, video, thumbnail
+    content_type = Column(String, nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    source_url = Column(String, nullable=True)  # where it was downloaded from; NULL for generated thumbnails
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_accessed_at = Column(DateTime(timezone=True), nullable=False, index=True)  # LRU eviction order
+
+
+class CatalogSyncState(Base):
+    __tablename__ = "catalog_sync_state"
+
+    source = Column(String, primary_key=True)  # "wger"
+    last_update_watermark = Column(DateTime(timezone=True), nullable=True)  # newest upstream change applied
+    last_deletion_watermark = Column(DateTime(timezone=True), nullable=True)  # newest upstream deletion applied
+    last_full_sync_at = Column(DateTime(timezone=True), nullable=True)
+    last_sync_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class CatalogState(Base):
+    __tablename__ = "catalog_state"
+
+    id = Column(Integer, primary_key=True)  # single row, id = 1
+    version = Column(Integer, nullable=False, default=1)  # bumped on every exercise catalog change
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
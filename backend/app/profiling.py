@@ -0,0 +1,262 @@
+"""
+On-demand sampling profiler for single requests
+
+A request is profiled when an admin sends the X-Profile: 1 header (or the
+?profile=1 query flag), or at random with probability PROFILE_SAMPLE_RATE.
+A sampler thread then snapshots the stacks of the event loop thread and the
+threadpool workers every PROFILE_INTERVAL_MS until the response is sent.
+Profiles are written to PROFILE_DIR in collapsed stack format, which
+speedscope and flamegraph.pl read directly, and can be downloaded from
+/api/admin/profiles.
+
+Only busy threads are sampled, but every busy thread of the process is:
+concurrent requests handled by the same worker show up in the profile too.
+Profile on a quiet worker when that matters. At most one request per process
+is profiled at a time; other requests are never slowed down.
+"""
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+from starlette.concurrency import run_in_threadpool
+
+from app import auth
+from app.config import settings
+from app.database import SessionLocal
+
+PROFILE_HEADER = b"x-profile"
+
+# Leaf frames of a thread that is waiting for work, not doing any
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+}
+
+_profiling_slot = threading.Lock()
+
+
+class StackSampler:
+    """Background thread counting the stacks of the event loop thread and threadpool workers"""
+
+    def __init__(self, loop_thread_id: int, interval: float):
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="wrxs-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            # Re-read every tick: the threadpool starts workers on demand
+            thread_ids = {self.loop_thread_id} | {
+                thread.ident for thread in threading.enumerate()
+                if thread.name.startswith("AnyIO worker thread")
+            }
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id in thread_ids:
+                    stack = _collapse(frame)
+                    if stack:
+                        self.stacks[stack] += 1
+
+
+def _collapse(frame) -> Optional[str]:
+    """Root-first "file:function;file:function" stack, or None for idle threads"""
+    leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+    if leaf in IDLE_FRAMES:
+        return None
+    names = []
+    while frame is not None:
+        names.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _profile_requested(scope) -> bool:
+    for name, value in scope.get("headers", []):
+        if name == PROFILE_HEADER:
+            return value.strip() in (b"1", b"true")
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return query.get("profile", [""])[0] in ("1", "true")
+
+
+def _bearer_token(scope) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return token if scheme.lower() == "bearer" else None
+    return None
+
+
+def _is_admin_token(token: Optional[str]) -> bool:
+    if not token:
+        return False
+    db = SessionLocal()
+    try:
+        user = auth.get_user_from_token(db, token)
+        return bool(user and user.is_active and user.is_admin)
+    finally:
+        db.close()
+
+
+def profile_path(profile_id: str, extension: str) -> str:
+    return os.path.join(settings.PROFILE_DIR, f"{profile_id}.{extension}")
+
+
+def _save_profile(meta: Dict, stacks: Counter):
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    with open(profile_path(meta["id"], "collapsed"), "w") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    with open(profile_path(meta["id"], "json"), "w") as f:
+        json.dump(meta, f)
+    _prune_profiles()
+
+
+def _prune_profiles():
+    """Keep only the newest PROFILE_MAX_FILES profiles"""
+    metas = sorted(
+        (entry for entry in os.scandir(settings.PROFILE_DIR) if entry.name.endswith(".json")),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True
+    )
+    for entry in metas[settings.PROFILE_MAX_FILES:]:
+        profile_id = entry.name[:-len(".json")]
+        for extension in ("json", "collapsed"):
+            try:
+                os.unlink(profile_path(profile_id, extension))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles() -> List[Dict]:
+    """Metadata of stored profiles, newest first"""
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    profiles = []
+    for entry in os.scandir(settings.PROFILE_DIR):
+        if entry.name.endswith(".json"):
+            with open(entry.path) as f:
+                profiles.append(json.load(f))
+    return sorted(profiles, key=lambda meta: meta["created_at"], reverse=True)
+
+
+def load_collapsed(profile_id: str) -> Optional[str]:
+    if not re.fullmatch(r"[0-9a-f]{32}", profile_id):
+        return None
+    try:
+        with open(profile_path(profile_id, "collapsed")) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def to_speedscope(collapsed: str, name: str, interval_ms: float) -> Dict:
+    """Convert collapsed stacks to a speedscope "sampled" profile"""
+    frames: List[Dict] = []
+    frame_index: Dict[str, int] = {}
+    samples, weights = [], []
+
+    for line in collapsed.splitlines():
+        stack, _, count = line.rpartition(" ")
+        indices = []
+        for entry in stack.split(";"):
+            if entry not in frame_index:
+                file, _, function = entry.partition(":")
+                frame_index[entry] = len(frames)
+                frames.append({"name": function, "file": file})
+            indices.append(frame_index[entry])
+        samples.append(indices)
+        weights.append(int(count) * interval_ms)
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        }],
+        "exporter": "wrxs",
+    }
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware; requests that aren't profiled pass straight through"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = _profile_requested(scope)
+        sampled = not requested and settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+        if not (requested or sampled):
+            await self.app(scope, receive, send)
+            return
+
+        # The flag is ignored for anyone but admins
+        if requested and not await run_in_threadpool(_is_admin_token, _bearer_token(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        if not _profiling_slot.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        interval = settings.PROFILE_INTERVAL_MS / 1000
+        sampler = StackSampler(threading.get_ident(), interval)
+        started = time.time()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            _profiling_slot.release()
+            route = getattr(scope.get("route"), "path", None) or scope["path"]
+            meta = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route,
+                "status": status["code"],
+                "trigger": "header" if requested else "sampled",
+                "duration_ms": round((time.time() - started) * 1000, 1),
+                "samples": sampler.samples,
+                "interval_ms": settings.PROFILE_INTERVAL_MS,
+                "created_at": started,
+            }
+            await run_in_threadpool(_save_profile, meta, sampler.stacks)
@@ -0,0 +1,61 @@
+from typing import Dict, List
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app import models, auth
+from app.profiling import list_profiles, load_collapsed, to_speedscope
+from app.slow_queries import slow_query_log
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.get("/profiles", response_model=List[Dict])
+def get_profiles(
+    current_user: models.User = Depends(auth.get_current_admin_user)
+):
+    """Stored request profiles, newest first"""
+    return list_profiles()
+
+
+@router.get("/profiles/{profile_id}")
+def download_profile(
+    profile_id: str,
+    format: str = "collapsed",
+    current_user: models.User = Depends(auth.get_current_admin_user)
+):
+    """Download a profile as collapsed stacks (flamegraph.pl, speedscope) or speedscope JSON"""
+    collapsed = load_collapsed(profile_id)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    filename = f"profile-{profile_id}"
+    if format == "speedscope":
+        meta = next((p for p in list_profiles() if p["id"] == profile_id), {})
+        name = f"{meta.get('method', '')} {meta.get('route', profile_id)}".strip()
+        return JSONResponse(
+            to_speedscope(collapsed, name, meta.get("interval_ms", 1.0)),
+            headers={"Content-Disposition": f'attachment; filename="{filename}.speedscope.json"'}
+        )
+    if format != "collapsed":
+        raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'speedscope'")
+
+    return PlainTextResponse(
+        collapsed,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.collapsed.txt"'}
+    )
+
+
+@router.get("/slow-queries", response_model=List[Dict])
+def get_slow_queries(
+    current_user: models.User = Depends(auth.get_current_admin_user)
+):
+    """Statements slower than SLOW_QUERY_MS seen by this worker process, slowest in total first,
+    with the routes that ran them and a sampled EXPLAIN (ANALYZE, BUFFERS) plan on PostgreSQL"""
+    return slow_query_log.entries()
+
+
+@router.delete("/slow-queries")
+def clear_slow_queries(
+    current_user: models.User = Depends(auth.get_current_admin_user)
+):
+    slow_query_log.clear()
+    return {"message": "Slow-query log cleared"}
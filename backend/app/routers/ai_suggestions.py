@@ -1,9 +1,12 @@
-from typing import List
+from typing import FrozenSet, List, Optional
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app import models, schemas, auth
 from app.database import get_db
 from app.config import settings
+from app.services.llm_client import create_chat_completion
+from app.services.exercise_candidates import get_exercise_candidates
+from app.services.gym_eligibility import get_eligible_exercise_ids, get_owned_gym_profile
 import json
 
 router = APIRouter(prefix="/api/ai", tags=["ai-suggestions"])
@@ -12,13 +15,11 @@ router = APIRouter(prefix="/api/ai", tags=["ai-suggestions"])
 def generate_workout_suggestion_with_openai(
     user: models.User,
     request: schemas.WorkoutSuggestionRequest,
-    db: Session
+    db: Session,
+    eligible_ids: Optional[FrozenSet[int]] = None
 ) -> dict:
     """Generate workout suggestion using OpenAI API"""
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
-
         # Get user's recent workout history
         recent_logs = db.query(models.WorkoutLog).filter(
             models.WorkoutLog.user_id == user.id
@@ -37,16 +38,12 @@ Recent Workout History:
 """
 
         # Get available exercises
-        query = db.query(models.Exercise)
-        if request.available_equipment:
-            for equipment in request.available_equipment:
-                query = query.filter(models.Exercise.equipment.contains([equipment]))
-
-        if request.target_muscle_groups:
-            for muscle in request.target_muscle_groups:
-                query = query.filter(models.Exercise.muscle_groups.contains([muscle]))
-
-        available_exercises = query.all()
+        available_exercises = get_exercise_candidates(
+            db,
+            equipment=None if eligible_ids is not None else request.available_equipment,
+            target_muscles=request.target_muscle_groups,
+            eligible_ids=eligible_ids
+        )
 
         exercises_info = "\n".join([
             f"- {ex.name} ({ex.category}, {ex.difficulty}): {', '.join(ex.muscle_groups)}"
@@ -70,16 +67,15 @@ Respond with a JSON object containing:
 - "rationale": explanation of why these exercises were selected (2-3 sentences)
 """
 
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
+        content = create_chat_completion(
             messages=[
                 {"role": "system", "content": "You are a professional fitness trainer providing workout recommendations."},
                 {"role": "user", "content": prompt}
             ],
-            response_format={"type": "json_object"}
+            operation="workout_suggestion"
         )
 
-        result = json.loads(response.choices[0].message.content)
+        result = json.loads(content)
         return result
 
     except Exception as e:
@@ -92,7 +88,8 @@ Respond with a JSON object containing:
 def generate_workout_suggestion_rule_based(
     user: models.User,
     request: schemas.WorkoutSuggestionRequest,
-    db: Session
+    db: Session,
+    eligible_ids: Optional[FrozenSet[int]] = None
 ) -> dict:
     """Generate workout suggestion using rule-based system (fallback)"""
 
@@ -102,42 +99,23 @@ def generate_workout_suggestion_rule_based(
     # Get recent workout logs to avoid same muscle groups
     from datetime import datetime, timedelta
     recent_date = datetime.utcnow() - timedelta(days=2)
-    recent_logs = db.query(models.WorkoutLog).filter(
-        models.WorkoutLog.user_id == user.id,
-        models.WorkoutLog.date >= recent_date
-    ).all()
-
-    recent_exercise_ids = [log.exercise_id for log in recent_logs]
-
-    # Query exercises
-    query = db.query(models.Exercise).filter(
-        models.Exercise.difficulty == fitness_level,
-        ~models.Exercise.id.in_(recent_exercise_ids)
+    recent_exercise_ids = [
+        exercise_id for (exercise_id,) in db.query(models.WorkoutLog.exercise_id).filter(
+            models.WorkoutLog.user_id == user.id,
+            models.WorkoutLog.date >= recent_date
+        ).distinct()
+    ]
+
+    # Equipment (plus bodyweight) and target muscles are filtered in one cached query
+    available_exercises = get_exercise_candidates(
+        db,
+        difficulties=[fitness_level],
+        equipment=None if eligible_ids is not None else request.available_equipment,
+        target_muscles=request.target_muscle_groups,
+        exclude_ids=recent_exercise_ids,
+        eligible_ids=eligible_ids
     )
 
-    # Filter by equipment if specified
-    if request.available_equipment:
-        exercises_by_equipment = []
-        for equipment in request.available_equipment:
-            exs = query.filter(models.Exercise.equipment.contains([equipment])).all()
-            exercises_by_equipment.extend(exs)
-
-        # Also include bodyweight exercises
-        bodyweight = query.filter(models.Exercise.equipment == None).all()
-        exercises_by_equipment.extend(bodyweight)
-
-        available_exercises = exercises_by_equipment
-    else:
-        available_exercises = query.all()
-
-    # Filter by target muscle groups if specified
-    if request.target_muscle_groups:
-        filtered = []
-        for ex in available_exercises:
-            if any(muscle in ex.muscle_groups for muscle in request.target_muscle_groups):
-                filtered.append(ex)
-        available_exercises = filtered
-
     # Select diverse exercises (max 6)
     selected_exercises = []
     covered_muscle_groups = set()
@@ -172,17 +150,26 @@ def suggest_workout(
 ):
     """Generate AI-powered workout suggestions based on user profile and preferences"""
 
+    # A gym profile carries a precomputed set of exercises its equipment allows
+    eligible_ids = None
+    if request.gym_profile_id is not None:
+        gym_profile = get_owned_gym_profile(db, current_user.id, request.gym_profile_id)
+        if not gym_profile:
+            raise HTTPException(status_code=404, detail="Gym profile not found")
+        eligible_ids = get_eligible_exercise_ids(db, gym_profile)
+        request = request.model_copy(update={"available_equipment": gym_profile.equipment})
+
     # Try OpenAI if API key is available
     if settings.OPENAI_API_KEY:
         try:
-            result = generate_workout_suggestion_with_openai(current_user, request, db)
+            result = generate_workout_suggestion_with_openai(current_user, request, db, eligible_ids)
         except Exception as e:
             # Fall back to rule-based
             print(f"OpenAI API failed, falling back to rule-based: {e}")
-            result = generate_workout_suggestion_rule_based(current_user, request, db)
+            result = generate_workout_suggestion_rule_based(current_user, request, db, eligible_ids)
     else:
         # Use rule-based system
-        result = generate_workout_suggestion_rule_based(current_user, request, db)
+        result = generate_workout_suggestion_rule_based(current_user, request, db, eligible_ids)
 
     # Get exercise objects
     suggested_exercise_names = result.get("exercises", [])
@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from app import models, schemas, auth
 from app.database import get_db
 from app.config import settings
+from app.services.program_schedule import is_valid_timezone, rebuild_active_schedule
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 
@@ -106,6 +107,13 @@ async def update_user_profile(
         current_user.sex = user_update.sex
     if user_update.location is not None:
         current_user.location = user_update.location
+    if user_update.timezone is not None:
+        if not is_valid_timezone(user_update.timezone):
+            raise HTTPException(status_code=400, detail="Unknown timezone")
+        if user_update.timezone != current_user.timezone:
+            current_user.timezone = user_update.timezone
+            # Scheduled dates are local dates: "today" moves with the timezone
+            rebuild_active_schedule(db, current_user)
 
     db.commit()
     db.refresh(current_user)
@@ -1,5 +1,5 @@
-from typing import List
-from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from datetime import date, datetime, timedelta
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, func
@@ -9,6 +9,74 @@ from app.database import get_db
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
 
+def compute_streaks(dates: List[date], today: date) -> Tuple[int, int]:
+    """(current, longest) runs of consecutive days in distinct workout dates, newest first"""
+    if not dates:
+        return 0, 0
+
+    # Calculate current streak
+    current_streak = 0
+    if dates[0] == today or dates[0] == today - timedelta(days=1):
+        current_streak = 1
+        for i in range(1, len(dates)):
+            if (dates[i-1] - dates[i]).days == 1:
+                current_streak += 1
+            else:
+                break
+
+    # Calculate longest streak (full historical scan)
+    longest_streak = current_streak
+    temp_streak = 1
+    for i in range(1, len(dates)):
+        if (dates[i-1] - dates[i]).days == 1:
+            temp_streak += 1
+            longest_streak = max(longest_streak, temp_streak)
+        else:
+            temp_streak = 1
+
+    return current_streak, max(longest_streak, current_streak)
+
+
+def summarize_week(logs: List[models.WorkoutLog]) -> Dict:
+    """Workout, set, volume and day totals of one week's logs"""
+    total_workouts = len(logs)
+    total_sets = sum(log.sets_completed for log in logs)
+
+    # Calculate volume
+    total_volume = 0
+    for log in logs:
+        if log.weight_kg and log.reps:
+            for w, r in zip(log.weight_kg, log.reps):
+                total_volume += w * r
+
+    workout_days = len(set(log.date.date() for log in logs))
+    unique_exercises = len(set(log.exercise_id for log in logs))
+
+    return {
+        "total_workouts": total_workouts,
+        "total_sets": total_sets,
+        "total_volume_kg": round(total_volume, 1),
+        "workout_days": workout_days,
+        "unique_exercises": unique_exercises
+    }
+
+
+def frequency_trend(weekly_counts: List[int]) -> str:
+    """Compare the average workouts per week of the second half of the period to the first"""
+    if len(weekly_counts) < 2:
+        return "stable"
+
+    half = len(weekly_counts) // 2
+    first_half_avg = sum(weekly_counts[:half]) / max(half, 1)
+    second_half_avg = sum(weekly_counts[half:]) / max(len(weekly_counts) - half, 1)
+
+    if second_half_avg > first_half_avg * 1.1:
+        return "increasing"
+    elif second_half_avg < first_half_avg * 0.9:
+        return "decreasing"
+    return "stable"
+
+
 @router.get("/weekly-streak")
 def get_weekly_streak(
     db: Session = Depends(get_db),
@@ -73,31 +141,11 @@ def get_current_streak(
         return {"current_streak": 0, "longest_streak": 0, "streak_status": "none"}
 
     dates = [d.date for d in workout_dates]
-    today = datetime.utcnow().date()
-
-    # Calculate current streak
-    current_streak = 0
-    if dates[0] == today or dates[0] == today - timedelta(days=1):
-        current_streak = 1
-        for i in range(1, len(dates)):
-            if (dates[i-1] - dates[i]).days == 1:
-                current_streak += 1
-            else:
-                break
-
-    # Calculate longest streak (full historical scan)
-    longest_streak = current_streak
-    temp_streak = 1
-    for i in range(1, len(dates)):
-        if (dates[i-1] - dates[i]).days == 1:
-            temp_streak += 1
-            longest_streak = max(longest_streak, temp_streak)
-        else:
-            temp_streak = 1
+    current_streak, longest_streak = compute_streaks(dates, datetime.utcnow().date())
 
     return {
         "current_streak": current_streak,
-        "longest_streak": max(longest_streak, current_streak),
+        "longest_streak": longest_streak,
         "last_workout_date": dates[0].isoformat(),
         "streak_status": "active" if current_streak > 0 else "broken"
     }
@@ -128,27 +176,7 @@ def get_week_comparison(
                 models.WorkoutLog.date <= end
             )
         ).all()
-
-        total_workouts = len(logs)
-        total_sets = sum(log.sets_completed for log in logs)
-
-        # Calculate volume
-        total_volume = 0
-        for log in logs:
-            if log.weight_kg and log.reps:
-                for w, r in zip(log.weight_kg, log.reps):
-                    total_volume += w * r
-
-        workout_days = len(set(log.date.date() for log in logs))
-        unique_exercises = len(set(log.exercise_id for log in logs))
-
-        return {
-            "total_workouts": total_workouts,
-            "total_sets": total_sets,
-            "total_volume_kg": round(total_volume, 1),
-            "workout_days": workout_days,
-            "unique_exercises": unique_exercises
-        }
+        return summarize_week(logs)
 
     current = get_week_stats(curr_monday, curr_sunday)
     previous = get_week_stats(prev_monday, prev_sunday)
@@ -203,22 +231,8 @@ def get_frequency_chart(
             "workout_days": log.workout_days
         })
 
-    # Calculate trend
-    if len(weekly_data) >= 2:
-        first_half_avg = sum(w['workout_count'] for w in weekly_data[:len(weekly_data)//2]) / max(len(weekly_data)//2, 1)
-        second_half_avg = sum(w['workout_count'] for w in weekly_data[len(weekly_data)//2:]) / max(len(weekly_data) - len(weekly_data)//2, 1)
-
-        if second_half_avg > first_half_avg * 1.1:
-            trend = "increasing"
-        elif second_half_avg < first_half_avg * 0.9:
-            trend = "decreasing"
-        else:
-            trend = "stable"
-    else:
-        trend = "stable"
-
     return {
         "weeks": weekly_data,
         "period_weeks": weeks,
-        "trend": trend
+        "trend": frequency_trend([w['workout_count'] for w in weekly_data])
     }
@@ -3,6 +3,9 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app import models, schemas, auth
 from app.database import get_db
+from app.services.catalog import bump_catalog_version, exercise_name_key
+from app.services.program_snapshots import invalidate_program_snapshots
+from app.taxonomy import muscle_mask, normalize_exercise_fields
 
 router = APIRouter(prefix="/api/exercises", tags=["exercises"])
 
@@ -17,7 +20,8 @@ def get_exercises(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
-    query = db.query(models.Exercise)
+    # Exercises removed from the upstream catalog stay only for workout history
+    query = db.query(models.Exercise).filter(models.Exercise.is_archived == False)
 
     # Filter by category
     if category:
@@ -27,9 +31,13 @@ def get_exercises(
     if difficulty:
         query = query.filter(models.Exercise.difficulty == difficulty)
 
-    # Filter by muscle group
+    # Filter by muscle group (any spelling the taxonomy knows)
     if muscle_group:
-        query = query.filter(models.Exercise.muscle_groups.contains([muscle_group]))
+        mask = muscle_mask([muscle_group])
+        if mask:
+            query = query.filter(models.Exercise.muscle_mask.op("&")(mask) != 0)
+        else:
+            query = query.filter(models.Exercise.muscle_groups.contains([muscle_group]))
 
     exercises = query.offset(skip).limit(limit).all()
     return exercises
@@ -54,11 +62,13 @@ def create_exercise(
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
     db_exercise = models.Exercise(
-        **exercise.model_dump(),
+        **normalize_exercise_fields(exercise.model_dump()),
+        name_key=exercise_name_key(exercise.name),
         is_template=False,
         created_by_id=current_user.id
     )
     db.add(db_exercise)
+    bump_catalog_version(db)
     db.commit()
     db.refresh(db_exercise)
     return db_exercise
@@ -78,6 +88,8 @@ def delete_exercise(
     if exercise.is_template or exercise.created_by_id != current_user.id:
         raise HTTPException(status_code=403, detail="Cannot delete this exercise")
 
+    invalidate_program_snapshots(db, [exercise.id])
     db.delete(exercise)
+    bump_catalog_version(db)
     db.commit()
     return {"message": "Exercise deleted successfully"}
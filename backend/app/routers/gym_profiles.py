@@ -3,6 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app import models, schemas, auth
 from app.database import get_db
+from app.services.gym_eligibility import refresh_gym_profile
 
 router = APIRouter(prefix="/api/gym-profiles", tags=["gym-profiles"])
 
@@ -32,6 +33,7 @@ def create_gym_profile(
         gym_chain=profile_data.gym_chain,
         equipment=profile_data.equipment
     )
+    refresh_gym_profile(db, gym_profile)
     db.add(gym_profile)
     db.commit()
     db.refresh(gym_profile)
@@ -78,6 +80,7 @@ def update_gym_profile(
         profile.gym_chain = profile_update.gym_chain
     if profile_update.equipment is not None:
         profile.equipment = profile_update.equipment
+        refresh_gym_profile(db, profile)
 
     db.commit()
     db.refresh(profile)
@@ -0,0 +1,91 @@
+import os
+import re
+from typing import Iterator, Optional, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.orm import Session
+from app import models
+from app.database import get_db
+from app.services.media_store import CHUNK_SIZE, get_media_store, touch_asset
+
+router = APIRouter(prefix="/api/media", tags=["media"])
+
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Content-addressed: a URL's bytes never change, so clients may cache forever
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) inclusive for a single "bytes=" range, None if unsatisfiable"""
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if start == "":
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            return None
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return None
+    return start, end
+
+
+def iter_file(path: str, start: int, end: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+@router.get("/{sha256}")
+def get_media(
+    sha256: str,
+    range_header: Optional[str] = Header(None, alias="range"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Serve a cached image or video. Public, since <img> and <video> tags can't send tokens;
+    the content hash is the only way to name a file."""
+    if not SHA256_PATTERN.match(sha256):
+        raise HTTPException(status_code=404, detail="Media not found")
+
+    asset = db.get(models.MediaAsset, sha256)
+    path = get_media_store().path_for(sha256)
+    if asset is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Media not found")
+
+    touch_asset(db, asset)
+    size = os.path.getsize(path)
+    headers = {
+        "Cache-Control": CACHE_CONTROL,
+        "ETag": f'"{sha256}"',
+        "Accept-Ranges": "bytes",
+    }
+
+    if if_none_match and sha256 in if_none_match:
+        return Response(status_code=304, headers=headers)
+
+    if range_header:
+        byte_range = parse_range(range_header, size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            iter_file(path, start, end), status_code=206, media_type=asset.content_type, headers=headers
+        )
+
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(iter_file(path, 0, size - 1), media_type=asset.content_type, headers=headers)
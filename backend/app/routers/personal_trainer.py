@@ -1,13 +1,24 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session, joinedload, selectinload
+from datetime import date, datetime, timedelta
 from app import models, schemas, auth
 from app.database import get_db
 from app.services.ai_trainer import AITrainerService
+from app.services.program_snapshots import (
+    get_program_snapshots, json_response, store_program_snapshot
+)
+from app.services.gym_eligibility import get_owned_gym_profile
+from app.services.program_schedule import (
+    build_program_schedule, clear_schedule, to_user_date, user_today
+)
 
 router = APIRouter(prefix="/api/trainer", tags=["personal-trainer"])
 
+WORKOUT_DETAIL_OPTIONS = (
+    selectinload(models.AIDailyWorkout.exercises).selectinload(models.AIDailyWorkoutExercise.exercise),
+)
+
 
 @router.post("/generate-program", response_model=schemas.AITrainingProgramResponse)
 def generate_training_program(
@@ -27,17 +38,19 @@ def generate_training_program(
     if request.program_type == "multi_week" and (request.duration_weeks < 1 or request.duration_weeks > 16):
         raise HTTPException(status_code=400, detail="duration_weeks must be between 1 and 16")
 
+    gym_profile = None
+    if request.gym_profile_id is not None:
+        gym_profile = get_owned_gym_profile(db, current_user.id, request.gym_profile_id)
+        if not gym_profile:
+            raise HTTPException(status_code=404, detail="Gym profile not found")
+
     # Generate program using AI trainer service
     try:
         trainer = AITrainerService(db, current_user)
-        program = trainer.generate_program(request)
+        program = trainer.generate_program(request, gym_profile=gym_profile)
 
-        # Reload with relationships
-        program = db.query(models.AITrainingProgram).options(
-            joinedload(models.AITrainingProgram.weekly_plans).joinedload(models.AIWeeklyPlan.daily_workouts).joinedload(models.AIDailyWorkout.exercises).joinedload(models.AIDailyWorkoutExercise.exercise)
-        ).filter(models.AITrainingProgram.id == program.id).first()
-
-        return program
+        # Render the response once and keep it for later reads
+        return json_response(store_program_snapshot(db, program.id))
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating program: {str(e)}")
@@ -50,36 +63,58 @@ def get_active_program(
 ):
     """Get user's currently active training program"""
 
-    program = db.query(models.AITrainingProgram).options(
-        joinedload(models.AITrainingProgram.weekly_plans).joinedload(models.AIWeeklyPlan.daily_workouts).joinedload(models.AIDailyWorkout.exercises).joinedload(models.AIDailyWorkoutExercise.exercise)
-    ).filter(
+    row = db.query(models.AITrainingProgram.id, models.AITrainingProgram.snapshot_json).filter(
         models.AITrainingProgram.user_id == current_user.id,
         models.AITrainingProgram.status == "active"
     ).first()
 
-    return program
+    if not row:
+        return None
+
+    return json_response(get_program_snapshots(db, [tuple(row)])[0])
+
+
+@router.get("/programs/summary", response_model=List[schemas.AITrainingProgramSummary])
+def get_program_summaries(
+    skip: int = 0,
+    limit: int = Query(default=20, ge=1, le=100),
+    status: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    """List the user's training programs without their weeks (one row per program)"""
+
+    query = db.query(models.AITrainingProgram).filter(
+        models.AITrainingProgram.user_id == current_user.id
+    )
+
+    if status:
+        query = query.filter(models.AITrainingProgram.status == status)
+
+    return query.order_by(models.AITrainingProgram.created_at.desc()).offset(skip).limit(limit).all()
 
 
 @router.get("/programs", response_model=List[schemas.AITrainingProgramResponse])
 def get_all_programs(
+    skip: int = 0,
+    limit: int = 100,
     status: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
     """Get all training programs for the user"""
 
-    query = db.query(models.AITrainingProgram).options(
-        joinedload(models.AITrainingProgram.weekly_plans).joinedload(models.AIWeeklyPlan.daily_workouts).joinedload(models.AIDailyWorkout.exercises).joinedload(models.AIDailyWorkoutExercise.exercise)
-    ).filter(
+    query = db.query(models.AITrainingProgram.id, models.AITrainingProgram.snapshot_json).filter(
         models.AITrainingProgram.user_id == current_user.id
     )
 
     if status:
         query = query.filter(models.AITrainingProgram.status == status)
 
-    programs = query.order_by(models.AITrainingProgram.created_at.desc()).all()
+    rows = query.order_by(models.AITrainingProgram.created_at.desc()).offset(skip).limit(limit).all()
+    snapshots = get_program_snapshots(db, [tuple(row) for row in rows])
 
-    return programs
+    return json_response("[" + ",".join(snapshots) + "]")
 
 
 @router.get("/program/{program_id}", response_model=schemas.AITrainingProgramResponse)
@@ -90,17 +125,66 @@ def get_program(
 ):
     """Get a specific training program"""
 
-    program = db.query(models.AITrainingProgram).options(
-        joinedload(models.AITrainingProgram.weekly_plans).joinedload(models.AIWeeklyPlan.daily_workouts).joinedload(models.AIDailyWorkout.exercises).joinedload(models.AIDailyWorkoutExercise.exercise)
-    ).filter(
+    row = db.query(models.AITrainingProgram.id, models.AITrainingProgram.snapshot_json).filter(
         models.AITrainingProgram.id == program_id,
         models.AITrainingProgram.user_id == current_user.id
     ).first()
 
-    if not program:
+    if not row:
         raise HTTPException(status_code=404, detail="Program not found")
 
-    return program
+    return json_response(get_program_snapshots(db, [tuple(row)])[0])
+
+
+@router.get("/program/{program_id}/weeks", response_model=List[schemas.WeeklyPlanSummary])
+def get_program_weeks(
+    program_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    """List the weeks of a program without their workouts"""
+
+    weeks = db.query(models.AIWeeklyPlan).join(models.AITrainingProgram).filter(
+        models.AITrainingProgram.id == program_id,
+        models.AITrainingProgram.user_id == current_user.id
+    ).order_by(models.AIWeeklyPlan.week_number).all()
+
+    if not weeks and not _owned_program_exists(db, program_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Program not found")
+
+    return weeks
+
+
+@router.get("/program/{program_id}/weeks/{week_number}", response_model=schemas.WeeklyPlanResponse)
+def get_program_week(
+    program_id: int,
+    week_number: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    """Get one week of a program with its workouts and exercises"""
+
+    week = db.query(models.AIWeeklyPlan).join(models.AITrainingProgram).options(
+        selectinload(models.AIWeeklyPlan.daily_workouts)
+        .selectinload(models.AIDailyWorkout.exercises)
+        .selectinload(models.AIDailyWorkoutExercise.exercise)
+    ).filter(
+        models.AITrainingProgram.id == program_id,
+        models.AITrainingProgram.user_id == current_user.id,
+        models.AIWeeklyPlan.week_number == week_number
+    ).first()
+
+    if not week:
+        raise HTTPException(status_code=404, detail="Week not found")
+
+    return week
+
+
+def _owned_program_exists(db: Session, program_id: int, user_id: int) -> bool:
+    return db.query(models.AITrainingProgram.id).filter(
+        models.AITrainingProgram.id == program_id,
+        models.AITrainingProgram.user_id == user_id
+    ).first() is not None
 
 
 @router.post("/accept-program/{program_id}")
@@ -124,14 +208,21 @@ def accept_program(
     db.query(models.AITrainingProgram).filter(
         models.AITrainingProgram.user_id == current_user.id,
         models.AITrainingProgram.status == "active"
-    ).update({"status": "archived"})
+    ).update({"status": "archived", "snapshot_json": None})
 
     # Activate this program
     program.status = "active"
     program.accepted_at = datetime.utcnow()
     program.started_at = datetime.utcnow()
 
+    # Map every calendar day of the program to its workout (or rest)
+    if program.program_type == "multi_week":
+        build_program_schedule(db, program, user_today(current_user))
+    else:
+        clear_schedule(db, current_user.id)
+
     db.commit()
+    store_program_snapshot(db, program.id)
 
     return {"message": "Program accepted and activated", "program_id": program_id}
 
@@ -153,6 +244,8 @@ def archive_program(
         raise HTTPException(status_code=404, detail="Program not found")
 
     program.status = "archived"
+    program.snapshot_json = None
+    clear_schedule(db, current_user.id, program.id)
     db.commit()
 
     return {"message": "Program archived", "program_id": program_id}
@@ -165,6 +258,12 @@ def get_todays_workout(
 ):
     """Get today's workout from active program"""
 
+    today = user_today(current_user)
+
+    entry = _scheduled_entries(db, current_user.id, today, today).first()
+    if entry:
+        return entry.daily_workout  # None on rest days
+
     # Get active program
     program = db.query(models.AITrainingProgram).filter(
         models.AITrainingProgram.user_id == current_user.id,
@@ -177,50 +276,83 @@ def get_todays_workout(
     # For daily programs, get the most recent workout
     if program.program_type == "daily":
         workout = db.query(models.AIDailyWorkout).options(
-            joinedload(models.AIDailyWorkout.exercises).joinedload(models.AIDailyWorkoutExercise.exercise)
+            *WORKOUT_DETAIL_OPTIONS
         ).filter(
             models.AIDailyWorkout.training_program_id == program.id
         ).order_by(models.AIDailyWorkout.created_at.desc()).first()
 
         return workout
 
-    # For multi-week programs, calculate which day we're on
-    # This is a simple implementation - could be made more sophisticated
-    if program.started_at:
-        days_since_start = (datetime.utcnow() - program.started_at).days
-        week_number = (days_since_start // 7) + 1
-        day_in_week = (days_since_start % 7) + 1
-
-        # Get the workout for this week and day
-        weekly_plan = db.query(models.AIWeeklyPlan).filter(
-            models.AIWeeklyPlan.training_program_id == program.id,
-            models.AIWeeklyPlan.week_number == week_number
-        ).first()
-
-        if weekly_plan:
-            workout = db.query(models.AIDailyWorkout).options(
-                joinedload(models.AIDailyWorkout.exercises).joinedload(models.AIDailyWorkoutExercise.exercise)
-            ).filter(
-                models.AIDailyWorkout.weekly_plan_id == weekly_plan.id,
-                models.AIDailyWorkout.day_number == min(day_in_week, program.days_per_week)
-            ).first()
-
-            return workout
+    # Programs accepted before schedules existed get one built from their start date
+    has_schedule = db.query(models.AIProgramScheduleEntry.id).filter(
+        models.AIProgramScheduleEntry.training_program_id == program.id
+    ).first()
+    if program.started_at and not has_schedule:
+        build_program_schedule(db, program, to_user_date(current_user, program.started_at))
+        db.commit()
+
+        entry = _scheduled_entries(db, current_user.id, today, today).first()
+        if entry:
+            return entry.daily_workout
 
     return None
 
 
+@router.get("/schedule", response_model=List[schemas.ScheduledWorkoutResponse])
+def get_schedule(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    """Scheduled sessions and rest days of the active program (defaults to the next 7 days)"""
+
+    start_date = start_date or user_today(current_user)
+    end_date = end_date or start_date + timedelta(days=6)
+
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (end_date - start_date).days > 62:
+        raise HTTPException(status_code=400, detail="Date range is limited to 62 days")
+
+    entries = _scheduled_entries(db, current_user.id, start_date, end_date).all()
+
+    return [
+        schemas.ScheduledWorkoutResponse(
+            scheduled_date=entry.scheduled_date,
+            week_number=entry.week_number,
+            day_number=entry.day_number,
+            is_rest_day=entry.daily_workout_id is None,
+            workout=entry.daily_workout
+        )
+        for entry in entries
+    ]
+
+
+def _scheduled_entries(db: Session, user_id: int, start_date: date, end_date: date):
+    """Indexed (user_id, scheduled_date) range lookup with workouts eagerly loaded"""
+    return db.query(models.AIProgramScheduleEntry).options(
+        joinedload(models.AIProgramScheduleEntry.daily_workout)
+        .selectinload(models.AIDailyWorkout.exercises)
+        .selectinload(models.AIDailyWorkoutExercise.exercise)
+    ).filter(
+        models.AIProgramScheduleEntry.user_id == user_id,
+        models.AIProgramScheduleEntry.scheduled_date >= start_date,
+        models.AIProgramScheduleEntry.scheduled_date <= end_date
+    ).order_by(models.AIProgramScheduleEntry.scheduled_date)
+
+
 @router.get("/insights", response_model=List[schemas.AdaptationInsight])
 def get_adaptation_insights(
     limit: int = 10,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
-    """Get adaptation insights for the user"""
+    """Get adaptation insights for the user (precomputed by python -m app.insights_job)"""
 
     insights = db.query(models.AIAdaptationInsight).filter(
         models.AIAdaptationInsight.user_id == current_user.id
-    ).order_by(models.AIAdaptationInsight.created_at.desc()).limit(limit).all()
+    ).order_by(models.AIAdaptationInsight.updated_at.desc()).limit(limit).all()
 
     return insights
 
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 
 
 # User Schemas
@@ -28,6 +28,7 @@ class UserUpdate(BaseModel):
     age: Optional[int] = None
     sex: Optional[str] = None
     location: Optional[str] = None
+    timezone: Optional[str] = None
 
 
 class User(UserBase):
@@ -44,6 +45,7 @@ class User(UserBase):
     age: Optional[int] = None
     sex: Optional[str] = None
     location: Optional[str] = None
+    timezone: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -81,6 +83,11 @@ class Exercise(ExerciseBase):
     is_template: bool
     created_at: datetime
 
+    # Served from the local media cache when available; prefer these over image_url / video_url
+    local_image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    local_video_url: Optional[str] = None
+
     class Config:
         from_attributes = True
 
@@ -159,6 +166,7 @@ class WorkoutSuggestionRequest(BaseModel):
     available_equipment: Optional[List[str]] = None
     time_available_minutes: Optional[int] = None
     target_muscle_groups: Optional[List[str]] = None
+    gym_profile_id: Optional[int] = None  # use the profile's equipment instead of available_equipment
 
 
 class WorkoutSuggestion(BaseModel):
@@ -177,6 +185,7 @@ class TrainerProgramRequest(BaseModel):
     available_equipment: Optional[List[str]] = None
     time_per_session_minutes: int = 60
     preferences: Optional[dict] = None
+    gym_profile_id: Optional[int] = None  # use the profile's equipment instead of available_equipment
 
 
 class DailyWorkoutExerciseResponse(BaseModel):
@@ -217,6 +226,14 @@ class WeeklyPlanResponse(BaseModel):
         from_attributes = True
 
 
+class ScheduledWorkoutResponse(BaseModel):
+    scheduled_date: date
+    week_number: int
+    day_number: Optional[int] = None
+    is_rest_day: bool
+    workout: Optional[DailyWorkoutResponse] = None
+
+
 class AITrainingProgramResponse(BaseModel):
     id: int
     program_type: str
@@ -237,6 +254,35 @@ class AITrainingProgramResponse(BaseModel):
         from_attributes = True
 
 
+class AITrainingProgramSummary(BaseModel):
+    id: int
+    program_type: str
+    name: str
+    description: Optional[str] = None
+    fitness_level: str
+    fitness_goals: List[str]
+    duration_weeks: Optional[int] = None
+    days_per_week: int
+    difficulty: str
+    status: str
+    created_at: datetime
+    accepted_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class WeeklyPlanSummary(BaseModel):
+    id: int
+    week_number: int
+    theme: Optional[str] = None
+    notes: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
 class AdaptationInsight(BaseModel):
     id: int
     insight_type: str
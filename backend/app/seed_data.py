@@ -4,6 +4,8 @@ Run with: python -m app.seed_data
 """
 from app.database import SessionLocal, engine
 from app.models import Base, Exercise
+from app.services.catalog import bump_catalog_version, exercise_name_key, upsert_catalog_exercises
+from app.taxonomy import normalize_exercise_fields
 
 # Sample exercises database
 SAMPLE_EXERCISES = [
@@ -197,17 +199,21 @@ def seed_exercises():
             print(f"Database already contains {existing_count} exercises. Skipping seed.")
             return
 
-        # Add exercises
-        for exercise_data in SAMPLE_EXERCISES:
-            exercise = Exercise(
-                **exercise_data,
-                is_template=True,
-                created_by_id=None
+        rows = [normalize_exercise_fields(exercise_data) for exercise_data in SAMPLE_EXERCISES]
+        if db.get_bind().dialect.name == "postgresql":
+            # Add exercises in one statement
+            counts = upsert_catalog_exercises(db, rows)
+        else:
+            # The upsert is PostgreSQL-only; into an empty table plain inserts do the same
+            db.add_all(
+                Exercise(**row, name_key=exercise_name_key(row["name"]), is_template=True, is_archived=False)
+                for row in rows
             )
-            db.add(exercise)
+            counts = {"inserted": len(rows)}
 
+        bump_catalog_version(db)
         db.commit()
-        print(f"Successfully seeded {len(SAMPLE_EXERCISES)} exercises")
+        print(f"Successfully seeded {counts['inserted']} exercises")
 
     except Exception as e:
         print(f"Error seeding database: {e}")
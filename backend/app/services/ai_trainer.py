@@ -1,8 +1,17 @@
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
+from sqlalchemy import func, insert
 from sqlalchemy.orm import Session
 from app import models, schemas
 from app.config import settings
+from app.services.llm_client import create_chat_completion
+from app.services import program_engine, program_cache
+from app.services.catalog import get_catalog_version
+from app.services.exercise_candidates import ExerciseCandidate, get_exercise_candidates
+from app.services.gym_eligibility import get_eligible_exercise_ids
+from app.services.insights import (
+    aggregate_workout_history, compute_adaptation_insights, save_adaptation_insights
+)
 import json
 
 
@@ -12,16 +21,25 @@ class AITrainerService:
     def __init__(self, db: Session, user: models.User):
         self.db = db
         self.user = user
+        self.eligible_exercise_ids = None  # set from a gym profile; replaces equipment filtering
 
-    def generate_program(self, request: schemas.TrainerProgramRequest) -> models.AITrainingProgram:
+    def generate_program(
+        self,
+        request: schemas.TrainerProgramRequest,
+        gym_profile: Optional[models.GymProfile] = None
+    ) -> models.AITrainingProgram:
         """Generate a training program (multi-week or daily)"""
 
+        if gym_profile is not None:
+            self.eligible_exercise_ids = get_eligible_exercise_ids(self.db, gym_profile)
+            request = request.model_copy(update={"available_equipment": gym_profile.equipment})
+
         # Use user's profile if not provided in request
         fitness_level = request.fitness_level or self.user.fitness_level or "beginner"
         fitness_goals = request.fitness_goals or self.user.fitness_goals or ["general_fitness"]
 
         # Try OpenAI first, fall back to rule-based
-        if settings.OPENAI_API_KEY:
+        if settings.OPENAI_API_KEY and settings.TRAINER_ENGINE != "rules":
             try:
                 if request.program_type == "multi_week":
                     return self._generate_multi_week_with_openai(request, fitness_level, fitness_goals)
@@ -40,8 +58,6 @@ class AITrainerService:
         fitness_goals: List[str]
     ) -> models.AITrainingProgram:
         """Generate multi-week program using OpenAI"""
-        from openai import OpenAI
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
 
         # Analyze workout history
         workout_history = self._analyze_workout_history(days=30)
@@ -58,17 +74,16 @@ class AITrainerService:
         )
 
         # Call OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
+        content = create_chat_completion(
             messages=[
                 {"role": "system", "content": "You are an elite personal trainer with expertise in exercise science, periodization, and progressive overload principles."},
                 {"role": "user", "content": prompt}
             ],
-            response_format={"type": "json_object"},
-            max_tokens=3000
+            max_tokens=3000,
+            operation="multi_week_program"
         )
 
-        result = json.loads(response.choices[0].message.content)
+        result = json.loads(content)
 
         # Create database models from AI response
         return self._create_program_from_ai_response(result, request, fitness_level, fitness_goals)
@@ -80,8 +95,6 @@ class AITrainerService:
         fitness_goals: List[str]
     ) -> models.AITrainingProgram:
         """Generate single daily workout using OpenAI"""
-        from openai import OpenAI
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
 
         # Get recent workouts to avoid overtraining
         recent_workouts = self._get_recent_workouts(days=3)
@@ -96,17 +109,16 @@ class AITrainerService:
             request, fitness_level, fitness_goals, recent_workouts, exercises
         )
 
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
+        content = create_chat_completion(
             messages=[
                 {"role": "system", "content": "You are a personal trainer creating today's workout session."},
                 {"role": "user", "content": prompt}
             ],
-            response_format={"type": "json_object"},
-            max_tokens=1500
+            max_tokens=1500,
+            operation="daily_workout"
         )
 
-        result = json.loads(response.choices[0].message.content)
+        result = json.loads(content)
 
         # Create daily workout program
         return self._create_daily_program_from_ai_response(result, request, fitness_level, fitness_goals)
@@ -128,28 +140,24 @@ class AITrainerService:
         """Analyze user's recent workout logs"""
         start_date = datetime.utcnow() - timedelta(days=days)
 
-        logs = self.db.query(models.WorkoutLog).join(
-            models.Exercise
+        total_workouts, avg_difficulty = self.db.query(
+            func.count(models.WorkoutLog.id),
+            func.avg(func.coalesce(models.WorkoutLog.difficulty_rating, 5))
         ).filter(
             models.WorkoutLog.user_id == self.user.id,
             models.WorkoutLog.date >= start_date
-        ).all()
+        ).one()
 
-        if not logs:
+        if not total_workouts:
             return {
                 "total_workouts": 0,
                 "summary": "No recent workout history"
             }
 
-        total_workouts = len(logs)
-        avg_difficulty = sum(log.difficulty_rating or 5 for log in logs) / len(logs)
+        avg_difficulty = float(avg_difficulty)
 
-        # Track muscle group frequency
-        muscle_frequency = {}
-        for log in logs:
-            if log.exercise and log.exercise.muscle_groups:
-                for muscle in log.exercise.muscle_groups:
-                    muscle_frequency[muscle] = muscle_frequency.get(muscle, 0) + 1
+        # Track muscle group frequency, counted in the database rather than per loaded log
+        muscle_frequency = self._logged_muscle_counts(start_date)
 
         return {
             "total_workouts": total_workouts,
@@ -158,56 +166,80 @@ class AITrainerService:
             "summary": f"{total_workouts} workouts in last {days} days, avg difficulty: {avg_difficulty:.1f}/10"
         }
 
+    def _logged_muscle_counts(self, start_date: datetime) -> Dict[str, int]:
+        """{muscle group: logs that trained it} since start_date.
+
+        Postgres unnests Exercise.muscle_groups and counts in SQL. Other
+        databases (SQLite in tests) have no json_array_elements_text, so they
+        get one row per logged exercise and unnest those in Python.
+        """
+        in_range = (
+            models.WorkoutLog.user_id == self.user.id,
+            models.WorkoutLog.date >= start_date
+        )
+
+        if self.db.get_bind().dialect.name == "postgresql":
+            muscles = self.db.query(
+                func.json_array_elements_text(models.Exercise.muscle_groups).label("muscle")
+            ).join(
+                models.WorkoutLog, models.WorkoutLog.exercise_id == models.Exercise.id
+            ).filter(*in_range).subquery()
+            return dict(self.db.query(muscles.c.muscle, func.count()).group_by(muscles.c.muscle).all())
+
+        rows = self.db.query(
+            models.Exercise.muscle_groups, func.count(models.WorkoutLog.id)
+        ).join(
+            models.WorkoutLog, models.WorkoutLog.exercise_id == models.Exercise.id
+        ).filter(*in_range).group_by(models.Exercise.id).all()
+
+        counts: Dict[str, int] = {}
+        for muscle_groups, logs in rows:
+            for muscle in muscle_groups or []:
+                counts[muscle] = counts.get(muscle, 0) + logs
+        return counts
+
     def _get_recent_workouts(self, days: int = 3) -> List[str]:
         """Get recent workouts to avoid muscle fatigue"""
         start_date = datetime.utcnow() - timedelta(days=days)
 
-        logs = self.db.query(models.WorkoutLog).join(
-            models.Exercise
-        ).filter(
+        logged_exercise_ids = self.db.query(models.WorkoutLog.exercise_id).filter(
             models.WorkoutLog.user_id == self.user.id,
             models.WorkoutLog.date >= start_date
-        ).all()
+        )
+
+        rows = self.db.query(
+            models.Exercise.name, models.Exercise.muscle_groups
+        ).filter(
+            models.Exercise.id.in_(logged_exercise_ids)
+        ).order_by(models.Exercise.name).all()
+
+        return [f"{name} ({', '.join(muscle_groups or [])})" for name, muscle_groups in rows]
 
-        recent_exercises = []
-        for log in logs:
-            if log.exercise:
-                recent_exercises.append(f"{log.exercise.name} ({', '.join(log.exercise.muscle_groups)})")
+    def _get_recent_muscles(self, days: int = 2) -> List[str]:
+        """Muscle groups trained in the last few days"""
+        start_date = datetime.utcnow() - timedelta(days=days)
 
-        return recent_exercises
+        return sorted(self._logged_muscle_counts(start_date))
 
     def _get_available_exercises(
         self,
         equipment: Optional[List[str]] = None,
-        fitness_level: str = "beginner"
-    ) -> List[models.Exercise]:
+        fitness_level: str = "beginner",
+        difficulties: Optional[List[str]] = None
+    ) -> List[ExerciseCandidate]:
         """Get exercises matching criteria"""
-        query = self.db.query(models.Exercise).filter(
-            models.Exercise.difficulty == fitness_level
-        )
+        if self.eligible_exercise_ids is not None:
+            return get_exercise_candidates(
+                self.db,
+                difficulties=difficulties or [fitness_level],
+                eligible_ids=self.eligible_exercise_ids
+            )
 
-        if equipment:
-            # Get exercises matching equipment
-            exercises = []
-            for equip in equipment:
-                exs = query.filter(models.Exercise.equipment.contains([equip])).all()
-                exercises.extend(exs)
-
-            # Add bodyweight exercises
-            bodyweight = query.filter(models.Exercise.equipment == None).all()
-            exercises.extend(bodyweight)
-
-            # Remove duplicates
-            seen = set()
-            unique_exercises = []
-            for ex in exercises:
-                if ex.id not in seen:
-                    seen.add(ex.id)
-                    unique_exercises.append(ex)
-
-            return unique_exercises
-        else:
-            return query.all()
+        return get_exercise_candidates(
+            self.db,
+            difficulties=difficulties or [fitness_level],
+            equipment=equipment
+        )
 
     def _build_multi_week_prompt(
         self,
@@ -488,169 +520,208 @@ OUTPUT JSON:
         self.db.refresh(program)
         return program
 
-    def _generate_multi_week_template(
+    def _get_engine_catalog(self, equipment: Optional[List[str]], fitness_level: str) -> List[ExerciseCandidate]:
+        """Exercises the rule engine may program: the user's level and easier"""
+        return self._get_available_exercises(
+            equipment,
+            fitness_level,
+            difficulties=program_engine.eligible_difficulties(fitness_level)
+        )
+
+    def _create_program_from_skeleton(
         self,
+        skeleton: Dict,
         request: schemas.TrainerProgramRequest,
         fitness_level: str,
         fitness_goals: List[str]
     ) -> models.AITrainingProgram:
-        """Generate template-based multi-week program (rule-based fallback)"""
+        """Persist a (possibly cached) rule-engine skeleton as program rows"""
 
-        # Create basic program
         program = models.AITrainingProgram(
             user_id=self.user.id,
             program_type="multi_week",
-            name=f"{request.duration_weeks}-Week {fitness_level.title()} Program",
-            description=f"Template-based training program for {', '.join(fitness_goals)}",
+            name=skeleton["program_name"],
+            description=skeleton["program_description"],
             fitness_level=fitness_level,
             fitness_goals=fitness_goals,
             available_equipment=request.available_equipment,
+            training_preferences=request.preferences,
             duration_weeks=request.duration_weeks,
             days_per_week=request.days_per_week,
             difficulty=fitness_level,
-            ai_rationale="Rule-based program using progressive overload principles",
+            ai_rationale=skeleton["program_rationale"],
+            generation_model="rule_engine",
             status="draft"
         )
 
         self.db.add(program)
         self.db.flush()
 
-        # Get exercises
-        exercises = self._get_available_exercises(request.available_equipment, fitness_level)
-
-        # Create simple program structure
-        for week in range(1, request.duration_weeks + 1):
-            weekly_plan = models.AIWeeklyPlan(
-                training_program_id=program.id,
-                week_number=week,
-                theme=f"Week {week}",
-                notes=f"Progressive training week {week}"
-            )
-            self.db.add(weekly_plan)
-            self.db.flush()
+        # Stamp the skeleton with three bulk INSERTs instead of per-row ORM objects
+        weeks = skeleton["weeks"]
+        week_ids = self.db.scalars(
+            insert(models.AIWeeklyPlan).returning(models.AIWeeklyPlan.id, sort_by_parameter_order=True),
+            [
+                {
+                    "training_program_id": program.id,
+                    "week_number": week_data["week_number"],
+                    "theme": week_data["theme"],
+                    "notes": week_data["notes"]
+                }
+                for week_data in weeks
+            ]
+        ).all()
 
-            # Create workouts for this week
-            for day in range(1, request.days_per_week + 1):
-                daily_workout = models.AIDailyWorkout(
-                    training_program_id=program.id,
-                    weekly_plan_id=weekly_plan.id,
-                    day_number=day,
-                    workout_name=f"Workout {day}",
-                    focus_areas=["full_body"],
-                    estimated_duration_minutes=request.time_per_session_minutes
-                )
-                self.db.add(daily_workout)
-                self.db.flush()
+        workouts = [
+            (week_id, workout_data)
+            for week_id, week_data in zip(week_ids, weeks)
+            for workout_data in week_data["workouts"]
+        ]
+        workout_ids = self.db.scalars(
+            insert(models.AIDailyWorkout).returning(models.AIDailyWorkout.id, sort_by_parameter_order=True),
+            [
+                {
+                    "training_program_id": program.id,
+                    "weekly_plan_id": week_id,
+                    "day_number": workout_data["day_number"],
+                    "workout_name": workout_data["workout_name"],
+                    "focus_areas": workout_data["focus_areas"],
+                    "estimated_duration_minutes": workout_data["estimated_duration_minutes"],
+                    "notes": workout_data["notes"]
+                }
+                for week_id, workout_data in workouts
+            ]
+        ).all()
 
-                # Add some exercises
-                for idx, exercise in enumerate(exercises[:6]):
-                    workout_exercise = models.AIDailyWorkoutExercise(
-                        daily_workout_id=daily_workout.id,
-                        exercise_id=exercise.id,
-                        order=idx,
-                        sets=3,
-                        reps=["10-12"],
-                        rest_seconds=60
-                    )
-                    self.db.add(workout_exercise)
+        exercise_rows = [
+            {
+                "daily_workout_id": workout_id,
+                "exercise_id": ex_data["exercise_id"],
+                "order": idx,
+                "sets": ex_data["sets"],
+                "reps": ex_data["reps"],
+                "rest_seconds": ex_data["rest_seconds"],
+                "intensity_level": ex_data["intensity_level"],
+                "notes": ex_data["notes"]
+            }
+            for workout_id, (_, workout_data) in zip(workout_ids, workouts)
+            for idx, ex_data in enumerate(workout_data["exercises"])
+        ]
+        if exercise_rows:
+            self.db.execute(insert(models.AIDailyWorkoutExercise), exercise_rows)
 
         self.db.commit()
         self.db.refresh(program)
         return program
 
+    def _build_daily_workout(self, workout_data: Dict, day_number: Optional[int] = None) -> models.AIDailyWorkout:
+        daily_workout = models.AIDailyWorkout(
+            day_number=day_number or workout_data["day_number"],
+            workout_name=workout_data["workout_name"],
+            focus_areas=workout_data["focus_areas"],
+            estimated_duration_minutes=workout_data["estimated_duration_minutes"],
+            notes=workout_data.get("notes")
+        )
+        for idx, ex_data in enumerate(workout_data["exercises"]):
+            daily_workout.exercises.append(models.AIDailyWorkoutExercise(
+                exercise_id=ex_data["exercise_id"],
+                order=idx,
+                sets=ex_data["sets"],
+                reps=ex_data["reps"],
+                rest_seconds=ex_data["rest_seconds"],
+                intensity_level=ex_data["intensity_level"],
+                notes=ex_data.get("notes")
+            ))
+        return daily_workout
+
+    def _generate_multi_week_template(
+        self,
+        request: schemas.TrainerProgramRequest,
+        fitness_level: str,
+        fitness_goals: List[str]
+    ) -> models.AITrainingProgram:
+        """Generate a periodized multi-week program with the rule engine"""
+
+        key = program_cache.skeleton_key(
+            get_catalog_version(self.db),
+            fitness_level,
+            request.available_equipment,
+            request.days_per_week,
+            request.duration_weeks,
+            fitness_goals,
+            request.time_per_session_minutes,
+            self.eligible_exercise_ids
+        )
+        skeleton = program_cache.skeleton_cache.get(key)
+
+        if skeleton is None:
+            exercises = self._get_engine_catalog(request.available_equipment, fitness_level)
+            skeleton = program_engine.generate_multi_week_program(
+                exercises,
+                fitness_level=fitness_level,
+                fitness_goals=fitness_goals,
+                duration_weeks=request.duration_weeks,
+                days_per_week=request.days_per_week,
+                time_per_session_minutes=request.time_per_session_minutes
+            )
+            program_cache.skeleton_cache.put(key, skeleton)
+
+        return self._create_program_from_skeleton(skeleton, request, fitness_level, fitness_goals)
+
     def _generate_daily_template(
         self,
         request: schemas.TrainerProgramRequest,
         fitness_level: str,
         fitness_goals: List[str]
     ) -> models.AITrainingProgram:
-        """Generate template-based daily workout (rule-based fallback)"""
+        """Generate a single session with the rule engine (rule-based fallback)"""
+
+        exercises = self._get_engine_catalog(request.available_equipment, fitness_level)
+
+        workout = program_engine.generate_daily_workout(
+            exercises,
+            fitness_level=fitness_level,
+            fitness_goals=fitness_goals,
+            time_per_session_minutes=request.time_per_session_minutes,
+            recent_muscles=self._get_recent_muscles(days=2)
+        )
 
         program = models.AITrainingProgram(
             user_id=self.user.id,
             program_type="daily",
-            name="Daily Workout",
-            description="Template-based daily workout",
+            name=workout["workout_name"],
+            description="Rule-based daily workout",
             fitness_level=fitness_level,
             fitness_goals=fitness_goals,
             available_equipment=request.available_equipment,
+            training_preferences=request.preferences,
             days_per_week=request.days_per_week,
             difficulty=fitness_level,
-            ai_rationale="Rule-based workout selection",
+            ai_rationale=workout["rationale"],
+            generation_model="rule_engine",
             status="draft"
         )
 
-        self.db.add(program)
-        self.db.flush()
-
-        # Get exercises
-        exercises = self._get_available_exercises(request.available_equipment, fitness_level)
-
-        daily_workout = models.AIDailyWorkout(
-            training_program_id=program.id,
-            day_number=1,
-            workout_name="Today's Workout",
-            focus_areas=["full_body"],
-            estimated_duration_minutes=request.time_per_session_minutes
-        )
-        self.db.add(daily_workout)
-        self.db.flush()
-
-        # Add exercises
-        for idx, exercise in enumerate(exercises[:6]):
-            workout_exercise = models.AIDailyWorkoutExercise(
-                daily_workout_id=daily_workout.id,
-                exercise_id=exercise.id,
-                order=idx,
-                sets=3,
-                reps=["10-12"],
-                rest_seconds=60
-            )
-            self.db.add(workout_exercise)
+        daily_workout = self._build_daily_workout(workout, day_number=1)
+        program.daily_workouts.append(daily_workout)
 
+        self.db.add(program)
         self.db.commit()
         self.db.refresh(program)
         return program
 
     def generate_adaptation_insights(self) -> List[models.AIAdaptationInsight]:
-        """Analyze workout logs and generate adaptation insights"""
+        """Recompute this user's adaptation insights now (the nightly job does the same for everyone)"""
 
-        workout_history = self._analyze_workout_history(days=30)
+        history = aggregate_workout_history(self.db, [self.user.id]).get(self.user.id)
+        if history is None:
+            return []
 
-        if workout_history["total_workouts"] < 5:
-            return []  # Not enough data
-
-        insights = []
-
-        # Check for high difficulty ratings (overtraining indicator)
-        if workout_history.get("avg_difficulty_rating", 5) > 7.5:
-            insight = models.AIAdaptationInsight(
-                user_id=self.user.id,
-                insight_type="recovery_needed",
-                insight_text="Your recent workouts show consistently high difficulty ratings, which may indicate you need more recovery time.",
-                data_basis={
-                    "avg_difficulty_rating": workout_history["avg_difficulty_rating"],
-                    "analyzed_logs": workout_history["total_workouts"]
-                },
-                recommendation="Consider adding a deload week with reduced volume and intensity."
-            )
-            insights.append(insight)
-            self.db.add(insight)
-
-        # Check for consistent training (positive)
-        if workout_history["total_workouts"] >= 12:  # 3+ workouts/week
-            insight = models.AIAdaptationInsight(
-                user_id=self.user.id,
-                insight_type="progression_detected",
-                insight_text="Excellent consistency! You've maintained regular training frequency.",
-                data_basis={
-                    "total_workouts": workout_history["total_workouts"],
-                    "time_range_days": 30
-                },
-                recommendation="Consider progressive overload - gradually increase weight or reps."
-            )
-            insights.append(insight)
-            self.db.add(insight)
+        insights = save_adaptation_insights(
+            self.db, self.user.id, compute_adaptation_insights(history), history
+        )
 
         self.db.commit()
+        for insight in insights:
+            self.db.refresh(insight)
         return insights
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import re
+from typing import Dict, Iterable, List
+from sqlalchemy import and_, case, cast, func, literal_column, or_
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.orm import Session
+from app import models
+from app.services.program_snapshots import invalidate_program_snapshots
+
+CATALOG_STATE_ID = 1
+UPSERT_CHUNK_SIZE = 1000
+
+# Columns a catalog load may overwrite on an existing template exercise
+CATALOG_COLUMNS = (
+    "name", "description", "category", "muscle_groups", "equipment", "difficulty",
+    "instructions", "video_url", "image_url", "muscle_mask", "equipment_mask"
+)
+JSON_COLUMNS = {"muscle_groups", "equipment"}
+
+# Provenance of rows loaded from an external catalog; never cleared by a load without it
+SOURCE_COLUMNS = ("source", "source_uuid", "content_hash")
+
+# Media cache columns derived from each URL column
+MEDIA_SHA_COLUMNS = {
+    "image_url": ("image_sha256", "thumbnail_sha256"),
+    "video_url": ("video_sha256",),
+}
+
+
+def get_catalog_version(db: Session) -> int:
+    """Current exercise catalog version, used to invalidate derived caches"""
+    version = db.query(models.CatalogState.version).filter(
+        models.CatalogState.id == CATALOG_STATE_ID
+    ).scalar()
+    return version or 0
+
+
+def bump_catalog_version(db: Session) -> int:
+    """Increment the catalog version inside the caller's transaction"""
+    updated = db.query(models.CatalogState).filter(
+        models.CatalogState.id == CATALOG_STATE_ID
+    ).update({"version": models.CatalogState.version + 1}, synchronize_session=False)
+
+    if not updated:
+        db.add(models.CatalogState(id=CATALOG_STATE_ID, version=1))
+        db.flush()
+
+    return get_catalog_version(db)
+
+
+def exercise_name_key(name: str) -> str:
+    """Normalized name used for catalog uniqueness: "Push-Ups " and "push ups" collide"""
+    return re.sub(r"[^a-z0-9]+", " ", (name or "").lower()).strip()
+
+
+def catalog_content_hash(row: Dict) -> str:
+    """Stable hash of the fields a catalog load writes, to detect upstream changes cheaply"""
+    canonical = json.dumps(
+        {column: row.get(column) for column in CATALOG_COLUMNS},
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def get_source_hashes(db: Session, source: str) -> Dict[str, str]:
+    """{source_uuid: content_hash} of every live exercise loaded from a source"""
+    return dict(
+        db.query(models.Exercise.source_uuid, models.Exercise.content_hash).filter(
+            models.Exercise.source == source,
+            models.Exercise.source_uuid != None,
+            models.Exercise.is_archived == False
+        ).all()
+    )
+
+
+def _follow_renames(db: Session, rows_by_key: Dict[str, Dict]):
+    """Move the name_key of renamed upstream exercises before the upsert.
+
+    The upsert matches on name_key, so without this a renamed exercise would be
+    inserted as a new row. Renames onto a name another row already owns are
+    left alone (that row is updated instead).
+    """
+    sourced = {
+        (row["source"], row["source_uuid"]): key
+        for key, row in rows_by_key.items()
+        if row.get("source") and row.get("source_uuid")
+    }
+    if not sourced:
+        return
+
+    existing = db.query(
+        models.Exercise.id, models.Exercise.source, models.Exercise.source_uuid, models.Exercise.name_key
+    ).filter(
+        models.Exercise.is_template == True,
+        models.Exercise.source_uuid.in_([source_uuid for _, source_uuid in sourced])
+    ).all()
+
+    for exercise_id, source, source_uuid, name_key in existing:
+        new_key = sourced.get((source, source_uuid))
+        if not new_key or new_key == name_key:
+            continue
+        taken = db.query(models.Exercise.id).filter(
+            models.Exercise.is_template == True,
+            models.Exercise.name_key == new_key
+        ).first()
+        if not taken:
+            db.query(models.Exercise).filter(
+                models.Exercise.id == exercise_id
+            ).update({"name_key": new_key}, synchronize_session=False)
+
+
+def upsert_catalog_exercises(db: Session, rows: Iterable[Dict]) -> Dict[str, int]:
+    """Insert or update template exercises by name_key, a chunk per statement.
+
+    Rows must already be normalized (taxonomy.normalize_exercise_fields).
+    Rows identical to what is stored are left alone, so re-running a load is
+    cheap; rows carrying source/source_uuid also follow upstream renames and
+    are un-archived if they reappear (merged duplicates stay archived).
+    Programs using an updated exercise lose their stored snapshot. Returns
+    {"inserted", "updated", "unchanged"}; the caller commits and bumps the
+    catalog version once.
+    """
+    # Last row wins for duplicate names; ON CONFLICT can't touch a row twice per statement
+    by_key = {}
+    for row in rows:
+        key = exercise_name_key(row["name"])
+        if key:
+            by_key[key] = {
+                **{column: row.get(column) for column in CATALOG_COLUMNS + SOURCE_COLUMNS},
+                "name_key": key,
+                "is_template": True,
+                "is_archived": False,
+                "created_by_id": None
+            }
+
+    _follow_renames(db, by_key)
+
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    values = list(by_key.values())
+
+    for start in range(0, len(values), UPSERT_CHUNK_SIZE):
+        chunk = values[start:start + UPSERT_CHUNK_SIZE]
+        statement = insert(models.Exercise).values(chunk)
+        excluded = statement.excluded
+        table = models.Exercise.__table__
+
+        # json has no equality operator, compare those columns as jsonb
+        merged_source = {column: func.coalesce(excluded[column], table.c[column]) for column in SOURCE_COLUMNS}
+        changed = or_(
+            and_(table.c.is_archived, table.c.merged_into_id.is_(None)),
+            *[
+                cast(table.c[column], JSONB).is_distinct_from(cast(excluded[column], JSONB))
+                if column in JSON_COLUMNS else
+                table.c[column].is_distinct_from(excluded[column])
+                for column in CATALOG_COLUMNS
+            ],
+            *[table.c[column].is_distinct_from(value) for column, value in merged_source.items()]
+        )
+
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.name_key],
+            index_where=table.c.is_template,
+            set_={
+                **{column: excluded[column] for column in CATALOG_COLUMNS},
+                **merged_source,
+                # Reappearing upstream un-archives a row, unless it was merged into another
+                "is_archived": table.c.merged_into_id.is_not(None),
+                # A new media URL invalidates the cached copy
+                **{
+                    sha_column: case(
+                        (table.c[url_column].is_distinct_from(excluded[url_column]), None),
+                        else_=table.c[sha_column]
+                    )
+                    for url_column, sha_columns in MEDIA_SHA_COLUMNS.items()
+                    for sha_column in sha_columns
+                }
+            },
+            where=changed
+        ).returning(
+            table.c.id,
+            # xmax is 0 only for freshly inserted row versions
+            literal_column("xmax = 0").label("inserted")
+        )
+
+        written = db.execute(statement).all()
+        updated_ids = [row.id for row in written if not row.inserted]
+        invalidate_program_snapshots(db, updated_ids)
+        counts["inserted"] += len(written) - len(updated_ids)
+        counts["updated"] += len(updated_ids)
+        counts["unchanged"] += len(chunk) - len(written)
+
+    return counts
+
+
+def archive_source_exercises(db: Session, source: str, source_uuids: Iterable[str]) -> int:
+    """Soft-delete exercises removed upstream; workout history keeps pointing at them"""
+    source_uuids = list(source_uuids)
+    if not source_uuids:
+        return 0
+    return db.query(models.Exercise).filter(
+        models.Exercise.source == source,
+        models.Exercise.source_uuid.in_(source_uuids),
+        models.Exercise.is_archived == False
+    ).update({"is_archived": True}, synchronize_session=False)
@@ -0,0 +1,239 @@
+import hashlib
+import re
+from collections import defaultdict
+from datetime import datetime, timezone
+from itertools import combinations
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import and_, case, or_
+from sqlalchemy.orm import Session
+from app import models
+from app.config import settings
+from app.services.catalog import bump_catalog_version
+from app.services.program_snapshots import invalidate_program_snapshots
+from app.taxonomy import EQUIPMENT_IDS, canonical_equipment, canonicalize_equipment, canonicalize_muscles
+
+NUM_PERM = 128
+LSH_BANDS = 32  # 4 rows per band: pairs from ~0.4 Jaccard up become candidates, then get verified
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+# Words that never tell two exercises apart
+STOPWORDS = {"a", "an", "and", "the", "with", "on", "of", "to", "using", "exercise"}
+
+
+def _permutations(num_perm: int, seed: int = 1) -> List[Tuple[int, int]]:
+    """Fixed (a, b) pairs for h(x) = (a * x + b) mod p, derived from the seed so signatures are stable"""
+    pairs = []
+    for i in range(num_perm):
+        digest = hashlib.blake2b(f"{seed}:{i}".encode(), digest_size=16).digest()
+        pairs.append((
+            int.from_bytes(digest[:8], "little") % (MERSENNE_PRIME - 1) + 1,
+            int.from_bytes(digest[8:], "little") % MERSENNE_PRIME
+        ))
+    return pairs
+
+
+PERMUTATIONS = _permutations(NUM_PERM)
+
+
+def _hash_token(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+def exercise_shingles(name: str, muscle_groups: Iterable[str], equipment: Iterable[str]) -> FrozenSet[str]:
+    """Tokens compared between exercises.
+
+    Name words that are equipment ("Barbell Bench Press") count as the
+    equipment token, so they match the same equipment listed separately.
+    Character trigrams of the name absorb spelling variants (push-ups/pushups).
+    """
+    tokens: Set[str] = set()
+    equipment_tokens = {f"e:{item}" for item in canonicalize_equipment(equipment)}
+
+    words = [
+        word for word in re.sub(r"[^a-z0-9]+", " ", (name or "").lower()).split()
+        if word not in STOPWORDS
+    ]
+    name_words = []
+    for word in words:
+        equipment_name = canonical_equipment(word)
+        if equipment_name in EQUIPMENT_IDS:
+            equipment_tokens.add(f"e:{equipment_name}")
+        else:
+            name_words.append(word.rstrip("s"))  # crude singular: "curls" == "curl"
+
+    tokens.update(f"w:{word}" for word in name_words)
+    compact = "".join(name_words)
+    tokens.update(f"c:{compact[i:i + 3]}" for i in range(max(len(compact) - 2, 0)))
+    tokens.update(f"m:{muscle}" for muscle in canonicalize_muscles(muscle_groups))
+    return frozenset(tokens | equipment_tokens)
+
+
+def minhash_signature(shingles: Iterable[str]) -> Tuple[int, ...]:
+    hashes = [_hash_token(token) for token in shingles]
+    if not hashes:
+        return (MAX_HASH,) * NUM_PERM
+    return tuple(
+        min((a * value + b) % MERSENNE_PRIME for value in hashes) & MAX_HASH
+        for a, b in PERMUTATIONS
+    )
+
+
+def estimated_similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+    """Fraction of equal MinHash slots, an estimate of the shingles' Jaccard similarity"""
+    return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+def lsh_candidate_pairs(signatures: Dict[int, Tuple[int, ...]], bands: int = LSH_BANDS) -> Set[Tuple[int, int]]:
+    """Id pairs sharing at least one identical band; avoids comparing every pair"""
+    rows = len(next(iter(signatures.values()), ())) // bands
+    pairs = set()
+    for band in range(bands):
+        buckets = defaultdict(list)
+        for exercise_id, signature in signatures.items():
+            buckets[signature[band * rows:(band + 1) * rows]].append(exercise_id)
+        for ids in buckets.values():
+            if len(ids) > 1:
+                pairs.update(combinations(sorted(ids), 2))
+    return pairs
+
+
+def _equipment(shingles: FrozenSet[str]) -> FrozenSet[str]:
+    return frozenset(token for token in shingles if token.startswith("e:"))
+
+
+def _survivor_order(exercise: models.Exercise):
+    """Which of two duplicates to keep: curated seed rows first, then the most complete, then the oldest"""
+    return (exercise.source is not None, not exercise.instructions, exercise.id)
+
+
+def find_duplicate_pairs(
+    exercises: List[models.Exercise],
+    threshold: Optional[float] = None
+) -> List[Tuple[models.Exercise, models.Exercise, float]]:
+    """(keep, merge, similarity) for near-duplicate exercises, most similar first.
+
+    Exercises needing different equipment are never duplicates, however
+    similar their names ("Dumbbell Bench Press" vs "Bench Press").
+    """
+    threshold = settings.DEDUPE_SIMILARITY_THRESHOLD if threshold is None else threshold
+    by_id = {exercise.id: exercise for exercise in exercises}
+    shingles = {
+        exercise.id: exercise_shingles(exercise.name, exercise.muscle_groups or [], exercise.equipment or [])
+        for exercise in exercises
+    }
+    signatures = {exercise_id: minhash_signature(tokens) for exercise_id, tokens in shingles.items()}
+
+    found = []
+    for first_id, second_id in lsh_candidate_pairs(signatures):
+        if _equipment(shingles[first_id]) != _equipment(shingles[second_id]):
+            continue
+        similarity = estimated_similarity(signatures[first_id], signatures[second_id])
+        if similarity >= threshold:
+            keep, merge = sorted((by_id[first_id], by_id[second_id]), key=_survivor_order)
+            found.append((keep, merge, similarity))
+
+    found.sort(key=lambda pair: (-pair[2], pair[0].id, pair[1].id))
+    return found
+
+
+def detect_duplicate_exercises(db: Session, threshold: Optional[float] = None) -> int:
+    """Record new merge candidates among live catalog exercises. Caller commits.
+
+    Pairs already recorded in either direction (pending, merged or
+    rejected) are not proposed again. Returns the number of new candidates.
+    """
+    exercises = db.query(models.Exercise).filter(
+        models.Exercise.is_template == True,
+        models.Exercise.is_archived == False
+    ).all()
+
+    known = {
+        frozenset(pair) for pair in db.query(
+            models.ExerciseMergeCandidate.keep_exercise_id,
+            models.ExerciseMergeCandidate.merge_exercise_id
+        )
+    }
+
+    added = 0
+    for keep, merge, similarity in find_duplicate_pairs(exercises, threshold):
+        if frozenset((keep.id, merge.id)) in known:
+            continue
+        db.add(models.ExerciseMergeCandidate(
+            keep_exercise_id=keep.id,
+            merge_exercise_id=merge.id,
+            similarity=round(similarity, 4)
+        ))
+        known.add(frozenset((keep.id, merge.id)))
+        added += 1
+
+    db.flush()
+    return added
+
+
+def merge_exercises(db: Session, keep_id: int, merge_id: int) -> Dict[str, int]:
+    """Point every reference to merge_id at keep_id and retire merge_id. Caller commits.
+
+    The merged row is archived with merged_into_id set rather than deleted,
+    so a later catalog sync matching it by name or source id does not bring
+    it back as a new exercise. Returns the number of rows remapped per table.
+    """
+    if keep_id == merge_id:
+        raise ValueError("Cannot merge an exercise into itself")
+
+    keep = db.get(models.Exercise, keep_id)
+    merge = db.get(models.Exercise, merge_id)
+    if keep is None or merge is None:
+        raise ValueError(f"Exercise {keep_id if keep is None else merge_id} not found")
+    if keep.merged_into_id is not None:
+        raise ValueError(f"Exercise {keep_id} was itself merged into {keep.merged_into_id}")
+
+    counts = {}
+    counts["workout_logs"] = db.query(models.WorkoutLog).filter(
+        models.WorkoutLog.exercise_id == merge_id
+    ).update({"exercise_id": keep_id}, synchronize_session=False)
+
+    # Snapshots of these programs still embed the exercise being merged away
+    invalidate_program_snapshots(db, [merge_id])
+    counts["ai_daily_workout_exercises"] = db.query(models.AIDailyWorkoutExercise).filter(
+        models.AIDailyWorkoutExercise.exercise_id == merge_id
+    ).update({"exercise_id": keep_id}, synchronize_session=False)
+
+    # A plan listing both exercises keeps only its existing keep row
+    association = models.workout_exercise_association
+    plans_with_keep = db.query(association.c.workout_plan_id).filter(
+        association.c.exercise_id == keep_id
+    ).scalar_subquery()
+    db.execute(association.delete().where(
+        association.c.exercise_id == merge_id,
+        association.c.workout_plan_id.in_(plans_with_keep)
+    ))
+    counts["workout_plans"] = db.execute(
+        association.update().where(association.c.exercise_id == merge_id).values(exercise_id=keep_id)
+    ).rowcount
+
+    # Exercises merged into this one earlier now point at the survivor
+    db.query(models.Exercise).filter(
+        models.Exercise.merged_into_id == merge_id
+    ).update({"merged_into_id": keep_id}, synchronize_session=False)
+    merge.merged_into_id = keep_id
+    merge.is_archived = True
+
+    now = datetime.now(timezone.utc)
+    candidates = models.ExerciseMergeCandidate
+    db.query(candidates).filter(
+        candidates.status == "pending",
+        or_(candidates.keep_exercise_id == merge_id, candidates.merge_exercise_id == merge_id)
+    ).update({
+        # The merged pair itself; other pending pairs involving merge_id are moot now
+        "status": case(
+            (and_(candidates.keep_exercise_id == keep_id, candidates.merge_exercise_id == merge_id), "merged"),
+            else_="superseded"
+        ),
+        "resolved_at": now
+    }, synchronize_session=False)
+
+    bump_catalog_version(db)
+    db.flush()
+    return counts
+
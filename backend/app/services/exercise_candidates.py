@@ -0,0 +1,132 @@
+from collections import namedtuple
+from typing import Collection, Iterable, List, Optional, Sequence
+from sqlalchemy import cast, false, or_
+from sqlalchemy.dialects.postgresql import JSONB, array
+from sqlalchemy.orm import Session
+from app import models
+from app.config import settings
+from app.services.catalog import get_catalog_version
+from app.services.program_cache import CatalogCache
+from app.taxonomy import (
+    canonicalize_equipment, canonicalize_muscles, equipment_mask, muscle_mask, unknown_muscles
+)
+
+# Lightweight, immutable stand-in for Exercise rows; safe to share across requests
+ExerciseCandidate = namedtuple(
+    "ExerciseCandidate",
+    ["id", "name", "category", "muscle_groups", "equipment", "difficulty"]
+)
+
+candidate_cache = CatalogCache(settings.EXERCISE_CANDIDATE_CACHE_SIZE, "exercise_candidates")
+
+
+def candidate_key(
+    catalog_version: int,
+    difficulties: Optional[Sequence[str]],
+    equipment: Optional[Sequence[str]],
+    target_muscles: Optional[Sequence[str]]
+) -> tuple:
+    """Normalized filter tuple, so equivalent requests (and synonyms) share a cache entry"""
+    return (
+        catalog_version,
+        tuple(sorted(set(difficulties))) if difficulties else None,
+        tuple(sorted(canonicalize_equipment(equipment))) if equipment else None,
+        tuple(sorted(canonicalize_muscles(target_muscles))) or None if target_muscles else None
+    )
+
+
+def equipment_clause(available_mask: int):
+    """Exercises whose required equipment is all available (bodyweight always is)"""
+    return models.Exercise.equipment_mask.op("&")(~available_mask) == 0
+
+
+def muscle_clause(target_muscles: Sequence[str]):
+    """Exercises working any of the target muscles"""
+    clauses = []
+    mask = muscle_mask(target_muscles)
+    if mask:
+        clauses.append(models.Exercise.muscle_mask.op("&")(mask) != 0)
+
+    # Names outside the taxonomy can still match the stored JSON list
+    unknown = unknown_muscles(target_muscles)
+    if unknown:
+        clauses.append(cast(models.Exercise.muscle_groups, JSONB).has_any(array(unknown)))
+
+    return or_(*clauses) if clauses else false()
+
+
+def _rank(candidate: ExerciseCandidate, target_muscles: Sequence[str]):
+    """Most targeted muscles first, then compound movements, then by name"""
+    targeted = sum(1 for muscle in candidate.muscle_groups if muscle in target_muscles)
+    return (-targeted, -len(candidate.muscle_groups), candidate.name)
+
+
+def _query_candidates(
+    db: Session,
+    difficulties: Optional[Sequence[str]],
+    equipment: Optional[Sequence[str]],
+    target_muscles: Optional[Sequence[str]]
+) -> List[ExerciseCandidate]:
+    """One query for all filters, on the taxonomy bitmasks"""
+    query = db.query(
+        models.Exercise.id,
+        models.Exercise.name,
+        models.Exercise.category,
+        models.Exercise.muscle_groups,
+        models.Exercise.equipment,
+        models.Exercise.difficulty
+    ).filter(models.Exercise.is_archived == False)
+
+    if difficulties:
+        query = query.filter(models.Exercise.difficulty.in_(difficulties))
+
+    if equipment is not None:
+        query = query.filter(equipment_clause(equipment_mask(equipment)))
+
+    if target_muscles is not None:
+        query = query.filter(muscle_clause(target_muscles))
+
+    candidates = [
+        ExerciseCandidate(
+            id=row.id,
+            name=row.name,
+            category=row.category,
+            muscle_groups=tuple(row.muscle_groups or ()),
+            equipment=tuple(row.equipment or ()),
+            difficulty=row.difficulty
+        )
+        for row in query
+    ]
+    candidates.sort(key=lambda c: _rank(c, target_muscles or ()))
+    return candidates
+
+
+def get_exercise_candidates(
+    db: Session,
+    difficulties: Optional[Sequence[str]] = None,
+    equipment: Optional[Sequence[str]] = None,
+    target_muscles: Optional[Sequence[str]] = None,
+    exclude_ids: Optional[Iterable[int]] = None,
+    eligible_ids: Optional[Collection[int]] = None
+) -> List[ExerciseCandidate]:
+    """Ranked exercises matching the filters.
+
+    Results are cached per filter tuple and catalog version. Per-user
+    exclusions (e.g. recently trained exercises) and a gym profile's
+    precomputed eligible ids are applied after the cache so they do not
+    fragment it.
+    """
+    key = candidate_key(get_catalog_version(db), difficulties, equipment, target_muscles)
+
+    candidates = candidate_cache.get(key)
+    if candidates is None:
+        candidates = tuple(_query_candidates(db, key[1], key[2], key[3]))
+        candidate_cache.put(key, candidates)
+
+    if eligible_ids is not None:
+        candidates = [c for c in candidates if c.id in eligible_ids]
+
+    if exclude_ids:
+        excluded = set(exclude_ids)
+        return [c for c in candidates if c.id not in excluded]
+    return list(candidates)
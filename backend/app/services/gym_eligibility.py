@@ -0,0 +1,42 @@
+from typing import FrozenSet, List, Optional
+from sqlalchemy.orm import Session
+from app import models
+from app.services.catalog import get_catalog_version
+from app.services.exercise_candidates import equipment_clause
+from app.taxonomy import canonicalize_equipment, equipment_mask
+
+
+def compute_eligible_exercise_ids(db: Session, available_mask: int) -> List[int]:
+    """Ids of all exercises doable with the given equipment bits (bodyweight included)"""
+    query = db.query(models.Exercise.id).filter(
+        models.Exercise.is_archived == False,
+        equipment_clause(available_mask)
+    )
+    return sorted(exercise_id for (exercise_id,) in query)
+
+
+def refresh_gym_profile(db: Session, profile: models.GymProfile, catalog_version: Optional[int] = None):
+    """Canonicalize the profile's equipment and materialize its eligible exercise ids
+    for the current catalog. Caller commits."""
+    if catalog_version is None:
+        catalog_version = get_catalog_version(db)
+    profile.equipment = canonicalize_equipment(profile.equipment)
+    profile.equipment_mask = equipment_mask(profile.equipment)
+    profile.eligible_exercise_ids = compute_eligible_exercise_ids(db, profile.equipment_mask)
+    profile.eligible_catalog_version = catalog_version
+
+
+def get_eligible_exercise_ids(db: Session, profile: models.GymProfile) -> FrozenSet[int]:
+    """Eligible ids for a profile, recomputed (and saved) if the catalog changed since"""
+    catalog_version = get_catalog_version(db)
+    if profile.eligible_exercise_ids is None or profile.eligible_catalog_version != catalog_version:
+        refresh_gym_profile(db, profile, catalog_version)
+        db.commit()
+    return frozenset(profile.eligible_exercise_ids)
+
+
+def get_owned_gym_profile(db: Session, user_id: int, profile_id: int) -> Optional[models.GymProfile]:
+    return db.query(models.GymProfile).filter(
+        models.GymProfile.id == profile_id,
+        models.GymProfile.user_id == user_id
+    ).first()
@@ -0,0 +1,179 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from app import models
+
+HISTORY_DAYS = 30
+MIN_WORKOUTS = 5  # below this there is not enough data for an insight
+
+# Insight types owned by this module; others (e.g. written by hand) are never touched
+INSIGHT_TYPES = ("recovery_needed", "progression_detected")
+
+
+def aggregate_workout_history(db: Session, user_ids: Iterable[int], days: int = HISTORY_DAYS) -> Dict[int, Dict]:
+    """Summarize recent workout logs for many users in one grouped query.
+
+    Returns {user_id: {"total_workouts", "avg_difficulty_rating", "time_range_days",
+    "last_log_id", "last_expired_at", "as_of"}}. last_log_id is the newest log
+    overall and last_expired_at the newest log already outside the window;
+    with as_of (when the window was taken) they decide whether a later run
+    would see different data (see needs_recompute).
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+
+    as_of = datetime.now(timezone.utc)
+    in_window = models.WorkoutLog.date >= as_of.replace(tzinfo=None) - timedelta(days=days)
+
+    rows = db.query(
+        models.WorkoutLog.user_id,
+        func.count(case((in_window, models.WorkoutLog.id))),
+        func.avg(case((in_window, func.coalesce(models.WorkoutLog.difficulty_rating, 5)))),
+        func.max(models.WorkoutLog.id),
+        func.max(case((~in_window, models.WorkoutLog.date)))
+    ).filter(
+        models.WorkoutLog.user_id.in_(user_ids)
+    ).group_by(models.WorkoutLog.user_id).all()
+
+    return {
+        user_id: {
+            "total_workouts": total,
+            "avg_difficulty_rating": round(float(avg_difficulty), 1) if avg_difficulty is not None else None,
+            "time_range_days": days,
+            "last_log_id": last_log_id,
+            "last_expired_at": last_expired_at,
+            "as_of": as_of
+        }
+        for user_id, total, avg_difficulty, last_log_id, last_expired_at in rows
+    }
+
+
+def _as_utc(moment: datetime) -> datetime:
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)  # stored timestamps are UTC
+
+
+def needs_recompute(history: Dict, watermark: Optional[Tuple[int, Optional[datetime]]]) -> bool:
+    """Whether the window now holds different logs than when insights were last computed.
+
+    That is the case when logs were added since, or when logs that were in
+    the window then have slid out of it by now, so insights of users who
+    stopped logging still expire.
+    """
+    if watermark is None:
+        return True
+    last_log_id, computed_at = watermark
+    if history["last_log_id"] > last_log_id:
+        return True
+    if history["last_expired_at"] is None:
+        return False
+    if computed_at is None:
+        return True
+    window_start_then = _as_utc(computed_at) - timedelta(days=history["time_range_days"])
+    return _as_utc(history["last_expired_at"]) >= window_start_then
+
+
+def compute_adaptation_insights(history: Dict) -> List[Dict]:
+    """Derive insights from an aggregated history.
+
+    Pure function of its input so the batch job can run it in worker processes.
+    """
+    total_workouts = history.get("total_workouts", 0)
+    if total_workouts < MIN_WORKOUTS:
+        return []
+
+    insights = []
+
+    # Check for high difficulty ratings (overtraining indicator)
+    avg_difficulty = history.get("avg_difficulty_rating") or 5
+    if avg_difficulty > 7.5:
+        insights.append({
+            "insight_type": "recovery_needed",
+            "insight_text": "Your recent workouts show consistently high difficulty ratings, which may indicate you need more recovery time.",
+            "data_basis": {
+                "avg_difficulty_rating": avg_difficulty,
+                "analyzed_logs": total_workouts
+            },
+            "recommendation": "Consider adding a deload week with reduced volume and intensity."
+        })
+
+    # Check for consistent training (positive)
+    if total_workouts >= 12:  # 3+ workouts/week
+        insights.append({
+            "insight_type": "progression_detected",
+            "insight_text": "Excellent consistency! You've maintained regular training frequency.",
+            "data_basis": {
+                "total_workouts": total_workouts,
+                "time_range_days": history.get("time_range_days", HISTORY_DAYS)
+            },
+            "recommendation": "Consider progressive overload - gradually increase weight or reps."
+        })
+
+    return insights
+
+
+def save_adaptation_insights(
+    db: Session,
+    user_id: int,
+    insights: List[Dict],
+    history: Dict
+) -> List[models.AIAdaptationInsight]:
+    """Upsert insights by (user_id, insight_type) and advance the user's watermark
+    to the history they were computed from.
+
+    Insights of a managed type that no longer apply are removed unless already
+    applied to a program. Caller commits.
+    """
+    existing = {
+        insight.insight_type: insight
+        for insight in db.query(models.AIAdaptationInsight).filter(
+            models.AIAdaptationInsight.user_id == user_id,
+            models.AIAdaptationInsight.insight_type.in_(INSIGHT_TYPES)
+        )
+    }
+
+    active_program_id = db.query(models.AITrainingProgram.id).filter(
+        models.AITrainingProgram.user_id == user_id,
+        models.AITrainingProgram.status == "active"
+    ).scalar()
+
+    saved = []
+    for data in insights:
+        insight = existing.pop(data["insight_type"], None)
+        if insight is None:
+            insight = models.AIAdaptationInsight(user_id=user_id, insight_type=data["insight_type"])
+            db.add(insight)
+        insight.training_program_id = active_program_id
+        insight.insight_text = data["insight_text"]
+        insight.data_basis = data["data_basis"]
+        insight.recommendation = data["recommendation"]
+        saved.append(insight)
+
+    for stale in existing.values():
+        if not stale.applied_to_program:
+            db.delete(stale)
+
+    watermark = db.get(models.InsightWatermark, user_id)
+    if watermark is None:
+        watermark = models.InsightWatermark(user_id=user_id)
+        db.add(watermark)
+    watermark.last_log_id = history["last_log_id"]
+    # Set explicitly: the row may not otherwise change when only the window moved
+    watermark.computed_at = history["as_of"]
+
+    return saved
+
+
+def get_watermarks(db: Session, user_ids: Iterable[int]) -> Dict[int, Tuple[int, Optional[datetime]]]:
+    """(newest analyzed log id, when it was analyzed) per user"""
+    return {
+        user_id: (last_log_id, computed_at)
+        for user_id, last_log_id, computed_at in db.query(
+            models.InsightWatermark.user_id,
+            models.InsightWatermark.last_log_id,
+            models.InsightWatermark.computed_at
+        ).filter(
+            models.InsightWatermark.user_id.in_(list(user_ids))
+        )
+    }
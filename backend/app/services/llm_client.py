@@ -0,0 +1,59 @@
+from typing import Dict, List, Optional
+from functools import lru_cache
+from time import perf_counter
+from app.config import settings
+from app.metrics import LLM_REQUEST_SECONDS, LLM_TOKENS
+
+DEFAULT_MODEL = "gpt-4-turbo-preview"
+
+
+@lru_cache(maxsize=1)
+def get_openai_client():
+    """Return a shared OpenAI client.
+
+    The client keeps an HTTP connection pool, so it is created once per process.
+    Setting OPENAI_BASE_URL points it at any chat-completions compatible server,
+    such as the bundled stand-in (python -m app.llm_stub).
+    """
+    from openai import OpenAI
+    return OpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        base_url=settings.OPENAI_BASE_URL or None,
+        timeout=settings.OPENAI_TIMEOUT_SECONDS
+    )
+
+
+def create_chat_completion(
+    messages: List[Dict],
+    max_tokens: Optional[int] = None,
+    model: str = DEFAULT_MODEL,
+    operation: str = "chat"
+) -> str:
+    """Run a JSON-mode chat completion and return the message content
+
+    operation labels the call's latency and token metrics (e.g. "daily_workout").
+    """
+    client = get_openai_client()
+
+    kwargs = {}
+    if max_tokens:
+        kwargs["max_tokens"] = max_tokens
+
+    start = perf_counter()
+    outcome = "error"
+    try:
+        response = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            response_format={"type": "json_object"},
+            **kwargs
+        )
+        outcome = "ok"
+    finally:
+        LLM_REQUEST_SECONDS.labels(operation, model, outcome).observe(perf_counter() - start)
+
+    if response.usage:
+        LLM_TOKENS.labels(operation, model, "prompt").inc(response.usage.prompt_tokens or 0)
+        LLM_TOKENS.labels(operation, model, "completion").inc(response.usage.completion_tokens or 0)
+
+    return response.choices[0].message.content
@@ -0,0 +1,263 @@
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+import httpx
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import settings
+from app.services.program_snapshots import invalidate_program_snapshots
+
+CHUNK_SIZE = 64 * 1024
+TOUCH_INTERVAL = timedelta(hours=1)  # last_accessed_at resolution; LRU doesn't need more
+
+MEDIA_COLUMNS = {
+    "image": ("image_url", "image_sha256"),
+    "video": ("video_url", "video_sha256"),
+}
+
+
+class MediaTooLarge(Exception):
+    pass
+
+
+class MediaStore:
+    """Content-addressed files under a root directory: <root>/ab/cd/<sha256>"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path_for(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def exists(self, sha256: str) -> bool:
+        return os.path.exists(self.path_for(sha256))
+
+    def _commit_temp(self, temp_path: str, sha256: str) -> str:
+        path = self.path_for(sha256)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.unlink(temp_path)  # same content already stored
+        else:
+            os.replace(temp_path, path)
+        return path
+
+    def _temp_file(self):
+        os.makedirs(self.root, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=self.root, prefix=".incoming-", delete=False)
+
+    def put_bytes(self, data: bytes) -> Tuple[str, int]:
+        sha256 = hashlib.sha256(data).hexdigest()
+        if not self.exists(sha256):
+            with self._temp_file() as temp:
+                temp.write(data)
+            self._commit_temp(temp.name, sha256)
+        return sha256, len(data)
+
+    async def download(self, client: httpx.AsyncClient, url: str, max_bytes: int) -> Tuple[str, int, str]:
+        """Stream url into the store, hashing on the way. Returns (sha256, size, content type)"""
+        digest = hashlib.sha256()
+        size = 0
+        temp = self._temp_file()
+        try:
+            async with client.stream("GET", url) as response:
+                response.raise_for_status()
+                content_type = response.headers.get("content-type", "application/octet-stream").split(";")[0]
+                async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise MediaTooLarge(f"{url} exceeds {max_bytes} bytes")
+                    digest.update(chunk)
+                    temp.write(chunk)
+            temp.close()
+            sha256 = digest.hexdigest()
+            self._commit_temp(temp.name, sha256)
+            return sha256, size, content_type
+        except BaseException:
+            temp.close()
+            os.unlink(temp.name)
+            raise
+
+    def read(self, sha256: str) -> bytes:
+        with open(self.path_for(sha256), "rb") as f:
+            return f.read()
+
+    def delete(self, sha256: str):
+        try:
+            os.unlink(self.path_for(sha256))
+        except FileNotFoundError:
+            pass
+
+
+def get_media_store() -> MediaStore:
+    return MediaStore(settings.MEDIA_ROOT)
+
+
+def make_thumbnail(data: bytes, max_size: int) -> Optional[bytes]:
+    """JPEG thumbnail of an image, or None when Pillow is not installed or the image can't be read"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.thumbnail((max_size, max_size))
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            output = io.BytesIO()
+            image.save(output, format="JPEG", quality=85, optimize=True)
+            return output.getvalue()
+    except Exception:
+        return None
+
+
+def register_asset(db: Session, sha256: str, content_type: str, size: int, kind: str,
+                   source_url: Optional[str] = None) -> models.MediaAsset:
+    """Record a stored file, or refresh its access time if already known. Caller commits."""
+    asset = db.get(models.MediaAsset, sha256)
+    now = datetime.now(timezone.utc)
+    if asset is None:
+        asset = models.MediaAsset(
+            sha256=sha256, content_type=content_type, size_bytes=size,
+            kind=kind, source_url=source_url, last_accessed_at=now
+        )
+        db.add(asset)
+    else:
+        asset.last_accessed_at = now
+    return asset
+
+
+def touch_asset(db: Session, asset: models.MediaAsset):
+    """Bump the LRU timestamp, at most once per TOUCH_INTERVAL so reads rarely write"""
+    now = datetime.now(timezone.utc)
+    last = asset.last_accessed_at
+    if last is not None and last.tzinfo is None:
+        last = last.replace(tzinfo=timezone.utc)
+    if last is None or now - last > TOUCH_INTERVAL:
+        asset.last_accessed_at = now
+        db.commit()
+
+
+def evict_media(db: Session, store: MediaStore, max_bytes: Optional[int] = None) -> int:
+    """Delete least recently used files until the store fits in max_bytes. Commits.
+
+    Exercises pointing at an evicted file fall back to their upstream URL
+    until the next import caches it again. Returns the number of files removed.
+    """
+    max_bytes = settings.MEDIA_MAX_BYTES if max_bytes is None else max_bytes
+    total = db.query(func.coalesce(func.sum(models.MediaAsset.size_bytes), 0)).scalar()
+    if total <= max_bytes:
+        return 0
+
+    evicted = []
+    for asset in db.query(models.MediaAsset).order_by(models.MediaAsset.last_accessed_at, models.MediaAsset.sha256):
+        if total <= max_bytes:
+            break
+        evicted.append(asset.sha256)
+        total -= asset.size_bytes
+
+    columns = [getattr(models.Exercise, column) for column in ("image_sha256", "thumbnail_sha256", "video_sha256")]
+    affected = db.query(models.Exercise.id).filter(or_(*[column.in_(evicted) for column in columns]))
+    invalidate_program_snapshots(db, [exercise_id for (exercise_id,) in affected])
+    for column in columns:
+        db.query(models.Exercise).filter(
+            column.in_(evicted)
+        ).update({column: None}, synchronize_session=False)
+    db.query(models.MediaAsset).filter(
+        models.MediaAsset.sha256.in_(evicted)
+    ).delete(synchronize_session=False)
+    db.commit()
+
+    # Files go only after the rows, so a crash leaves orphans rather than dangling rows
+    for sha256 in evicted:
+        store.delete(sha256)
+    return len(evicted)
+
+
+async def _cache_one(client, store, semaphore, url: str, kind: str):
+    async with semaphore:
+        sha256, size, content_type = await store.download(client, url, settings.MEDIA_MAX_FILE_BYTES)
+    thumbnail = None
+    if kind == "image":
+        data = await asyncio.to_thread(store.read, sha256)
+        thumbnail_bytes = await asyncio.to_thread(make_thumbnail, data, settings.MEDIA_THUMBNAIL_SIZE)
+        if thumbnail_bytes:
+            thumbnail = store.put_bytes(thumbnail_bytes)
+    return url, kind, sha256, size, content_type, thumbnail
+
+
+async def cache_exercise_media(
+    db: Session,
+    store: Optional[MediaStore] = None,
+    concurrency: int = 4,
+    transport: Optional[httpx.AsyncBaseTransport] = None
+) -> Dict[str, int]:
+    """Download images and videos of catalog exercises that aren't cached yet. Commits.
+
+    Each distinct URL is fetched once; identical files from different URLs
+    are stored once. Failures are counted and retried on the next run.
+    """
+    store = store or get_media_store()
+    counts = {"downloaded": 0, "failed": 0, "evicted": 0}
+
+    exercises = db.query(models.Exercise).filter(
+        models.Exercise.is_archived == False,
+        or_(
+            (models.Exercise.image_url != None) & (models.Exercise.image_sha256 == None),
+            (models.Exercise.video_url != None) & (models.Exercise.video_sha256 == None)
+        )
+    ).all()
+
+    pending = {}
+    for exercise in exercises:
+        for kind, (url_column, sha_column) in MEDIA_COLUMNS.items():
+            url = getattr(exercise, url_column)
+            if url and not getattr(exercise, sha_column):
+                pending.setdefault((url, kind), []).append(exercise)
+    if not pending:
+        return counts
+
+    cached_ids = set()
+    semaphore = asyncio.Semaphore(concurrency)
+    try:
+        async with httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0),
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=concurrency),
+            transport=transport
+        ) as client:
+            tasks = [_cache_one(client, store, semaphore, url, kind) for url, kind in pending]
+            for task in asyncio.as_completed(tasks):
+                try:
+                    url, kind, sha256, size, content_type, thumbnail = await task
+                except (httpx.HTTPError, MediaTooLarge, OSError) as e:
+                    print(f"  Media download failed: {e}")
+                    counts["failed"] += 1
+                    continue
+
+                register_asset(db, sha256, content_type, size, kind, source_url=url)
+                if thumbnail:
+                    register_asset(db, thumbnail[0], "image/jpeg", thumbnail[1], "thumbnail")
+                for exercise in pending[(url, kind)]:
+                    setattr(exercise, MEDIA_COLUMNS[kind][1], sha256)
+                    if kind == "image":
+                        exercise.thumbnail_sha256 = thumbnail[0] if thumbnail else None
+                    cached_ids.add(exercise.id)
+                db.commit()
+                counts["downloaded"] += 1
+    finally:
+        # Stored program snapshots predate the local URLs; cleared in one
+        # statement for the whole run, also when it is cut short
+        db.rollback()
+        invalidate_program_snapshots(db, cached_ids)
+        db.commit()
+
+    counts["evicted"] = evict_media(db, store)
+    return counts
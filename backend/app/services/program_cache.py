@@ -0,0 +1,93 @@
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+from typing import AbstractSet, Any, Hashable, Optional, Sequence
+from app.config import settings
+from app.metrics import CACHE_HITS, CACHE_MISSES
+from app.services import program_engine
+from app.taxonomy import canonicalize_equipment
+
+
+class CatalogCache:
+    """Thread-safe LRU of values derived from the exercise catalog.
+
+    Keys start with the catalog version; when a newer version is seen the
+    whole cache is dropped, since every entry references exercise ids.
+    """
+
+    def __init__(self, max_entries: int, name: Optional[str] = None):
+        self.max_entries = max_entries
+        self.name = name  # label of the hit/miss metrics, if any
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = Lock()
+        self._catalog_version = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[Any]:
+        with self._lock:
+            self._check_version(key[0])
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                if self.name:
+                    CACHE_MISSES.labels(self.name).inc()
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if self.name:
+                CACHE_HITS.labels(self.name).inc()
+            return value
+
+    def put(self, key: tuple, value: Any):
+        with self._lock:
+            self._check_version(key[0])
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._catalog_version = None
+
+    def _check_version(self, catalog_version: int):
+        if self._catalog_version is None or catalog_version > self._catalog_version:
+            self._entries.clear()
+            self._catalog_version = catalog_version
+
+
+def catalog_source(equipment: Optional[Sequence[str]], eligible_ids: Optional[AbstractSet[int]] = None) -> tuple:
+    """Which exercises the engine was given: a gym profile's eligible ids, or an equipment filter"""
+    if eligible_ids is not None:
+        digest = hashlib.blake2b(",".join(map(str, sorted(eligible_ids))).encode(), digest_size=16).hexdigest()
+        return ("eligible", digest)
+    if equipment is None:
+        return ("equipment", None)
+    return ("equipment", tuple(sorted(canonicalize_equipment(equipment))))
+
+
+def skeleton_key(
+    catalog_version: int,
+    fitness_level: str,
+    equipment: Optional[Sequence[str]],
+    days_per_week: int,
+    duration_weeks: int,
+    fitness_goals: Sequence[str],
+    time_per_session_minutes: int,
+    eligible_ids: Optional[AbstractSet[int]] = None
+) -> tuple:
+    """Normalized cache key: only the inputs the engine actually reads"""
+    return (
+        catalog_version,
+        fitness_level,
+        catalog_source(equipment, eligible_ids),
+        days_per_week,
+        duration_weeks,
+        program_engine.primary_goal(fitness_goals),
+        time_per_session_minutes
+    )
+
+
+skeleton_cache = CatalogCache(settings.PROGRAM_SKELETON_CACHE_SIZE, "program_skeletons")
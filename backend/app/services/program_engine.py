@@ -0,0 +1,395 @@
+"""
+Rule-based training program engine
+
+Builds multi-week programs and single sessions from the exercise catalog
+without an LLM. The output uses the same structure as the AI responses
+(weeks -> workouts -> exercises) but references exercises by id.
+
+Scheduling rules:
+- Split chosen from days_per_week and fitness level (full body, upper/lower, push/pull/legs)
+- Training days spread over the week; muscles trained within the recovery
+  window are avoided when picking accessory exercises
+- 4-week mesocycles: three loading weeks followed by a deload week
+- Rep ranges, sets and rest driven by the primary goal and progress per block
+- Main lifts stay fixed for progression; accessories rotate between mesocycles
+"""
+from typing import Dict, List, Optional, Sequence
+from app.taxonomy import canonical_muscle
+
+# Map user fitness levels onto the exercise difficulty scale
+LEVEL_TO_DIFFICULTY = {
+    "complete_beginner": "beginner",
+    "beginner": "beginner",
+    "novice": "beginner",
+    "intermediate": "intermediate",
+    "advanced": "advanced",
+    "expert": "advanced",
+}
+
+DIFFICULTY_RANK = {"beginner": 0, "intermediate": 1, "advanced": 2}
+
+MOVEMENT_PATTERNS = {
+    "push": {"chest", "shoulders", "triceps"},
+    "pull": {"back", "biceps", "forearms", "lower back"},
+    "legs": {"quadriceps", "hamstrings", "glutes", "calves"},
+}
+
+# Target muscle per exercise slot, in the order exercises are performed
+SESSION_TEMPLATES = {
+    "full_body": ["quadriceps", "chest", "back", "hamstrings", "shoulders", "abs", "biceps", "triceps"],
+    "upper": ["chest", "back", "shoulders", "back", "triceps", "biceps", "chest", "abs"],
+    "lower": ["quadriceps", "hamstrings", "glutes", "calves", "quadriceps", "abs", "lower back", "hamstrings"],
+    "push": ["chest", "shoulders", "chest", "triceps", "shoulders", "triceps", "abs", "chest"],
+    "pull": ["back", "back", "biceps", "lower back", "back", "biceps", "forearms", "abs"],
+    "legs": ["quadriceps", "hamstrings", "glutes", "calves", "quadriceps", "abs", "hamstrings", "calves"],
+    "conditioning": ["cardiovascular", "abs", "full body", "cardiovascular", "abs", "calves"],
+}
+
+SESSION_NAMES = {
+    "full_body": "Full Body",
+    "upper": "Upper Body",
+    "lower": "Lower Body",
+    "push": "Push",
+    "pull": "Pull",
+    "legs": "Legs",
+    "conditioning": "Conditioning & Core",
+}
+
+# Day offsets (0 = first day of the week) that keep rest days between sessions
+TRAINING_DAY_OFFSETS = {
+    1: [0],
+    2: [0, 3],
+    3: [0, 2, 4],
+    4: [0, 1, 3, 4],
+    5: [0, 1, 2, 4, 5],
+    6: [0, 1, 2, 3, 4, 5],
+    7: [0, 1, 2, 3, 4, 5, 6],
+}
+
+# Rep ranges per mesocycle block, rest seconds and base sets for each goal
+GOAL_PRESCRIPTIONS = {
+    "strength": {"reps": ["8-10", "6-8", "4-6", "3-5"], "rest": 150, "sets": 4},
+    "muscle_gain": {"reps": ["12-15", "10-12", "8-10", "6-8"], "rest": 90, "sets": 3},
+    "endurance": {"reps": ["15-20", "12-15", "12-15", "10-12"], "rest": 45, "sets": 3},
+    "weight_loss": {"reps": ["15-20", "12-15", "12-15", "10-12"], "rest": 45, "sets": 3},
+    "general_fitness": {"reps": ["12-15", "10-12", "8-10", "8-10"], "rest": 75, "sets": 3},
+}
+
+GOAL_PRIORITY = ["strength", "muscle_gain", "endurance", "weight_loss", "general_fitness"]
+
+BLOCK_THEMES = ["Foundation", "Build", "Strength", "Peak"]
+
+MESOCYCLE_WEEKS = 4
+CANDIDATE_WINDOW = 4
+
+
+def difficulty_for_level(fitness_level: str) -> str:
+    return LEVEL_TO_DIFFICULTY.get(fitness_level, "beginner")
+
+
+def eligible_difficulties(fitness_level: str) -> List[str]:
+    """Exercise difficulties a user at this level can be programmed with"""
+    rank = DIFFICULTY_RANK[difficulty_for_level(fitness_level)]
+    return [d for d, r in DIFFICULTY_RANK.items() if r <= rank]
+
+
+def training_day_offsets(days_per_week: int) -> List[int]:
+    """Day-of-week offsets for each training day of a program week"""
+    return TRAINING_DAY_OFFSETS[max(1, min(days_per_week, 7))]
+
+
+def normalize_muscle(name: str) -> str:
+    return canonical_muscle(name)
+
+
+def choose_split(days_per_week: int, fitness_level: str) -> List[str]:
+    """Session type for each training day of the week"""
+    beginner = difficulty_for_level(fitness_level) == "beginner"
+
+    if days_per_week <= 3:
+        if days_per_week == 3 and not beginner:
+            return ["push", "pull", "legs"]
+        return ["full_body"] * days_per_week
+    if days_per_week == 4:
+        return ["upper", "lower", "upper", "lower"]
+    if days_per_week == 5:
+        return ["push", "pull", "legs", "upper", "lower"]
+    if days_per_week == 6:
+        return ["push", "pull", "legs", "push", "pull", "legs"]
+    return ["push", "pull", "legs", "push", "pull", "legs", "conditioning"]
+
+
+def primary_goal(fitness_goals: Sequence[str]) -> str:
+    for goal in GOAL_PRIORITY:
+        if goal in fitness_goals:
+            return goal
+    return "general_fitness"
+
+
+def exercises_per_session(time_per_session_minutes: int) -> int:
+    return max(3, min(8, time_per_session_minutes // 10))
+
+
+class _CatalogIndex:
+    """Catalog pre-bucketed by muscle and pre-sorted by static score.
+
+    Muscles are encoded as bits so recovery and overlap checks are single
+    integer operations instead of set comparisons per candidate.
+    """
+
+    def __init__(self, exercises: Sequence, fitness_level: str, goal: str):
+        self.bits: Dict[str, int] = {}
+        self.masks: Dict[int, int] = {}
+        self.buckets: Dict[str, List[int]] = {}
+        self.by_id: Dict[int, object] = {}
+
+        target_rank = DIFFICULTY_RANK[difficulty_for_level(fitness_level)]
+        wants_cardio = goal in ("endurance", "weight_loss")
+        scored: Dict[str, List[tuple]] = {}
+
+        for ex in exercises:
+            muscles = [normalize_muscle(m) for m in (ex.muscle_groups or [])]
+            if not muscles:
+                continue
+
+            mask = 0
+            for muscle in muscles:
+                if muscle not in self.bits:
+                    self.bits[muscle] = 1 << len(self.bits)
+                mask |= self.bits[muscle]
+
+            self.masks[ex.id] = mask
+            self.by_id[ex.id] = ex
+
+            # Static score: compound movements and matching difficulty rank higher
+            base = min(len(muscles), 3) * 0.5
+            base -= abs(DIFFICULTY_RANK.get(ex.difficulty, 0) - target_rank) * 0.75
+            if ex.category == "cardio":
+                base += 1.0 if wants_cardio else -0.5
+
+            for position, muscle in enumerate(muscles):
+                score = base + (3.0 if position == 0 else 1.0)
+                scored.setdefault(muscle, []).append((-score, ex.id))
+
+        for muscle, entries in scored.items():
+            entries.sort()
+            self.buckets[muscle] = [ex_id for _, ex_id in entries]
+
+    def mask_for(self, muscles) -> int:
+        mask = 0
+        for muscle in muscles:
+            mask |= self.bits.get(muscle, 0)
+        return mask
+
+
+def _pick_session(
+    index: _CatalogIndex,
+    session_type: str,
+    slot_count: int,
+    rotation: int,
+    fatigued_mask: int,
+    goal: str
+) -> List[int]:
+    """Pick exercise ids for one session"""
+    slots = list(SESSION_TEMPLATES[session_type][:slot_count])
+    if goal in ("endurance", "weight_loss") and session_type != "conditioning" and slot_count >= 4:
+        slots[-1] = "cardiovascular"
+
+    chosen: List[int] = []
+    used = set()
+
+    for slot_number, muscle in enumerate(slots):
+        bucket = index.buckets.get(muscle, [])
+        candidates = [ex_id for ex_id in bucket if ex_id not in used]
+
+        # Accessory slots avoid muscles still recovering from earlier sessions
+        if slot_number >= 2 and fatigued_mask:
+            rested = [ex_id for ex_id in candidates if not index.masks[ex_id] & fatigued_mask & ~index.bits.get(muscle, 0)]
+            candidates = rested or candidates
+
+        if not candidates:
+            pattern = MOVEMENT_PATTERNS.get(session_type, set())
+            pattern_mask = index.mask_for(pattern)
+            candidates = [
+                ex_id for ex_id, mask in index.masks.items()
+                if ex_id not in used and (not pattern_mask or mask & pattern_mask)
+            ]
+            if not candidates:
+                continue
+
+        # Main lifts stay fixed so load can progress; accessories rotate for variation
+        window = candidates[:CANDIDATE_WINDOW] if slot_number >= 2 else candidates[:1]
+        ex_id = window[rotation % len(window)]
+        chosen.append(ex_id)
+        used.add(ex_id)
+
+    return chosen
+
+
+def _prescription(goal: str, block: int, week_in_block: int, slot_number: int, deload: bool, beginner: bool) -> Dict:
+    plan = GOAL_PRESCRIPTIONS[goal]
+    rep_ranges = plan["reps"]
+    reps = rep_ranges[min(block, len(rep_ranges) - 1)]
+    sets = plan["sets"]
+    rest = plan["rest"]
+    intensity = "working"
+
+    if slot_number >= 2:
+        # Accessories: lighter, a little more volume, shorter rest
+        low, high = (int(x) for x in reps.split("-"))
+        if high < 15:
+            reps = f"{low + 2}-{high + 2}"
+        rest = max(30, rest - 30)
+        sets = min(sets, 3)
+
+    if deload:
+        sets = max(2, sets - 1)
+        reps = rep_ranges[max(0, min(block, len(rep_ranges) - 1) - 1)] if slot_number < 2 else reps
+        intensity = "deload"
+    elif week_in_block == 3 and not beginner:
+        sets += 1
+        if slot_number < 2:
+            intensity = "heavy"
+
+    return {"sets": sets, "reps": [reps], "rest_seconds": rest, "intensity_level": intensity}
+
+
+def _focus_areas(index: _CatalogIndex, exercise_ids: List[int]) -> List[str]:
+    focus = []
+    for ex_id in exercise_ids:
+        muscles = index.by_id[ex_id].muscle_groups or []
+        if muscles:
+            muscle = normalize_muscle(muscles[0])
+            if muscle not in focus:
+                focus.append(muscle)
+    return focus
+
+
+def generate_multi_week_program(
+    exercises: Sequence,
+    fitness_level: str,
+    fitness_goals: Sequence[str],
+    duration_weeks: int,
+    days_per_week: int,
+    time_per_session_minutes: int = 60
+) -> Dict:
+    """Generate a periodized multi-week program skeleton"""
+    goal = primary_goal(fitness_goals)
+    beginner = difficulty_for_level(fitness_level) == "beginner"
+    recovery_hours = 72 if beginner else 48
+    split = choose_split(days_per_week, fitness_level)
+    offsets = training_day_offsets(days_per_week)
+    slot_count = exercises_per_session(time_per_session_minutes)
+    index = _CatalogIndex(exercises, fitness_level, goal)
+
+    # Exercise selection is fixed per mesocycle block; weeks only change the prescription
+    block_sessions: Dict[int, List[List[int]]] = {}
+
+    def sessions_for_block(block: int) -> List[List[int]]:
+        if block not in block_sessions:
+            sessions = []
+            last_trained: Dict[int, int] = {}
+            for day_number, session_type in enumerate(split):
+                hour = offsets[day_number] * 24
+                fatigued = 0
+                for bit, trained_hour in last_trained.items():
+                    if hour - trained_hour < recovery_hours:
+                        fatigued |= bit
+                # Repeated session types in the same week (e.g. push twice) rotate to different exercises
+                rotation = block + day_number // len(set(split))
+                picked = _pick_session(index, session_type, slot_count, rotation, fatigued, goal)
+                for ex_id in picked:
+                    mask = index.masks[ex_id]
+                    while mask:
+                        bit = mask & -mask
+                        last_trained[bit] = hour
+                        mask ^= bit
+                sessions.append(picked)
+            block_sessions[block] = sessions
+        return block_sessions[block]
+
+    weeks = []
+    for week_number in range(1, duration_weeks + 1):
+        block = (week_number - 1) // MESOCYCLE_WEEKS
+        week_in_block = (week_number - 1) % MESOCYCLE_WEEKS + 1
+        deload = week_in_block == MESOCYCLE_WEEKS
+        theme = BLOCK_THEMES[min(block, len(BLOCK_THEMES) - 1)]
+
+        workouts = []
+        for day_number, exercise_ids in enumerate(sessions_for_block(block), start=1):
+            session_type = split[day_number - 1]
+            workouts.append({
+                "day_number": day_number,
+                "workout_name": f"{SESSION_NAMES[session_type]} {'Deload' if deload else theme}",
+                "focus_areas": _focus_areas(index, exercise_ids) or [session_type],
+                "estimated_duration_minutes": time_per_session_minutes,
+                "notes": "Reduced volume to recover and consolidate gains" if deload else None,
+                "exercises": [
+                    {
+                        "exercise_id": ex_id,
+                        **_prescription(goal, block, week_in_block, slot_number, deload, beginner),
+                        "notes": None
+                    }
+                    for slot_number, ex_id in enumerate(exercise_ids)
+                ]
+            })
+
+        weeks.append({
+            "week_number": week_number,
+            "theme": "Deload week" if deload else f"{theme} - week {week_in_block}",
+            "notes": (
+                "Deload: drop a set per exercise and keep loads around 60-70%"
+                if deload else
+                f"{theme} block: {GOAL_PRESCRIPTIONS[goal]['reps'][min(block, 3)]} reps on main lifts, add load when all sets are completed"
+            ),
+            "workouts": workouts
+        })
+
+    split_label = " / ".join(dict.fromkeys(SESSION_NAMES[s] for s in split))
+    return {
+        "program_name": f"{duration_weeks}-Week {fitness_level.replace('_', ' ').title()} {goal.replace('_', ' ').title()} Program",
+        "program_description": f"{days_per_week} sessions per week ({split_label}) organised in {MESOCYCLE_WEEKS}-week blocks.",
+        "program_rationale": (
+            f"Rule-based {split_label} split for {goal.replace('_', ' ')}. Training days are spaced to give each "
+            f"muscle group {recovery_hours}h of recovery, push/pull/leg volume is balanced across the week, "
+            f"and every {MESOCYCLE_WEEKS}th week is a deload before progressing to the next block."
+        ),
+        "weeks": weeks
+    }
+
+
+def generate_daily_workout(
+    exercises: Sequence,
+    fitness_level: str,
+    fitness_goals: Sequence[str],
+    time_per_session_minutes: int = 60,
+    recent_muscles: Optional[Sequence[str]] = None
+) -> Dict:
+    """Generate a single session, avoiding muscles trained in the last few days"""
+    goal = primary_goal(fitness_goals)
+    index = _CatalogIndex(exercises, fitness_level, goal)
+    recent = {normalize_muscle(m) for m in (recent_muscles or [])}
+
+    # Pick the session type with the least overlap with recently trained muscles
+    session_type = "full_body"
+    if recent:
+        session_type = min(("legs", "push", "pull"), key=lambda kind: len(recent & MOVEMENT_PATTERNS[kind]))
+
+    exercise_ids = _pick_session(
+        index, session_type, exercises_per_session(time_per_session_minutes), 0, index.mask_for(recent), goal
+    )
+
+    return {
+        "workout_name": f"{SESSION_NAMES[session_type]} Session",
+        "focus_areas": _focus_areas(index, exercise_ids) or [session_type],
+        "estimated_duration_minutes": time_per_session_minutes,
+        "rationale": f"Rule-based {SESSION_NAMES[session_type].lower()} session chosen to avoid recently trained muscles.",
+        "exercises": [
+            {
+                "exercise_id": ex_id,
+                **_prescription(goal, 1, 1, slot_number, False, True),
+                "notes": None
+            }
+            for slot_number, ex_id in enumerate(exercise_ids)
+        ]
+    }
@@ -0,0 +1,104 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app import models
+from app.services.program_engine import training_day_offsets
+
+
+def is_valid_timezone(name: str) -> bool:
+    try:
+        ZoneInfo(name)
+        return True
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+
+
+def user_timezone(user: models.User):
+    if user.timezone and is_valid_timezone(user.timezone):
+        return ZoneInfo(user.timezone)
+    return timezone.utc
+
+
+def user_today(user: models.User) -> date:
+    """Today's calendar date where the user is"""
+    return datetime.now(user_timezone(user)).date()
+
+
+def to_user_date(user: models.User, moment: datetime) -> date:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)  # stored timestamps are UTC
+    return moment.astimezone(user_timezone(user)).date()
+
+
+def clear_schedule(db: Session, user_id: int, training_program_id: Optional[int] = None):
+    query = db.query(models.AIProgramScheduleEntry).filter(
+        models.AIProgramScheduleEntry.user_id == user_id
+    )
+    if training_program_id is not None:
+        query = query.filter(models.AIProgramScheduleEntry.training_program_id == training_program_id)
+    query.delete(synchronize_session=False)
+
+
+def build_program_schedule(db: Session, program: models.AITrainingProgram, start_date: date) -> int:
+    """Materialize one row per calendar day of a multi-week program.
+
+    Training days are spread over each week with the rule engine's day
+    offsets; all other days become rest-day rows. Returns the row count.
+    The caller commits.
+    """
+    clear_schedule(db, program.user_id)
+
+    workouts = db.query(
+        models.AIWeeklyPlan.week_number,
+        models.AIDailyWorkout.day_number,
+        models.AIDailyWorkout.id
+    ).join(
+        models.AIDailyWorkout, models.AIDailyWorkout.weekly_plan_id == models.AIWeeklyPlan.id
+    ).filter(
+        models.AIWeeklyPlan.training_program_id == program.id
+    ).order_by(models.AIWeeklyPlan.week_number, models.AIDailyWorkout.day_number).all()
+
+    weeks: Dict[int, List[Tuple[int, int]]] = {}
+    for week_number, day_number, workout_id in workouts:
+        weeks.setdefault(week_number, []).append((day_number, workout_id))
+
+    duration_weeks = max([program.duration_weeks or 0] + list(weeks))
+    rows = []
+    for week_number in range(1, duration_weeks + 1):
+        sessions = weeks.get(week_number, [])
+        # Lay out the sessions the week actually has, even if it differs from days_per_week
+        offsets = training_day_offsets(len(sessions)) if sessions else []
+        by_offset = dict(zip(offsets, sessions))
+
+        for offset in range(7):
+            session = by_offset.get(offset)
+            rows.append({
+                "user_id": program.user_id,
+                "training_program_id": program.id,
+                "daily_workout_id": session[1] if session else None,
+                "scheduled_date": start_date + timedelta(days=(week_number - 1) * 7 + offset),
+                "week_number": week_number,
+                "day_number": session[0] if session else None
+            })
+
+    if rows:
+        db.execute(insert(models.AIProgramScheduleEntry), rows)
+    return len(rows)
+
+
+def rebuild_active_schedule(db: Session, user: models.User) -> int:
+    """Re-lay the active program's schedule from its start date in the user's current timezone.
+
+    Scheduled dates are local calendar dates, so they shift when the user's
+    timezone changes. Returns the row count. The caller commits.
+    """
+    program = db.query(models.AITrainingProgram).filter(
+        models.AITrainingProgram.user_id == user.id,
+        models.AITrainingProgram.status == "active",
+        models.AITrainingProgram.program_type == "multi_week"
+    ).first()
+    if program is None or program.started_at is None:
+        return 0
+    return build_program_schedule(db, program, to_user_date(user, program.started_at))
@@ -0,0 +1,77 @@
+from typing import Iterable, List, Optional, Tuple
+from fastapi import Response
+from sqlalchemy.orm import Session, selectinload
+from app import models, schemas
+
+# One query per level (program, weeks, days, exercises, exercise) instead of a
+# single joined query whose row count is the product of all collections
+PROGRAM_DETAIL_OPTIONS = (
+    selectinload(models.AITrainingProgram.weekly_plans)
+    .selectinload(models.AIWeeklyPlan.daily_workouts)
+    .selectinload(models.AIDailyWorkout.exercises)
+    .selectinload(models.AIDailyWorkoutExercise.exercise),
+)
+
+
+def render_program_snapshot(program: models.AITrainingProgram) -> str:
+    """Serialize a fully loaded program exactly as the API returns it"""
+    return schemas.AITrainingProgramResponse.model_validate(program).model_dump_json()
+
+
+def store_program_snapshot(db: Session, program_id: int) -> str:
+    """Rebuild the snapshot from the normalized tables and save it on the program row"""
+    program = db.query(models.AITrainingProgram).options(
+        *PROGRAM_DETAIL_OPTIONS
+    ).filter(models.AITrainingProgram.id == program_id).one()
+
+    snapshot = render_program_snapshot(program)
+    program.snapshot_json = snapshot
+    db.commit()
+    return snapshot
+
+
+def get_program_snapshots(db: Session, rows: List[Tuple[int, Optional[str]]]) -> List[str]:
+    """Resolve (id, snapshot_json) rows, rendering and saving any missing snapshots"""
+    missing = [program_id for program_id, snapshot in rows if snapshot is None]
+
+    rendered = {}
+    if missing:
+        programs = db.query(models.AITrainingProgram).options(
+            *PROGRAM_DETAIL_OPTIONS
+        ).filter(models.AITrainingProgram.id.in_(missing)).all()
+
+        for program in programs:
+            program.snapshot_json = render_program_snapshot(program)
+            rendered[program.id] = program.snapshot_json
+        db.commit()
+
+    return [snapshot if snapshot is not None else rendered[program_id] for program_id, snapshot in rows]
+
+
+def invalidate_program_snapshots(db: Session, exercise_ids: Iterable[int]) -> int:
+    """Drop the stored snapshots of programs using any of these exercises. Caller commits.
+
+    Snapshots embed each exercise as it was when rendered, so they go stale
+    when an exercise changes; they are rendered again on the next read.
+    Returns the number of programs affected.
+    """
+    exercise_ids = list(exercise_ids)
+    if not exercise_ids:
+        return 0
+
+    program_ids = db.query(models.AIDailyWorkout.training_program_id).join(
+        models.AIDailyWorkoutExercise,
+        models.AIDailyWorkoutExercise.daily_workout_id == models.AIDailyWorkout.id
+    ).filter(
+        models.AIDailyWorkoutExercise.exercise_id.in_(exercise_ids)
+    ).scalar_subquery()
+
+    return db.query(models.AITrainingProgram).filter(
+        models.AITrainingProgram.id.in_(program_ids),
+        models.AITrainingProgram.snapshot_json != None
+    ).update({"snapshot_json": None}, synchronize_session=False)
+
+
+def json_response(content: str) -> Response:
+    """Return pre-rendered JSON without going through response_model validation"""
+    return Response(content=content, media_type="application/json")
@@ -0,0 +1,187 @@
+"""
+Slow-query log
+
+Statements slower than SLOW_QUERY_MS are recorded with their shape, redacted
+parameters, duration and the route and endpoint function that ran them.
+On PostgreSQL a sample of slow SELECTs is re-run in the background under
+EXPLAIN (ANALYZE, BUFFERS) in a read-only transaction, so the plan shows
+where the time goes. Entries are aggregated per statement shape in memory
+(per process, see /api/admin/slow-queries) and optionally appended to
+SLOW_QUERY_LOG_FILE as JSON lines.
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_REFRESH_SECONDS = 600  # re-explain a shape at most this often
+_SELECT = re.compile(r"^\s*(\(\s*)*(SELECT|WITH)\b", re.IGNORECASE)
+_DATA_MODIFYING = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+
+
+def redact_value(value: Any) -> Any:
+    """Keep what helps reading a plan (types, numbers, sizes), drop anything user-provided"""
+    if value is None or isinstance(value, (bool, int, float, Decimal)):
+        return value if not isinstance(value, Decimal) else float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, str):
+        return f"<str:{len(value)}>"
+    if isinstance(value, (bytes, bytearray)):
+        return f"<bytes:{len(value)}>"
+    if isinstance(value, (list, tuple)):
+        items = [redact_value(item) for item in value[:5]]
+        return items + [f"<+{len(value) - 5} more>"] if len(value) > 5 else items
+    return f"<{type(value).__name__}>"
+
+
+def redact_parameters(parameters: Any) -> Any:
+    if isinstance(parameters, dict):
+        return {key: redact_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact_value(value) for value in parameters]
+    return redact_value(parameters)
+
+
+class SlowQueryLog:
+    """Per-shape aggregates of slow statements, least recently seen evicted first"""
+
+    def __init__(self, max_shapes: int):
+        self.max_shapes = max_shapes
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, shape: str, seconds: float, parameters: Any, route: str, endpoint: Optional[str]) -> Dict:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(shape)
+            if entry is None:
+                entry = {
+                    "statement": shape, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "routes": {}, "explain": None, "explained_at": None
+                }
+                self._entries[shape] = entry
+            self._entries.move_to_end(shape)
+            while len(self._entries) > self.max_shapes:
+                self._entries.popitem(last=False)
+
+            duration_ms = round(seconds * 1000, 2)
+            entry["count"] += 1
+            entry["total_ms"] = round(entry["total_ms"] + duration_ms, 2)
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["last_ms"] = duration_ms
+            entry["last_parameters"] = parameters
+            entry["last_seen"] = now
+            origin = f"{route} ({endpoint})" if endpoint else route
+            entry["routes"][origin] = entry["routes"].get(origin, 0) + 1
+            return entry
+
+    def set_plan(self, shape: str, plan: Any):
+        with self._lock:
+            entry = self._entries.get(shape)
+            if entry is not None:
+                entry["explain"] = plan
+                entry["explained_at"] = time.time()
+
+    def should_explain(self, shape: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(shape)
+            if entry is None:
+                return False
+            explained_at = entry["explained_at"] or entry.get("explain_pending")
+            if explained_at and time.time() - explained_at < EXPLAIN_REFRESH_SECONDS:
+                return False
+            entry["explain_pending"] = time.time()
+            return True
+
+    def entries(self) -> List[Dict]:
+        """Snapshots, slowest in total first"""
+        with self._lock:
+            snapshot = [dict(entry, routes=dict(entry["routes"])) for entry in self._entries.values()]
+        for entry in snapshot:
+            entry.pop("explain_pending", None)
+        return sorted(snapshot, key=lambda entry: entry["total_ms"], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog(settings.SLOW_QUERY_LOG_SIZE)
+
+_explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wrxs-explain")
+_explaining = threading.local()
+_file_lock = threading.Lock()
+
+
+def _append_to_file(record: Dict):
+    if not settings.SLOW_QUERY_LOG_FILE:
+        return
+    with _file_lock, open(settings.SLOW_QUERY_LOG_FILE, "a") as f:
+        f.write(json.dumps(record, default=str) + "\n")
+
+
+def _explain(engine, shape: str, statement: str, parameters: Any):
+    """EXPLAIN ANALYZE a SELECT on its own connection, never committing anything"""
+    _explaining.active = True
+    try:
+        with engine.connect() as connection:
+            with connection.begin() as transaction:
+                connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+                connection.exec_driver_sql(
+                    f"SET LOCAL statement_timeout = {int(settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS)}"
+                )
+                result = connection.exec_driver_sql(
+                    "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters
+                )
+                plan = result.scalar()
+                transaction.rollback()
+        slow_query_log.set_plan(shape, plan)
+        _append_to_file({"type": "explain", "statement": shape, "plan": plan, "at": time.time()})
+    except Exception as e:
+        slow_query_log.set_plan(shape, {"error": str(e)})
+    finally:
+        _explaining.active = False
+
+
+def _explainable(conn, statement: str, executemany: bool) -> bool:
+    return (
+        conn.engine.dialect.name == "postgresql"
+        and not executemany
+        and bool(_SELECT.match(statement))
+        and not _DATA_MODIFYING.search(statement)
+    )
+
+
+def record_slow_query(conn, statement: str, shape: str, parameters: Any, executemany: bool,
+                      seconds: float, route: str, endpoint: Optional[str]):
+    """Called from the cursor hooks for statements over SLOW_QUERY_MS"""
+    if getattr(_explaining, "active", False):
+        return
+
+    redacted = redact_parameters(parameters) if not executemany else f"<{len(parameters)} rows>"
+    slow_query_log.record(shape, seconds, redacted, route, endpoint)
+    logger.warning("Slow query (%.0f ms) on %s: %s", seconds * 1000, route, shape[:300])
+    _append_to_file({
+        "type": "slow_query", "statement": shape, "duration_ms": round(seconds * 1000, 2),
+        "parameters": redacted, "route": route, "endpoint": endpoint, "at": time.time()
+    })
+
+    if (
+        settings.SLOW_QUERY_EXPLAIN_RATE > 0
+        and _explainable(conn, statement, executemany)
+        and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE
+        and slow_query_log.should_explain(shape)
+    ):
+        _explain_executor.submit(_explain, conn.engine, shape, statement, parameters)
@@ -0,0 +1,170 @@
+"""
+Per-request SQL statistics
+
+Event hooks on the engine (installed in app.database) count statements,
+total DB time and how often each statement shape repeats while a request is
+being handled. SQLInstrumentationMiddleware reports them in a Server-Timing
+header and logs likely N+1 patterns: the same statement shape run many
+times in one request, typically a lazy relationship or a lookup in a loop.
+Statements slower than SLOW_QUERY_MS, inside a request or not, go to the
+slow-query log (app.slow_queries).
+"""
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.slow_queries import record_slow_query
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r"\((\s*(\?|%\([^)]+\)s|%s|:\w+)\s*,)+\s*(\?|%\([^)]+\)s|%s|:\w+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds", "shapes", "scope")
+
+    def __init__(self, scope=None):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+        self.scope = scope  # ASGI scope of the request being handled, if any
+
+    def record(self, shape: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[shape] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes run at least threshold times, most frequent first"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("sql_query_stats", default=None)
+_request_observers: List[Callable[[str, QueryStats], None]] = []
+
+
+def statement_shape(statement: str) -> str:
+    """Statement text with parameter lists collapsed, so "IN (?, ?)" and "IN (?, ?, ?)" match"""
+    return _IN_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries(scope=None) -> Iterator[QueryStats]:
+    """Collect statistics for statements run in this context.
+
+    Nested calls share the outer QueryStats, so several middlewares can
+    read the same numbers for one request.
+    """
+    stats = _current_stats.get()
+    if stats is not None:
+        if stats.scope is None:
+            stats.scope = scope
+        yield stats
+        return
+
+    stats = QueryStats(scope)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def add_request_observer(observer: Callable[[str, QueryStats], None]):
+    """Call observer(route, stats) after every instrumented request (used by the query_budget fixture)"""
+    _request_observers.append(observer)
+
+
+def remove_request_observer(observer: Callable[[str, QueryStats], None]):
+    _request_observers.remove(observer)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    seconds = perf_counter() - started
+    stats = _current_stats.get()
+    slow = seconds * 1000 >= settings.SLOW_QUERY_MS
+    if stats is None and not slow:
+        return
+
+    shape = statement_shape(statement)
+    if stats is not None:
+        stats.record(shape, seconds)
+    if slow:
+        scope = stats.scope if stats is not None else None
+        endpoint = scope.get("endpoint") if scope else None
+        record_slow_query(
+            conn, statement, shape, parameters, executemany, seconds,
+            route=route_label(scope) if scope else "(no request)",
+            endpoint=f"{endpoint.__module__}.{endpoint.__qualname__}" if endpoint else None
+        )
+
+
+def instrument_engine(engine: Engine):
+    """Install the statement hooks; calling it again is a no-op"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def route_label(scope) -> str:
+    """Route template of a handled request ("/api/exercises/{exercise_id}"), or "unmatched" """
+    return getattr(scope.get("route"), "path", None) or "unmatched"
+
+
+class SQLInstrumentationMiddleware:
+    """Pure ASGI middleware: Server-Timing header and N+1 warnings per request"""
+
+    def __init__(self, app, repeat_threshold: Optional[int] = None):
+        self.app = app
+        self.repeat_threshold = repeat_threshold or settings.SQL_REPEAT_WARNING_THRESHOLD
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries(scope) as stats:
+            started = perf_counter()
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    # Durations in milliseconds, shown per request in browser dev tools
+                    timing = (
+                        f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries", '
+                        f"app;dur={(perf_counter() - started) * 1000:.1f}"
+                    )
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"server-timing", timing.encode("latin-1"))]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = route_label(scope)
+                for shape, count in stats.repeated(self.repeat_threshold):
+                    logger.warning(
+                        "Possible N+1 on %s %s: statement ran %d times: %s",
+                        scope["method"], route, count, shape[:300]
+                    )
+                for observer in list(_request_observers):
+                    observer(route, stats)
@@ -0,0 +1,212 @@
+"""
+Canonical muscle and equipment vocabulary
+
+Every muscle and equipment name that enters the database (seed data, wger
+import, user-created exercises, gym profiles) goes through this module, so
+synonyms like "Dumbbell"/"dumbbells" or "Quads"/"quadriceps" end up as one
+canonical name. Each canonical name has a stable integer id; id N is bit
+N - 1 of the muscle_mask / equipment_mask columns. Never renumber ids, only
+append new ones (ids up to 62 fit in a BIGINT mask).
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# (id, canonical name)
+MUSCLES: Tuple[Tuple[int, str], ...] = (
+    (1, "chest"),
+    (2, "back"),
+    (3, "shoulders"),
+    (4, "biceps"),
+    (5, "triceps"),
+    (6, "forearms"),
+    (7, "abs"),
+    (8, "lower back"),
+    (9, "glutes"),
+    (10, "quadriceps"),
+    (11, "hamstrings"),
+    (12, "calves"),
+    (13, "hip flexors"),
+    (14, "adductors"),
+    (15, "abductors"),
+    (16, "neck"),
+    (17, "cardiovascular"),
+    (18, "full body"),
+)
+
+EQUIPMENT: Tuple[Tuple[int, str], ...] = (
+    (1, "barbell"),
+    (2, "dumbbells"),
+    (3, "kettlebell"),
+    (4, "ez bar"),
+    (5, "bench"),
+    (6, "pull-up bar"),
+    (7, "dip bars"),
+    (8, "cable machine"),
+    (9, "leg press machine"),
+    (10, "smith machine"),
+    (11, "mat"),
+    (12, "swiss ball"),
+    (13, "resistance bands"),
+    (14, "jump rope"),
+    (15, "medicine ball"),
+    (16, "treadmill"),
+    (17, "rowing machine"),
+    (18, "stationary bike"),
+    (19, "trap bar"),
+    (20, "foam roller"),
+)
+
+# Normalized spelling -> canonical name. Canonical names map to themselves implicitly.
+MUSCLE_ALIASES: Dict[str, str] = {
+    "pectoralis major": "chest",
+    "pecs": "chest",
+    "serratus anterior": "chest",
+    "lats": "back",
+    "latissimus dorsi": "back",
+    "trapezius": "back",
+    "traps": "back",
+    "upper back": "back",
+    "rhomboids": "back",
+    "deltoid": "shoulders",
+    "deltoids": "shoulders",
+    "anterior deltoid": "shoulders",
+    "delts": "shoulders",
+    "biceps brachii": "biceps",
+    "brachialis": "biceps",
+    "triceps brachii": "triceps",
+    "forearm": "forearms",
+    "quads": "quadriceps",
+    "quadriceps femoris": "quadriceps",
+    "biceps femoris": "hamstrings",
+    "gluteus maximus": "glutes",
+    "gastrocnemius": "calves",
+    "soleus": "calves",
+    "rectus abdominis": "abs",
+    "obliquus externus abdominis": "abs",
+    "obliques": "abs",
+    "core": "abs",
+    "erector spinae": "lower back",
+    "legs": "quadriceps",
+    "cardio": "cardiovascular",
+    "fullbody": "full body",
+}
+
+EQUIPMENT_ALIASES: Dict[str, str] = {
+    "dumbbell": "dumbbells",
+    "ez-bar": "ez bar",
+    "sz-bar": "ez bar",
+    "incline bench": "bench",
+    "flat bench": "bench",
+    "pullup bar": "pull-up bar",
+    "pull up bar": "pull-up bar",
+    "chin-up bar": "pull-up bar",
+    "dip station": "dip bars",
+    "parallel bars": "dip bars",
+    "cable": "cable machine",
+    "cables": "cable machine",
+    "leg press": "leg press machine",
+    "smith": "smith machine",
+    "gym mat": "mat",
+    "yoga mat": "mat",
+    "stability ball": "swiss ball",
+    "exercise ball": "swiss ball",
+    "resistance band": "resistance bands",
+    "bands": "resistance bands",
+    "skipping rope": "jump rope",
+    "rower": "rowing machine",
+    "exercise bike": "stationary bike",
+    "bike": "stationary bike",
+    "hex bar": "trap bar",
+}
+
+# Spellings that mean "no equipment"; they are dropped rather than stored
+BODYWEIGHT_NAMES = {"none", "bodyweight", "body weight", "none (bodyweight exercise)"}
+
+MUSCLE_IDS: Dict[str, int] = {name: muscle_id for muscle_id, name in MUSCLES}
+EQUIPMENT_IDS: Dict[str, int] = {name: equipment_id for equipment_id, name in EQUIPMENT}
+
+# Set on exercises that need equipment outside the taxonomy, so they never
+# pass an "all required equipment available" check by accident
+UNKNOWN_EQUIPMENT_BIT = 1 << 62
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Lowercase, underscores to spaces, single spaces"""
+    return re.sub(r"\s+", " ", (name or "").replace("_", " ")).strip().lower()
+
+
+def canonical_muscle(name: Optional[str]) -> str:
+    """Canonical muscle name; unknown names come back normalized"""
+    key = normalize_name(name)
+    return MUSCLE_ALIASES.get(key, key)
+
+
+def canonical_equipment(name: Optional[str]) -> Optional[str]:
+    """Canonical equipment name, or None for bodyweight / empty"""
+    key = normalize_name(name)
+    if not key or key in BODYWEIGHT_NAMES:
+        return None
+    return EQUIPMENT_ALIASES.get(key, key)
+
+
+def canonicalize_muscles(names: Optional[Iterable[str]]) -> List[str]:
+    """Canonical names in first-seen order, without duplicates or blanks"""
+    result = []
+    for name in names or []:
+        muscle = canonical_muscle(name)
+        if muscle and muscle not in result:
+            result.append(muscle)
+    return result
+
+
+def canonicalize_equipment(names: Optional[Iterable[str]]) -> List[str]:
+    result = []
+    for name in names or []:
+        equipment = canonical_equipment(name)
+        if equipment and equipment not in result:
+            result.append(equipment)
+    return result
+
+
+def muscle_mask(names: Optional[Iterable[str]]) -> int:
+    """Bitmask of the known muscles among names (unknown names are ignored)"""
+    mask = 0
+    for name in names or []:
+        muscle_id = MUSCLE_IDS.get(canonical_muscle(name))
+        if muscle_id:
+            mask |= 1 << (muscle_id - 1)
+    return mask
+
+
+def equipment_mask(names: Optional[Iterable[str]], mark_unknown: bool = False) -> int:
+    """Bitmask of the equipment among names.
+
+    With mark_unknown, names outside the taxonomy set UNKNOWN_EQUIPMENT_BIT;
+    use it for what an exercise requires, not for what a gym has.
+    """
+    mask = 0
+    for name in names or []:
+        equipment = canonical_equipment(name)
+        if equipment is None:
+            continue
+        equipment_id = EQUIPMENT_IDS.get(equipment)
+        if equipment_id:
+            mask |= 1 << (equipment_id - 1)
+        elif mark_unknown:
+            mask |= UNKNOWN_EQUIPMENT_BIT
+    return mask
+
+
+def unknown_muscles(names: Optional[Iterable[str]]) -> List[str]:
+    """Canonicalized names that have no taxonomy id"""
+    return [name for name in canonicalize_muscles(names) if name not in MUSCLE_IDS]
+
+
+def normalize_exercise_fields(data: Dict) -> Dict:
+    """Canonicalize muscle_groups/equipment of an exercise dict and add its masks"""
+    data = dict(data)
+    data["muscle_groups"] = canonicalize_muscles(data.get("muscle_groups"))
+    data["equipment"] = canonicalize_equipment(data.get("equipment"))
+    data["muscle_mask"] = muscle_mask(data["muscle_groups"])
+    data["equipment_mask"] = equipment_mask(data["equipment"], mark_unknown=True)
+    return data
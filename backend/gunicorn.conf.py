@@ -0,0 +1,57 @@
+"""
+Production server settings
+Run with: gunicorn -c gunicorn.conf.py app.main:app
+
+gunicorn supervises WEB_CONCURRENCY uvicorn worker processes (or -w N):
+crashed workers are replaced, and `kill -HUP <master pid>` restarts them
+gracefully, in-flight requests getting WEB_GRACEFUL_TIMEOUT seconds to
+finish. Workers are also recycled after WEB_MAX_REQUESTS requests (with
+jitter, so they don't all restart at once). Every worker has its own
+connection pool, sized by the DB_* settings for the actual worker count;
+the database's connection limit is checked once at startup. Workers write
+their Prometheus samples to PROMETHEUS_MULTIPROC_DIR, so /metrics reports
+all of them.
+"""
+import logging
+import os
+import shutil
+
+from app.config import settings
+
+# Must be set before any worker imports prometheus_client
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/wrxs-prometheus")
+
+bind = settings.WEB_BIND
+workers = settings.WEB_CONCURRENCY
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = settings.WEB_TIMEOUT
+graceful_timeout = settings.WEB_GRACEFUL_TIMEOUT
+keepalive = 5
+max_requests = settings.WEB_MAX_REQUESTS
+max_requests_jitter = settings.WEB_MAX_REQUESTS // 10
+accesslog = "-"
+
+# Each worker imports the app itself, so no engine or pool is shared across fork
+preload_app = False
+
+
+def on_starting(server):
+    logging.basicConfig(level=logging.INFO)
+
+    # Samples of a previous run would otherwise be added to this one's
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+    # -w overrides WEB_CONCURRENCY; pools are split by the real worker count
+    # (app.database.pool_options), so set it before app.database is imported
+    settings.WEB_CONCURRENCY = server.cfg.workers
+    from app.database import check_connection_budget
+
+    check_connection_budget(server.cfg.workers)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,28 @@
+"""Dashboard statistics computed in Python after the queries (app.routers.dashboard_stats)"""
+import pytest
+
+from app.routers.dashboard_stats import compute_streaks, frequency_trend, summarize_week
+from perf.benchmarks import datasets
+
+
+@pytest.mark.benchmark(group="current_streak")
+@pytest.mark.parametrize("size", datasets.SIZES)
+def bench_compute_streaks(benchmark, size):
+    dates = datasets.workout_dates(size)
+    current, longest = benchmark(compute_streaks, dates, datasets.TODAY)
+    assert 1 <= current <= longest
+
+
+@pytest.mark.benchmark(group="week_comparison")
+@pytest.mark.parametrize("size", datasets.SIZES)
+def bench_summarize_week(benchmark, size):
+    logs = datasets.week_logs(size)
+    stats = benchmark(summarize_week, logs)
+    assert stats["total_workouts"] == len(logs)
+
+
+@pytest.mark.benchmark(group="frequency_chart")
+@pytest.mark.parametrize("size", datasets.SIZES)
+def bench_frequency_trend(benchmark, size):
+    counts = datasets.weekly_counts(size)
+    assert benchmark(frequency_trend, counts) in ("increasing", "decreasing", "stable")
@@ -0,0 +1,68 @@
+"""Program generation hot paths: prompt building, rule-based selection and insights"""
+import pytest
+
+from app import schemas
+from app.services import program_engine
+from app.services.ai_trainer import AITrainerService
+from app.services.insights import compute_adaptation_insights
+from perf.benchmarks import datasets
+
+GOALS = ["muscle_gain", "strength"]
+
+
+@pytest.fixture(scope="module")
+def trainer():
+    # The prompt builders only format their arguments
+    return AITrainerService(db=None, user=None)
+
+
+@pytest.mark.benchmark(group="adaptation_insights")
+@pytest.mark.parametrize("size", datasets.SIZES)
+def bench_compute_adaptation_insights(benchmark, size):
+    history = datasets.workout_history(size)
+    benchmark(compute_adaptation_insights, history)
+
+
+@pytest.mark.benchmark(group="multi_week_prompt")
+@pytest.mark.parametrize("size", datasets.SIZES)
+def bench_multi_week_prompt(benchmark, trainer, size):
+    request = schemas.TrainerProgramRequest(
+        program_type="multi_week", duration_weeks=8, days_per_week=4,
+        available_equipment=datasets.EQUIPMENT
+    )
+    exercises = datasets.catalog(size)
+    history = datasets.workout_history(size)
+    prompt = benchmark(trainer._build_multi_week_prompt, request, "intermediate", GOALS, history, exercises)
+    assert "AVAILABLE EXERCISES" in prompt
+
+
+@pytest.mark.benchmark(group="daily_prompt")
+@pytest.mark.parametrize("size", datasets.SIZES)
+def bench_daily_workout_prompt(benchmark, trainer, size):
+    request = schemas.TrainerProgramRequest(program_type="daily", available_equipment=datasets.EQUIPMENT)
+    exercises = datasets.catalog(size)
+    recent = [f"{exercise.name} ({', '.join(exercise.muscle_groups)})" for exercise in exercises[:8]]
+    prompt = benchmark(trainer._build_daily_workout_prompt, request, "intermediate", GOALS, recent, exercises)
+    assert "RECENT WORKOUTS" in prompt
+
+
+@pytest.mark.benchmark(group="rule_based_multi_week")
+@pytest.mark.parametrize("size", datasets.SIZES)
+def bench_generate_multi_week_program(benchmark, size):
+    exercises = datasets.catalog(size)
+    program = benchmark(
+        program_engine.generate_multi_week_program, exercises, "intermediate", GOALS,
+        duration_weeks=12, days_per_week=4, time_per_session_minutes=60
+    )
+    assert len(program["weeks"]) == 12
+
+
+@pytest.mark.benchmark(group="rule_based_daily")
+@pytest.mark.parametrize("size", datasets.SIZES)
+def bench_generate_daily_workout(benchmark, size):
+    exercises = datasets.catalog(size)
+    workout = benchmark(
+        program_engine.generate_daily_workout, exercises, "intermediate", GOALS,
+        time_per_session_minutes=60, recent_muscles=["chest", "triceps"]
+    )
+    assert workout["exercises"]
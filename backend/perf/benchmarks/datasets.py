@@ -0,0 +1,90 @@
+"""
+Deterministic inputs for the micro-benchmarks, in three sizes:
+
+    small       a new user, or the seed catalog
+    typical     a few months of regular training, or the imported wger catalog
+    power_user  years of near-daily training, or a large merged catalog
+"""
+import random
+from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone
+from typing import List
+
+from app.services.exercise_candidates import ExerciseCandidate
+from app.services.program_engine import SESSION_TEMPLATES
+
+SIZES = ("small", "typical", "power_user")
+
+STREAK_DATES = {"small": 20, "typical": 150, "power_user": 1500}  # distinct workout days
+WEEK_LOGS = {"small": 4, "typical": 20, "power_user": 120}  # logs in one week
+CHART_WEEKS = {"small": 4, "typical": 12, "power_user": 52}  # weeks on the frequency chart
+CATALOG_SIZES = {"small": 20, "typical": 400, "power_user": 2500}  # exercises
+
+# Same attributes summarize_week reads from WorkoutLog rows
+LogRow = namedtuple("LogRow", ["exercise_id", "date", "sets_completed", "reps", "weight_kg"])
+
+MUSCLES = sorted({muscle for slots in SESSION_TEMPLATES.values() for muscle in slots})
+EQUIPMENT = ["barbell", "dumbbells", "bench", "cable machine", "kettlebell", "pull-up bar"]
+TODAY = date(2026, 1, 15)
+
+
+def workout_dates(size: str) -> List[date]:
+    """Distinct workout dates, newest first, in runs of consecutive days with gaps between"""
+    rng = random.Random(f"dates-{size}")
+    dates, day = [], TODAY
+    while len(dates) < STREAK_DATES[size]:
+        dates.append(day)
+        day -= timedelta(days=1 if rng.random() < 0.6 else rng.randint(2, 4))
+    return dates
+
+
+def week_logs(size: str) -> List[LogRow]:
+    rng = random.Random(f"week-{size}")
+    monday = datetime(2026, 1, 12, 7, 0)
+    logs = []
+    for _ in range(WEEK_LOGS[size]):
+        sets = rng.randint(3, 5)
+        logs.append(LogRow(
+            exercise_id=rng.randint(1, 200),
+            date=monday + timedelta(days=rng.randint(0, 6), minutes=rng.randint(0, 600)),
+            sets_completed=sets,
+            reps=[rng.randint(6, 12) for _ in range(sets)],
+            weight_kg=[rng.choice([20, 40, 60, 80, 100])] * sets
+        ))
+    return logs
+
+
+def weekly_counts(size: str) -> List[int]:
+    rng = random.Random(f"chart-{size}")
+    return [rng.randint(0, 20) for _ in range(CHART_WEEKS[size])]
+
+
+def catalog(size: str) -> List[ExerciseCandidate]:
+    rng = random.Random(f"catalog-{size}")
+    exercises = []
+    for exercise_id in range(1, CATALOG_SIZES[size] + 1):
+        category = "cardio" if rng.random() < 0.1 else "strength"
+        muscles = ["cardiovascular"] if category == "cardio" else rng.sample(MUSCLES, rng.randint(1, 3))
+        exercises.append(ExerciseCandidate(
+            id=exercise_id,
+            name=f"Exercise {exercise_id}",
+            category=category,
+            muscle_groups=muscles,
+            equipment=rng.sample(EQUIPMENT, rng.randint(0, 2)),
+            difficulty=rng.choice(["beginner", "intermediate", "advanced"])
+        ))
+    return exercises
+
+
+def workout_history(size: str) -> dict:
+    """Aggregated history as produced by services.insights.aggregate_workout_history"""
+    rng = random.Random(f"history-{size}")
+    return {
+        "total_workouts": {"small": 3, "typical": 14, "power_user": 60}[size],
+        "avg_difficulty_rating": round(rng.uniform(5, 9), 1),
+        "time_range_days": 30,
+        "last_log_id": rng.randint(1, 10 ** 6),
+        "last_expired_at": None,
+        "as_of": datetime(2026, 1, 15, 3, 0, tzinfo=timezone.utc),
+        "summary": "Synthetic workout history",
+    }
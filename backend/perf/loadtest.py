@@ -0,0 +1,312 @@
+"""
+End-to-end HTTP load test against a running backend
+Run with: python -m perf.loadtest --base-url http://localhost:8000 --users 50 --duration 120
+
+Each virtual user logs in as one of the synthetic users (see
+app.generate_synthetic_data) and then loops over weighted journeys, with
+exponential think time between them:
+
+    dashboard         the four /api/dashboard stats, fetched together like the frontend does
+    log_session       today's workout, then one workout log per exercise
+    browse_exercises  an exercise list page, filtered now and then, and one exercise
+    todays_workout    today's workout and the week's schedule
+    generate_program  a 4-week AI program (--generate-weight, 0 = never); point the
+                      backend at app.llm_stub first, this must not hit the real API
+
+Latency is recorded per endpoint (method and route template) after the
+warm-up and reported as p50/p95/p99 with throughput and error rate, checked
+against SLO_P95_MS. --save-baseline stores the report; --baseline compares a
+run to a stored one and exits with status 1 on SLO breaches or regressions.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import httpx
+
+JOURNEY_WEIGHTS = {
+    "dashboard": 30,
+    "log_session": 15,
+    "browse_exercises": 30,
+    "todays_workout": 25,
+}
+
+# p95 latency targets in milliseconds; endpoints not listed use DEFAULT_SLO_P95_MS
+DEFAULT_SLO_P95_MS = 300
+SLO_P95_MS = {
+    "POST /api/auth/login": 800,  # bcrypt verification is deliberately slow
+    "POST /api/workout-logs/": 400,
+    "POST /api/trainer/generate-program": 30000,
+}
+
+# A p95 increase is a regression only if it is both relatively and absolutely large
+REGRESSION_MIN_DELTA_MS = 5.0
+
+
+class Recorder:
+    """Latencies and errors per endpoint, ignoring everything before the warm-up ends"""
+
+    def __init__(self, warmup_until: float):
+        self.warmup_until = warmup_until
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.started = self.finished = None
+
+    def record(self, endpoint: str, seconds: float, ok: bool):
+        now = time.monotonic()
+        if now < self.warmup_until:
+            return
+        if self.started is None:
+            self.started = now
+        self.finished = now
+        self.latencies[endpoint].append(seconds * 1000)
+        if not ok:
+            self.errors[endpoint] += 1
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], errors: int, seconds: float) -> Dict:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "rps": round(len(values) / seconds, 2) if seconds else 0.0,
+        "error_rate": round(errors / len(values), 4) if values else 0.0,
+        "p50_ms": round(percentile(values, 0.50), 1),
+        "p95_ms": round(percentile(values, 0.95), 1),
+        "p99_ms": round(percentile(values, 0.99), 1),
+        "max_ms": round(values[-1], 1) if values else 0.0,
+    }
+
+
+def build_report(recorder: Recorder, options) -> Dict:
+    seconds = (recorder.finished - recorder.started) if recorder.started else 0.0
+    endpoints = {
+        endpoint: summarize(latencies, recorder.errors[endpoint], seconds)
+        for endpoint, latencies in sorted(recorder.latencies.items())
+    }
+    for endpoint, stats in endpoints.items():
+        stats["slo_p95_ms"] = SLO_P95_MS.get(endpoint, DEFAULT_SLO_P95_MS)
+    every = [value for latencies in recorder.latencies.values() for value in latencies]
+    return {
+        "base_url": options.base_url,
+        "users": options.users,
+        "duration_s": round(seconds, 1),
+        "run_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "total": summarize(every, sum(recorder.errors.values()), seconds),
+        "endpoints": endpoints,
+    }
+
+
+def slo_breaches(report: Dict) -> List[str]:
+    return [
+        f"{endpoint}: p95 {stats['p95_ms']} ms > SLO {stats['slo_p95_ms']} ms"
+        for endpoint, stats in report["endpoints"].items()
+        if stats["p95_ms"] > stats["slo_p95_ms"]
+    ]
+
+
+def compare_to_baseline(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Endpoints whose p95, error rate or throughput got worse than the baseline allows"""
+    regressions = []
+    for endpoint, stats in report["endpoints"].items():
+        before = baseline["endpoints"].get(endpoint)
+        if before is None:
+            continue
+        p95_delta = stats["p95_ms"] - before["p95_ms"]
+        if stats["p95_ms"] > before["p95_ms"] * (1 + tolerance) and p95_delta > REGRESSION_MIN_DELTA_MS:
+            regressions.append(f"{endpoint}: p95 {before['p95_ms']} -> {stats['p95_ms']} ms")
+        if stats["error_rate"] > before["error_rate"] + 0.01:
+            regressions.append(f"{endpoint}: error rate {before['error_rate']:.2%} -> {stats['error_rate']:.2%}")
+
+    before, after = baseline["total"]["rps"], report["total"]["rps"]
+    if baseline.get("users") == report["users"] and after < before * (1 - tolerance):
+        regressions.append(f"throughput {before} -> {after} req/s")
+    return regressions
+
+
+def print_report(report: Dict):
+    print(f"\n{report['users']} users, {report['duration_s']}s measured against {report['base_url']}\n")
+    header = f"{'endpoint':<44} {'count':>7} {'req/s':>8} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  SLO"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for endpoint, stats in rows:
+        slo = stats.get("slo_p95_ms")
+        verdict = "" if slo is None else ("ok" if stats["p95_ms"] <= slo else f"FAIL (p95 > {slo})")
+        print(
+            f"{endpoint:<44} {stats['count']:>7} {stats['rps']:>8.2f} {stats['error_rate'] * 100:>5.1f}% "
+            f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f}  {verdict}"
+        )
+
+
+class VirtualUser:
+    def __init__(self, number: int, client: httpx.AsyncClient, recorder: Recorder, options):
+        self.username = f"{options.prefix}{number}"
+        self.client = client
+        self.recorder = recorder
+        self.options = options
+        self.rng = random.Random(f"{options.seed}-{number}")
+        self.headers: Dict[str, str] = {}
+        self.exercise_ids: List[int] = []
+
+    async def request(self, method: str, endpoint: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        """Send a request and record it under the route template given as endpoint"""
+        started = time.monotonic()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(f"{method} {endpoint}", time.monotonic() - started, ok=False)
+            return None
+        self.recorder.record(f"{method} {endpoint}", time.monotonic() - started, ok=response.status_code < 400)
+        return response
+
+    async def login(self) -> bool:
+        response = await self.request(
+            "POST", "/api/auth/login", "/api/auth/login",
+            data={"username": self.username, "password": self.options.password}
+        )
+        if response is None or response.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return True
+
+    async def dashboard(self):
+        await asyncio.gather(*(
+            self.request("GET", f"/api/dashboard/{name}", f"/api/dashboard/{name}")
+            for name in ("weekly-streak", "current-streak", "week-comparison", "frequency-chart")
+        ))
+
+    async def todays_workout(self):
+        today = date.today()
+        await self.request("GET", "/api/trainer/daily-workout", "/api/trainer/daily-workout")
+        await self.request(
+            "GET", "/api/trainer/schedule", "/api/trainer/schedule",
+            params={"start_date": today.isoformat(), "end_date": (today + timedelta(days=6)).isoformat()}
+        )
+
+    async def browse_exercises(self):
+        params = {"skip": self.rng.choice([0, 0, 50, 100]), "limit": 50}
+        if self.rng.random() < 0.3:
+            params["category"] = self.rng.choice(["strength", "cardio", "flexibility"])
+        response = await self.request("GET", "/api/exercises/", "/api/exercises/", params=params)
+        if response is not None and response.status_code == 200:
+            self.exercise_ids = [exercise["id"] for exercise in response.json()] or self.exercise_ids
+        if self.exercise_ids:
+            exercise_id = self.rng.choice(self.exercise_ids)
+            await self.request("GET", "/api/exercises/{exercise_id}", f"/api/exercises/{exercise_id}")
+
+    async def log_session(self):
+        response = await self.request("GET", "/api/trainer/daily-workout", "/api/trainer/daily-workout")
+        workout = response.json() if response is not None and response.status_code == 200 else None
+        exercise_ids = [item["exercise"]["id"] for item in workout["exercises"]] if workout else []
+        if not exercise_ids:
+            if not self.exercise_ids:
+                await self.browse_exercises()
+            exercise_ids = self.rng.sample(self.exercise_ids, min(4, len(self.exercise_ids)))
+
+        for exercise_id in exercise_ids:
+            sets = self.rng.randint(3, 5)
+            await self.request("POST", "/api/workout-logs/", "/api/workout-logs/", json={
+                "exercise_id": exercise_id,
+                "sets_completed": sets,
+                "reps": [self.rng.randint(6, 12) for _ in range(sets)],
+                "weight_kg": [self.rng.choice([20, 40, 60, 80])] * sets,
+                "difficulty_rating": self.rng.randint(4, 9),
+            })
+            await asyncio.sleep(self.rng.uniform(0.1, 0.5))
+
+    async def generate_program(self):
+        await self.request(
+            "POST", "/api/trainer/generate-program", "/api/trainer/generate-program",
+            json={"program_type": "multi_week", "duration_weeks": 4, "days_per_week": 3},
+            timeout=self.options.generate_timeout
+        )
+
+    async def run(self, start_delay: float, stop_at: float):
+        await asyncio.sleep(start_delay)
+        if not await self.login():
+            print(f"  login failed for {self.username}")
+            return
+
+        weights = dict(JOURNEY_WEIGHTS, generate_program=self.options.generate_weight)
+        journeys, journey_weights = list(weights), list(weights.values())
+        while time.monotonic() < stop_at:
+            journey = self.rng.choices(journeys, journey_weights)[0]
+            await getattr(self, journey)()
+            if self.options.think_time > 0:
+                think = self.rng.expovariate(1 / self.options.think_time)
+                await asyncio.sleep(max(0.0, min(think, stop_at - time.monotonic())))
+
+
+async def run_load(options) -> Dict:
+    started = time.monotonic()
+    stop_at = started + options.ramp_up + options.duration
+    recorder = Recorder(warmup_until=started + options.ramp_up + options.warmup)
+    limits = httpx.Limits(max_connections=options.users, max_keepalive_connections=options.users)
+
+    async with httpx.AsyncClient(base_url=options.base_url, limits=limits, timeout=options.timeout) as client:
+        users = [
+            VirtualUser(options.first_user + index, client, recorder, options)
+            for index in range(options.users)
+        ]
+        # Start users evenly over the ramp-up so logins don't all land at once
+        await asyncio.gather(*(
+            user.run(options.ramp_up * index / options.users, stop_at)
+            for index, user in enumerate(users)
+        ))
+    return build_report(recorder, options)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP load test with per-endpoint latency percentiles")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to run after ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=10, help="Seconds over which users start")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds after ramp-up excluded from the results")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean pause between journeys, seconds")
+    parser.add_argument("--generate-weight", type=float, default=0, help="Weight of the generate_program journey")
+    parser.add_argument("--prefix", default="synth", help="Username prefix of the synthetic users")
+    parser.add_argument("--first-user", type=int, default=1, help="Number of the first synthetic user to log in as")
+    parser.add_argument("--password", default="synthetic-password")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30, help="Request timeout, seconds")
+    parser.add_argument("--generate-timeout", type=float, default=120, help="Program generation timeout, seconds")
+    parser.add_argument("--report", help="Write the report to this JSON file")
+    parser.add_argument("--baseline", help="Compare against this stored report")
+    parser.add_argument("--save-baseline", help="Store the report as a baseline at this path")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative p95/throughput regression")
+    args = parser.parse_args()
+
+    print(f"Load testing {args.base_url} with {args.users} users for {args.duration:.0f}s...")
+    report = asyncio.run(run_load(args))
+    print_report(report)
+
+    for path in (args.report, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nReport written to {path}")
+
+    problems = slo_breaches(report)
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems += compare_to_baseline(report, json.load(f), args.tolerance)
+    if problems:
+        print("\nProblems:")
+        for problem in problems:
+            print(f"  {problem}")
+        raise SystemExit(1)
@@ -0,0 +1,43 @@
+"""
+Plans of the hot endpoints' queries must not regress: no sequential scans
+on the large tables, no estimated cost jumps, no indexes dropped from use
+"""
+import pytest
+
+from perf.query_plans.plans import capture_selects, find_regressions, summarize_statements
+
+HOT_ENDPOINTS = {
+    "workout_logs": "/api/workout-logs/?limit=50",
+    "workout_logs_by_date": "/api/workout-logs/?start_date=2025-01-01T00:00:00&limit=50",
+    "workout_stats": "/api/workout-logs/stats",
+    "dashboard_weekly_streak": "/api/dashboard/weekly-streak",
+    "dashboard_current_streak": "/api/dashboard/current-streak",
+    "dashboard_week_comparison": "/api/dashboard/week-comparison",
+    "dashboard_frequency_chart": "/api/dashboard/frequency-chart?weeks=12",
+    "exercises": "/api/exercises/?limit=100",
+    "exercises_by_category": "/api/exercises/?category=strength&difficulty=beginner",
+    "exercises_by_muscle": "/api/exercises/?muscle_group=chest",
+    "active_program": "/api/trainer/active-program",
+    "programs": "/api/trainer/programs",
+    "program_summaries": "/api/trainer/programs/summary",
+    "daily_workout": "/api/trainer/daily-workout",
+    "schedule": "/api/trainer/schedule",
+}
+
+
+@pytest.mark.parametrize("name", sorted(HOT_ENDPOINTS))
+def check_endpoint_plans(name, plan_engine, plan_client, plan_baseline, update_plans):
+    baseline, recorded = plan_baseline
+    with capture_selects(plan_engine) as statements:
+        response = plan_client.get(HOT_ENDPOINTS[name])
+    assert response.status_code == 200, response.text
+
+    summaries = summarize_statements(plan_engine, statements)
+    recorded[name] = summaries
+    if update_plans:
+        return
+
+    if name not in baseline:
+        pytest.fail(f"{name}: no baseline plans; run with --update-plans to record them")
+    problems = find_regressions(summaries, baseline[name])
+    assert not problems, f"{name} plans regressed:\n  " + "\n  ".join(problems)
@@ -0,0 +1,74 @@
+"""
+Fixtures for the query-plan checks: a PostgreSQL engine with fresh
+statistics, the synthetic user with the longest history, an authenticated
+client for the hot routers and the stored plan baseline.
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app import auth
+from app.database import engine
+from app.models import User, WorkoutLog
+from app.routers import dashboard_stats, exercises, personal_trainer, workout_logs
+from perf.query_plans.plans import NO_SEQ_SCAN_TABLES, load_baseline, save_baseline
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--update-plans", action="store_true",
+        help="Store the captured plans as the new baseline instead of checking them"
+    )
+
+
+@pytest.fixture(scope="session")
+def update_plans(request) -> bool:
+    return request.config.getoption("--update-plans")
+
+
+@pytest.fixture(scope="session")
+def plan_engine():
+    if engine.dialect.name != "postgresql":
+        pytest.skip("query-plan checks need DATABASE_URL to point at PostgreSQL")
+    # Plans depend on statistics; make sure they describe the seeded data
+    try:
+        with engine.begin() as connection:
+            for table in sorted(NO_SEQ_SCAN_TABLES | {"users", "exercises"}):
+                connection.exec_driver_sql(f"ANALYZE {table}")
+    except OperationalError as e:
+        pytest.skip(f"query-plan checks need a reachable PostgreSQL database: {e.orig}")
+    return engine
+
+
+@pytest.fixture(scope="session")
+def plan_user(plan_engine):
+    with Session(plan_engine) as db:
+        row = db.query(WorkoutLog.user_id).join(User, User.id == WorkoutLog.user_id).filter(
+            User.is_active == True
+        ).group_by(WorkoutLog.user_id).order_by(func.count(WorkoutLog.id).desc()).first()
+        if row is None:
+            pytest.skip("no workout history; seed the database with app.generate_synthetic_data")
+        return db.get(User, row.user_id).username
+
+
+@pytest.fixture(scope="session")
+def plan_client(plan_user):
+    app = FastAPI()
+    for router in (dashboard_stats, exercises, personal_trainer, workout_logs):
+        app.include_router(router.router)
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {auth.create_access_token({'sub': plan_user})}"
+    return client
+
+
+@pytest.fixture(scope="session")
+def plan_baseline(update_plans):
+    """Baseline plans per endpoint; with --update-plans, whatever the checks record is saved"""
+    baseline = load_baseline()
+    recorded = {}
+    yield baseline, recorded
+    if update_plans and recorded:
+        save_baseline({**baseline, **recorded})
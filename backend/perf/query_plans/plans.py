@@ -0,0 +1,134 @@
+"""
+Capture the SELECTs an endpoint runs, EXPLAIN them and compare the plans to
+a stored baseline
+
+A plan is reduced to what matters for regressions: its estimated total
+cost, the scan type used on each table and the indexes used. Costs vary a
+little between ANALYZE runs, so only large relative jumps count.
+"""
+import json
+import os
+import re
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.sql_instrumentation import statement_shape
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Tables that grow with users and history: a sequential scan on them is always a regression
+NO_SEQ_SCAN_TABLES = {
+    "workout_logs",
+    "ai_training_programs",
+    "ai_weekly_plans",
+    "ai_daily_workouts",
+    "ai_daily_workout_exercises",
+    "ai_program_schedule",
+}
+
+# A statement regresses when its estimated cost grows by this factor and by at least MIN_COST_DELTA
+COST_GROWTH_LIMIT = 2.0
+MIN_COST_DELTA = 100.0
+
+_SELECT = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+
+@contextmanager
+def capture_selects(engine: Engine) -> Iterator[List[Tuple[str, object]]]:
+    """Collect (statement, parameters) of every SELECT run on the engine in this block"""
+    captured: List[Tuple[str, object]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and _SELECT.match(statement):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def explain(engine: Engine, statement: str, parameters) -> Dict:
+    """Estimated plan (no ANALYZE: nothing is executed) as PostgreSQL's JSON"""
+    with engine.connect() as connection:
+        result = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def _walk(node: Dict) -> Iterator[Dict]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def summarize_plan(plan: Dict) -> Dict:
+    """{"total_cost", "scans": ["Index Scan on workout_logs", ...], "indexes": [...], "seq_scans": [tables]}"""
+    scans, indexes, seq_scans = set(), set(), set()
+    for node in _walk(plan):
+        # Bitmap Index Scan nodes name the index but not the table
+        if node.get("Index Name"):
+            indexes.add(node["Index Name"])
+        table = node.get("Relation Name")
+        if not table:
+            continue
+        scans.add(f"{node['Node Type']} on {table}")
+        if node["Node Type"] == "Seq Scan":
+            seq_scans.add(table)
+    return {
+        "total_cost": round(plan["Total Cost"], 2),
+        "scans": sorted(scans),
+        "indexes": sorted(indexes),
+        "seq_scans": sorted(seq_scans),
+    }
+
+
+def summarize_statements(engine: Engine, statements: List[Tuple[str, object]]) -> Dict[str, Dict]:
+    """Plan summaries keyed by statement shape; repeated shapes are explained once"""
+    summaries: Dict[str, Dict] = {}
+    for statement, parameters in statements:
+        shape = statement_shape(statement)
+        if shape not in summaries:
+            summaries[shape] = summarize_plan(explain(engine, statement, parameters))
+    return summaries
+
+
+def find_regressions(summaries: Dict[str, Dict], baseline: Dict[str, Dict]) -> List[str]:
+    """Problems with an endpoint's plans, on their own and compared to its baseline"""
+    problems = []
+    for shape, summary in summaries.items():
+        label = shape[:160]
+        for table in summary["seq_scans"]:
+            if table in NO_SEQ_SCAN_TABLES:
+                problems.append(f"Seq Scan on {table}: {label}")
+
+        before = baseline.get(shape)
+        if before is None:
+            continue
+        if (
+            summary["total_cost"] > before["total_cost"] * COST_GROWTH_LIMIT
+            and summary["total_cost"] - before["total_cost"] > MIN_COST_DELTA
+        ):
+            problems.append(f"cost {before['total_cost']} -> {summary['total_cost']}: {label}")
+        for index in sorted(set(before["indexes"]) - set(summary["indexes"])):
+            problems.append(f"no longer uses index {index}: {label}")
+    return problems
+
+
+def load_baseline() -> Dict[str, Dict[str, Dict]]:
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH) as f:
+        return json.load(f)
+
+
+def save_baseline(baseline: Dict[str, Dict[str, Dict]]):
+    with open(BASELINE_PATH, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
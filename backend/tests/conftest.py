@@ -0,0 +1,226 @@
+"""
+Fixtures for the backend tests
+
+db is a fresh in-memory SQLite database per test. Code that only runs on
+PostgreSQL (ON CONFLICT upserts, JSONB comparisons, xmax) uses pg_db
+instead, which needs TEST_DATABASE_URL pointing at a scratch PostgreSQL
+database and is skipped otherwise; each test runs in a transaction that is
+rolled back afterwards.
+
+query_budget fails a test when a request it makes runs more SQL than
+allowed, or repeats one statement shape (an N+1):
+
+    def test_list_exercises(client, query_budget):
+        with query_budget(max_queries=3):
+            client.get("/api/exercises/")
+"""
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.auth import create_access_token
+from app.database import Base, get_db
+from app.routers import auth, exercises, personal_trainer
+from app.services import program_cache
+from app.services.exercise_candidates import candidate_cache
+from app.sql_instrumentation import (
+    SQLInstrumentationMiddleware, add_request_observer, instrument_engine, remove_request_observer
+)
+from app.taxonomy import normalize_exercise_fields
+
+
+@pytest.fixture(autouse=True)
+def clear_catalog_caches():
+    # Every test database starts again at catalog version 0
+    candidate_cache.clear()
+    program_cache.skeleton_cache.clear()
+    yield
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    instrument_engine(engine)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def pg_db():
+    url = os.environ.get("TEST_DATABASE_URL", "")
+    if not url.startswith("postgresql"):
+        pytest.skip("needs TEST_DATABASE_URL pointing at a PostgreSQL database")
+
+    engine = create_engine(url)
+    instrument_engine(engine)
+    Base.metadata.create_all(bind=engine)
+    connection = engine.connect()
+    transaction = connection.begin()
+    # Commits inside the code under test only release savepoints
+    session = sessionmaker(
+        autocommit=False, autoflush=False, bind=connection, join_transaction_mode="create_savepoint"
+    )()
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def client(db):
+    """API client for the routers under test, on the db fixture's session"""
+    app = FastAPI()
+    app.add_middleware(SQLInstrumentationMiddleware)
+    for module in (auth, exercises, personal_trainer):
+        app.include_router(module.router)
+    app.dependency_overrides[get_db] = lambda: db
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def query_budget():
+    @contextmanager
+    def budget(max_queries: int, max_repeats: int = 3):
+        requests = []
+
+        def observe(route, stats):
+            requests.append((route, stats.count, stats.repeated(max_repeats + 1)))
+
+        add_request_observer(observe)
+        try:
+            yield requests
+        finally:
+            remove_request_observer(observe)
+
+        if not requests:
+            pytest.fail("Query budget observed no requests; is SQLInstrumentationMiddleware installed?")
+        problems = []
+        for route, count, repeated in requests:
+            if count > max_queries:
+                problems.append(f"{route}: {count} queries, budget is {max_queries}")
+            for shape, times in repeated:
+                problems.append(f"{route}: statement ran {times} times (max {max_repeats}): {shape[:200]}")
+        if problems:
+            pytest.fail("Query budget exceeded:\n  " + "\n  ".join(problems))
+
+    return budget
+
+
+def auth_headers(user: models.User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': user.username})}"}
+
+
+@pytest.fixture
+def make_user(db):
+    def make(username: str = "athlete", **fields) -> models.User:
+        user = models.User(
+            email=f"{username}@example.com",
+            username=username,
+            hashed_password="not-a-real-hash",
+            **fields
+        )
+        db.add(user)
+        db.flush()
+        return user
+
+    return make
+
+
+@pytest.fixture
+def make_exercise(db):
+    def make(
+        name: str,
+        muscle_groups=("chest",),
+        equipment=(),
+        difficulty: str = "beginner",
+        category: str = "strength",
+        **fields
+    ) -> models.Exercise:
+        normalized = normalize_exercise_fields({"muscle_groups": list(muscle_groups), "equipment": list(equipment)})
+        exercise = models.Exercise(name=name, difficulty=difficulty, category=category, **normalized, **fields)
+        db.add(exercise)
+        db.flush()
+        return exercise
+
+    return make
+
+
+@pytest.fixture
+def make_program(db):
+    def make(
+        user: models.User,
+        weeks: int = 1,
+        days_per_week: int = 3,
+        exercise_ids=(),
+        **fields
+    ) -> models.AITrainingProgram:
+        """A multi-week program whose every session lists exercise_ids"""
+        program = models.AITrainingProgram(
+            user_id=user.id,
+            program_type="multi_week",
+            name="Test Program",
+            fitness_level="intermediate",
+            fitness_goals=["strength"],
+            available_equipment=[],
+            duration_weeks=weeks,
+            days_per_week=days_per_week,
+            difficulty="intermediate",
+            ai_rationale="Test program",
+            **fields
+        )
+        for week_number in range(1, weeks + 1):
+            week = models.AIWeeklyPlan(week_number=week_number)
+            program.weekly_plans.append(week)
+            for day_number in range(1, days_per_week + 1):
+                workout = models.AIDailyWorkout(
+                    training_program=program,
+                    day_number=day_number,
+                    workout_name=f"Day {day_number}",
+                    focus_areas=[]
+                )
+                week.daily_workouts.append(workout)
+                for order, exercise_id in enumerate(exercise_ids):
+                    workout.exercises.append(models.AIDailyWorkoutExercise(
+                        exercise_id=exercise_id, order=order, sets=3, reps=["8-10"]
+                    ))
+        db.add(program)
+        db.flush()
+        return program
+
+    return make
+
+
+@pytest.fixture
+def make_log(db):
+    def make(user: models.User, exercise: models.Exercise, days_ago: float = 0, **fields) -> models.WorkoutLog:
+        """A workout log dated days_ago before now (naive UTC, as SQLite returns it)"""
+        log = models.WorkoutLog(
+            user_id=user.id,
+            exercise_id=exercise.id,
+            date=datetime.utcnow() - timedelta(days=days_ago),
+            sets_completed=3,
+            reps=[10, 10, 10],
+            **fields
+        )
+        db.add(log)
+        db.flush()
+        return log
+
+    return make
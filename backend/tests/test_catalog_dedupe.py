@@ -0,0 +1,154 @@
+import pytest
+
+from app import models
+from app.services.catalog import get_catalog_version
+from app.services.catalog_dedupe import detect_duplicate_exercises, find_duplicate_pairs, merge_exercises
+
+
+def pair_names(pairs):
+    return {(keep.name, merge.name) for keep, merge, _ in pairs}
+
+
+def test_spelling_variants_are_duplicates(make_exercise):
+    push_ups = make_exercise("Push-Ups", ["chest", "triceps"], instructions="Lower your chest to the floor")
+    pushups = make_exercise("Pushups", ["chest", "triceps"])
+    pull_up = make_exercise("Pull Up", ["back", "biceps"], ["pull-up bar"])
+
+    pairs = find_duplicate_pairs([push_ups, pushups, pull_up])
+
+    assert pair_names(pairs) == {("Push-Ups", "Pushups")}
+    assert 0.6 <= pairs[0][2] <= 1
+
+
+def test_different_equipment_is_never_a_duplicate(make_exercise):
+    bench = make_exercise("Bench Press", ["chest"], ["barbell", "bench"])
+    dumbbell_bench = make_exercise("Dumbbell Bench Press", ["chest"], ["dumbbells", "bench"])
+    # Equipment named in the title counts the same as equipment listed separately
+    barbell_bench = make_exercise("Barbell Bench Press", ["chest"], ["bench"])
+
+    pairs = find_duplicate_pairs([bench, dumbbell_bench, barbell_bench], threshold=0.3)
+
+    assert pair_names(pairs) == {("Bench Press", "Barbell Bench Press")}
+
+
+def test_survivor_is_the_curated_then_most_complete_then_oldest(make_exercise):
+    imported = make_exercise("Goblet Squat", ["quadriceps"], ["dumbbells"], source="wger", source_uuid="1",
+                             instructions="Hold the dumbbell at your chest")
+    bare = make_exercise("Goblet Squats", ["quadriceps"], ["dumbbells"])
+    described = make_exercise("Goblet-Squat", ["quadriceps"], ["dumbbells"], instructions="Squat deep")
+
+    keep_of = {frozenset((keep.id, merge.id)): keep.id for keep, merge, _ in find_duplicate_pairs(
+        [imported, bare, described], threshold=0.3
+    )}
+
+    assert keep_of[frozenset((imported.id, bare.id))] == bare.id
+    assert keep_of[frozenset((bare.id, described.id))] == described.id
+    assert keep_of[frozenset((imported.id, described.id))] == described.id
+
+
+def test_detect_does_not_propose_a_known_pair_again(db, make_exercise):
+    make_exercise("Push-Ups", ["chest", "triceps"])
+    make_exercise("Pushups", ["chest", "triceps"])
+    make_exercise("Archived Push Ups", ["chest", "triceps"], is_archived=True)
+
+    assert detect_duplicate_exercises(db) == 1
+    assert detect_duplicate_exercises(db) == 0
+    assert db.query(models.ExerciseMergeCandidate).count() == 1
+
+
+@pytest.fixture
+def duplicates(db, make_user, make_exercise):
+    user = make_user()
+    keep = make_exercise("Push-Ups", ["chest", "triceps"])
+    merge = make_exercise("Pushups", ["chest", "triceps"])
+    other = make_exercise("Squat", ["quadriceps"])
+    db.flush()
+    return user, keep, merge, other
+
+
+def add_plan(db, user, exercises):
+    plan = models.WorkoutPlan(name="Plan", user_id=user.id, difficulty="beginner", exercises=exercises)
+    db.add(plan)
+    db.flush()
+    return plan
+
+
+def test_merge_moves_every_reference_to_the_survivor(db, make_program, make_exercise, duplicates):
+    user, keep, merge, other = duplicates
+    db.add_all([
+        models.WorkoutLog(user_id=user.id, exercise_id=merge.id, sets_completed=3, reps=[10, 10, 10]),
+        models.WorkoutLog(user_id=user.id, exercise_id=other.id, sets_completed=3, reps=[5, 5, 5]),
+    ])
+    make_program(user, days_per_week=2, exercise_ids=[merge.id, other.id])
+    both = add_plan(db, user, [keep, merge])
+    merge_only = add_plan(db, user, [merge])
+    earlier = make_exercise("Push Up (old)", is_archived=True, merged_into_id=merge.id)
+
+    counts = merge_exercises(db, keep.id, merge.id)
+    db.commit()
+
+    assert counts == {"workout_logs": 1, "ai_daily_workout_exercises": 2, "workout_plans": 1}
+    assert {log.exercise_id for log in db.query(models.WorkoutLog)} == {keep.id, other.id}
+    assert {row.exercise_id for row in db.query(models.AIDailyWorkoutExercise)} == {keep.id, other.id}
+    association = models.workout_exercise_association
+    rows = db.execute(association.select().where(association.c.workout_plan_id.in_([both.id, merge_only.id]))).all()
+    # The plan that listed both keeps a single row for the survivor
+    assert sorted((row.workout_plan_id, row.exercise_id) for row in rows) == [(both.id, keep.id), (merge_only.id, keep.id)]
+
+    db.refresh(merge)
+    db.refresh(earlier)
+    assert merge.is_archived and merge.merged_into_id == keep.id
+    assert earlier.merged_into_id == keep.id
+    assert get_catalog_version(db) == 1
+
+
+def test_merge_resolves_pending_candidates(db, duplicates, make_exercise):
+    _, keep, merge, other = duplicates
+    variant = make_exercise("Push Up", ["chest", "triceps"])
+    db.add_all([
+        models.ExerciseMergeCandidate(keep_exercise_id=keep.id, merge_exercise_id=merge.id, similarity=0.9),
+        models.ExerciseMergeCandidate(keep_exercise_id=variant.id, merge_exercise_id=merge.id, similarity=0.8),
+        models.ExerciseMergeCandidate(keep_exercise_id=keep.id, merge_exercise_id=variant.id, similarity=0.8),
+    ])
+    db.flush()
+
+    merge_exercises(db, keep.id, merge.id)
+    db.commit()
+
+    statuses = {
+        (candidate.keep_exercise_id, candidate.merge_exercise_id): candidate.status
+        for candidate in db.query(models.ExerciseMergeCandidate)
+    }
+    assert statuses == {
+        (keep.id, merge.id): "merged",
+        (variant.id, merge.id): "superseded",
+        (keep.id, variant.id): "pending",
+    }
+
+
+def test_merge_clears_snapshots_that_embed_the_merged_exercise(db, make_program, duplicates):
+    user, keep, merge, other = duplicates
+    affected = make_program(user, exercise_ids=[merge.id], snapshot_json="{}")
+    unaffected = make_program(user, exercise_ids=[other.id], snapshot_json="{}")
+
+    merge_exercises(db, keep.id, merge.id)
+    db.commit()
+
+    db.refresh(affected)
+    db.refresh(unaffected)
+    assert affected.snapshot_json is None
+    assert unaffected.snapshot_json == "{}"
+
+
+def test_merge_rejects_invalid_pairs(db, duplicates):
+    _, keep, merge, other = duplicates
+
+    with pytest.raises(ValueError):
+        merge_exercises(db, keep.id, keep.id)
+    with pytest.raises(ValueError):
+        merge_exercises(db, keep.id, 999)
+
+    merge_exercises(db, keep.id, merge.id)
+    # A merged exercise can't become a survivor
+    with pytest.raises(ValueError):
+        merge_exercises(db, merge.id, other.id)
@@ -0,0 +1,137 @@
+import pytest
+
+from app import models
+from app.services.catalog import catalog_content_hash, exercise_name_key, upsert_catalog_exercises
+from app.taxonomy import normalize_exercise_fields
+
+
+@pytest.fixture
+def db(pg_db):
+    # The upsert is PostgreSQL-only (ON CONFLICT, JSONB, xmax); the factories follow it there
+    return pg_db
+
+
+def catalog_row(name: str, **fields) -> dict:
+    return normalize_exercise_fields({
+        "name": name,
+        "description": None,
+        "category": "strength",
+        "muscle_groups": ["chest"],
+        "equipment": [],
+        "difficulty": "beginner",
+        "instructions": None,
+        "video_url": None,
+        "image_url": None,
+        **fields
+    })
+
+
+def template(db, name: str) -> models.Exercise:
+    return db.query(models.Exercise).filter(
+        models.Exercise.is_template == True,
+        models.Exercise.name_key == exercise_name_key(name)
+    ).one()
+
+
+def test_name_key_ignores_case_and_punctuation():
+    assert exercise_name_key("Push-Ups ") == exercise_name_key("push ups") == "push ups"
+    assert exercise_name_key("  Farmer's  Walk") == "farmer s walk"
+    assert exercise_name_key(None) == ""
+
+
+def test_content_hash_covers_only_catalog_fields():
+    row = catalog_row("Upsert Test Press")
+
+    assert catalog_content_hash(row) == catalog_content_hash({**row, "source_uuid": "abc"})
+    assert catalog_content_hash(row) == catalog_content_hash(dict(reversed(list(row.items()))))
+    assert catalog_content_hash(row) != catalog_content_hash({**row, "difficulty": "advanced"})
+
+
+def test_rerunning_a_load_changes_nothing(db):
+    rows = [catalog_row("Upsert Test Press"), catalog_row("Upsert Test Row", muscle_groups=["back"])]
+
+    assert upsert_catalog_exercises(db, rows) == {"inserted": 2, "updated": 0, "unchanged": 0}
+    assert upsert_catalog_exercises(db, rows) == {"inserted": 0, "updated": 0, "unchanged": 2}
+
+
+def test_changed_fields_update_the_existing_row(db):
+    upsert_catalog_exercises(db, [catalog_row("Upsert Test Press", image_url="https://example.com/a.png")])
+    exercise = template(db, "Upsert Test Press")
+    exercise.image_sha256 = "cached"
+    db.flush()
+
+    counts = upsert_catalog_exercises(db, [
+        catalog_row("Upsert Test Press", muscle_groups=["chest", "triceps"], image_url="https://example.com/b.png")
+    ])
+
+    assert counts == {"inserted": 0, "updated": 1, "unchanged": 0}
+    db.refresh(exercise)
+    assert exercise.muscle_groups == ["chest", "triceps"]
+    # A new image URL drops the cached copy
+    assert exercise.image_sha256 is None
+
+
+def test_names_differing_in_case_and_punctuation_share_a_row(db):
+    upsert_catalog_exercises(db, [catalog_row("Upsert Test Push-Ups")])
+    exercise_id = template(db, "Upsert Test Push-Ups").id
+
+    counts = upsert_catalog_exercises(db, [catalog_row("upsert test push ups", difficulty="intermediate")])
+
+    assert counts == {"inserted": 0, "updated": 1, "unchanged": 0}
+    exercise = template(db, "upsert test push ups")
+    assert exercise.id == exercise_id
+    assert (exercise.name, exercise.difficulty) == ("upsert test push ups", "intermediate")
+
+
+def test_last_duplicate_in_a_batch_wins(db):
+    counts = upsert_catalog_exercises(db, [
+        catalog_row("Upsert Test Dip", difficulty="beginner"),
+        catalog_row("Upsert Test DIP", difficulty="advanced"),
+    ])
+
+    assert counts == {"inserted": 1, "updated": 0, "unchanged": 0}
+    assert template(db, "Upsert Test Dip").difficulty == "advanced"
+
+
+def test_renamed_upstream_exercise_keeps_its_row(db):
+    upsert_catalog_exercises(db, [catalog_row("Upsert Test Curl", source="wger", source_uuid="upsert-test-1")])
+    exercise_id = template(db, "Upsert Test Curl").id
+
+    counts = upsert_catalog_exercises(db, [
+        catalog_row("Upsert Test Biceps Curl", source="wger", source_uuid="upsert-test-1")
+    ])
+
+    assert counts == {"inserted": 0, "updated": 1, "unchanged": 0}
+    assert template(db, "Upsert Test Biceps Curl").id == exercise_id
+
+
+def test_reappearing_exercises_are_unarchived_unless_merged(db):
+    rows = [catalog_row("Upsert Test Squat"), catalog_row("Upsert Test Squats"), catalog_row("Upsert Test Lunge")]
+    upsert_catalog_exercises(db, rows)
+    keep, merged, deleted = (template(db, row["name"]) for row in rows)
+    merged.is_archived, merged.merged_into_id = True, keep.id
+    deleted.is_archived = True
+    db.flush()
+
+    counts = upsert_catalog_exercises(db, rows)
+
+    assert counts == {"inserted": 0, "updated": 1, "unchanged": 2}
+    db.refresh(merged)
+    db.refresh(deleted)
+    assert merged.is_archived
+    assert not deleted.is_archived
+
+
+def test_updating_an_exercise_clears_snapshots_that_embed_it(db, make_user, make_program):
+    upsert_catalog_exercises(db, [catalog_row("Upsert Test Press"), catalog_row("Upsert Test Row")])
+    press, row = template(db, "Upsert Test Press"), template(db, "Upsert Test Row")
+    user = make_user("upsert_test_user")
+    affected = make_program(user, exercise_ids=[press.id], snapshot_json="{}")
+    unaffected = make_program(user, exercise_ids=[row.id], snapshot_json="{}")
+
+    upsert_catalog_exercises(db, [catalog_row("Upsert Test Press", difficulty="advanced"), catalog_row("Upsert Test Row")])
+
+    db.refresh(affected)
+    db.refresh(unaffected)
+    assert affected.snapshot_json is None
+    assert unaffected.snapshot_json == "{}"
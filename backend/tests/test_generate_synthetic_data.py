@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+
+def test_generates_into_an_empty_sqlite_database(tmp_path):
+    url = f"sqlite:///{tmp_path / 'synthetic.db'}"
+    subprocess.run(
+        [
+            sys.executable, "-m", "app.generate_synthetic_data",
+            "--users", "3", "--years", "0.2", "--end-date", "2024-06-30"
+        ],
+        cwd=BACKEND, env={**os.environ, "DATABASE_URL": url}, capture_output=True, text=True, check=True
+    )
+
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        exercises, unkeyed = connection.execute(text(
+            "SELECT COUNT(*), SUM(name_key IS NULL) FROM exercises WHERE is_template"
+        )).one()
+        users = connection.execute(text("SELECT COUNT(*) FROM users WHERE username LIKE 'synth%'")).scalar()
+        logs = connection.execute(text("SELECT COUNT(*) FROM workout_logs")).scalar()
+    engine.dispose()
+
+    # The catalog was seeded without the PostgreSQL-only upsert
+    assert exercises > 0 and unkeyed == 0
+    assert users == 3
+    assert logs > 0
@@ -0,0 +1,239 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from app import import_wger_exercises as importer
+from app import models
+from app.services.catalog import get_catalog_version
+
+BASE_URL = "https://wger.test/api/v2"
+PAGE_SIZE = 2
+
+
+@pytest.fixture
+def db(pg_db, monkeypatch):
+    # The catalog upsert is PostgreSQL-only; the importer opens its sessions through SessionLocal
+    monkeypatch.setattr(importer, "SessionLocal", lambda: pg_db)
+    monkeypatch.setattr(importer, "BACKOFF_SECONDS", 0)
+    return pg_db
+
+
+def wger_exercise(n: int, name: str = None, updated: str = "2024-01-01T00:00:00Z") -> dict:
+    return {
+        "uuid": f"wger-test-{n}",
+        "category": {"name": "Chest"},
+        "muscles": [{"name_en": "Chest"}],
+        "muscles_secondary": [],
+        "equipment": [{"name": "Dumbbell"}],
+        "translations": [{"language": 2, "name": name or f"Wger Test Press {n}", "description": "<p>Press.</p>"}],
+        "images": [],
+        "videos": [],
+        "last_update_global": updated,
+    }
+
+
+class FakeWger:
+    """wger's paginated list endpoints, recording every request"""
+
+    def __init__(self, count: int):
+        self.exercises = [wger_exercise(n) for n in range(count)]
+        self.deletions = []
+        self.failures = {}  # (endpoint, offset) -> statuses to answer before succeeding
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        endpoint = request.url.path.rstrip("/").rsplit("/", 1)[-1]
+        params = request.url.params
+        offset, limit = int(params["offset"]), int(params["limit"])
+        self.requests.append((endpoint, offset))
+
+        statuses = self.failures.get((endpoint, offset))
+        if statuses:
+            return httpx.Response(statuses.pop(0))
+
+        if endpoint == "deletion-log":
+            items = sorted(self.deletions, key=lambda entry: entry["timestamp"], reverse=True)
+        else:
+            items = list(self.exercises)
+            if params.get("ordering") == "-last_update_global":
+                items.sort(key=lambda exercise: exercise["last_update_global"], reverse=True)
+
+        return httpx.Response(200, json={
+            "count": len(items),
+            "next": f"{BASE_URL}/{endpoint}/?offset={offset + limit}" if offset + limit < len(items) else None,
+            "results": items[offset:offset + limit],
+        })
+
+    def offsets(self, endpoint: str = "exerciseinfo") -> list:
+        return sorted(offset for requested, offset in self.requests if requested == endpoint)
+
+
+def crawl(api: FakeWger, tmp_path, **options) -> dict:
+    return asyncio.run(importer.import_exercises_async(
+        base_url=BASE_URL,
+        page_size=PAGE_SIZE,
+        concurrency=1,
+        checkpoint_path=str(tmp_path / "checkpoint.json"),
+        transport=httpx.MockTransport(api),
+        **options
+    ))
+
+
+def sync(api: FakeWger) -> dict:
+    return asyncio.run(importer.sync_exercises_async(
+        base_url=BASE_URL, page_size=PAGE_SIZE, transport=httpx.MockTransport(api)
+    ))
+
+
+def timestamp(**delta) -> str:
+    return (datetime.now(timezone.utc) + timedelta(**delta)).isoformat()
+
+
+def imported(db) -> dict:
+    return {
+        exercise.source_uuid: exercise
+        for exercise in db.query(models.Exercise).filter(models.Exercise.source == importer.SOURCE)
+    }
+
+
+def test_crawl_reads_every_page_once(db, tmp_path):
+    api = FakeWger(5)
+
+    stats = crawl(api, tmp_path)
+
+    assert api.offsets() == [0, 2, 4]
+    assert (stats["inserted"], stats["skipped"]) == (5, 0)
+    exercise = imported(db)["wger-test-3"]
+    assert (exercise.name, exercise.equipment, exercise.description) == ("Wger Test Press 3", ["dumbbells"], "Press.")
+    assert not (tmp_path / "checkpoint.json").exists()
+
+
+def test_limit_stops_after_the_pages_it_needs(db, tmp_path):
+    api = FakeWger(5)
+
+    stats = crawl(api, tmp_path, limit=3)
+
+    assert api.offsets() == [0, 2]
+    assert stats["inserted"] == 3
+    assert set(imported(db)) == {"wger-test-0", "wger-test-1", "wger-test-2"}
+
+
+def test_rate_limits_and_server_errors_are_retried(db, tmp_path):
+    api = FakeWger(5)
+    api.failures[("exerciseinfo", 2)] = [503, 429]
+
+    stats = crawl(api, tmp_path)
+
+    assert api.offsets() == [0, 2, 2, 2, 4]
+    assert stats["inserted"] == 5
+
+
+def test_interrupted_crawl_resumes_from_the_checkpoint(db, tmp_path):
+    api = FakeWger(5)
+    api.failures[("exerciseinfo", 2)] = [404]  # not retryable
+
+    with pytest.raises(httpx.HTTPStatusError):
+        crawl(api, tmp_path)
+
+    with open(tmp_path / "checkpoint.json") as f:
+        done = set(json.load(f)["done_offsets"])
+    assert 0 in done and 2 not in done
+    assert len(imported(db)) == sum(min(PAGE_SIZE, 5 - offset) for offset in done)
+
+    api.requests.clear()
+    stats = crawl(api, tmp_path)
+
+    # The first page is always read for the count; loaded pages are not loaded again
+    missing = {0, 2, 4} - done
+    assert api.offsets() == sorted(missing | {0})
+    assert stats["inserted"] == sum(min(PAGE_SIZE, 5 - offset) for offset in missing)
+    assert stats["unchanged"] == 0
+    assert len(imported(db)) == 5
+
+
+def test_unchanged_exercises_are_not_written_again(db, tmp_path):
+    api = FakeWger(5)
+    crawl(api, tmp_path)
+    version = get_catalog_version(db)
+
+    rerun = crawl(api, tmp_path)
+
+    assert (rerun["inserted"], rerun["updated"], rerun["unchanged"]) == (0, 0, 5)
+    assert get_catalog_version(db) == version
+
+    api.exercises[1] = wger_exercise(1, name="Wger Test Incline Press")
+    changed = crawl(api, tmp_path)
+
+    assert (changed["inserted"], changed["updated"], changed["unchanged"]) == (0, 1, 4)
+    assert imported(db)["wger-test-1"].name == "Wger Test Incline Press"
+    assert get_catalog_version(db) == version + 1
+
+
+def sync_state(db) -> models.CatalogSyncState:
+    db.expire_all()
+    return db.get(models.CatalogSyncState, importer.SOURCE)
+
+
+def test_sync_needs_a_full_crawl_first(db):
+    assert sync(FakeWger(5)) is None
+
+
+def test_sync_applies_changes_and_deletions_since_the_crawl(db, tmp_path):
+    api = FakeWger(5)
+    crawl(api, tmp_path)
+    crawled_at = sync_state(db).last_deletion_watermark
+
+    api.exercises[1] = wger_exercise(1, name="Wger Test Incline Press", updated="2024-03-01T00:00:00Z")
+    api.exercises.append(wger_exercise(5, updated="2024-03-02T00:00:00Z"))
+    deleted_at = timestamp(minutes=1)
+    api.deletions = [
+        {"uuid": "wger-test-4", "timestamp": deleted_at},
+        {"uuid": "wger-test-3", "timestamp": timestamp(days=-1)},  # before the crawl, already applied
+    ]
+    api.requests.clear()
+
+    stats = sync(api)
+
+    # Newest first: the second page already reaches unchanged exercises
+    assert api.offsets() == [0, 2]
+    assert (stats["inserted"], stats["updated"], stats["archived"]) == (1, 1, 1)
+    exercises = imported(db)
+    assert exercises["wger-test-1"].name == "Wger Test Incline Press"
+    assert exercises["wger-test-4"].is_archived
+    assert not exercises["wger-test-3"].is_archived
+    state = sync_state(db)
+    assert state.last_update_watermark == importer.parse_timestamp("2024-03-02T00:00:00Z")
+    assert state.last_deletion_watermark == importer.parse_timestamp(deleted_at) > crawled_at
+
+    api.requests.clear()
+    rerun = sync(api)
+
+    assert api.offsets() == [0]
+    assert (rerun["inserted"], rerun["updated"], rerun["archived"]) == (0, 0, 0)
+
+
+def test_resumed_crawl_sets_watermarks_from_its_first_attempt(db, tmp_path):
+    api = FakeWger(5)
+    api.failures[("exerciseinfo", 2)] = [404]
+    with pytest.raises(httpx.HTTPStatusError):
+        crawl(api, tmp_path)
+    with open(tmp_path / "checkpoint.json") as f:
+        started_at = importer.parse_timestamp(json.load(f)["crawl_started_at"])
+    assert sync_state(db) is None
+
+    # Changed upstream after its page was loaded: the resumed crawl does not read it again
+    api.exercises[0] = wger_exercise(0, name="Wger Test Floor Press", updated=timestamp())
+    crawl(api, tmp_path)
+
+    state = sync_state(db)
+    assert state.last_update_watermark == state.last_deletion_watermark == started_at
+    assert state.last_full_sync_at is None
+    assert imported(db)["wger-test-0"].name == "Wger Test Press 0"
+
+    stats = sync(api)
+
+    assert stats["updated"] == 1
+    assert imported(db)["wger-test-0"].name == "Wger Test Floor Press"
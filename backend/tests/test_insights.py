@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app import insights_job, models
+from app.services.insights import needs_recompute
+
+NOW = datetime(2024, 6, 30, tzinfo=timezone.utc)
+
+
+def history(last_log_id: int, last_expired_at=None, days: int = 30) -> dict:
+    return {"last_log_id": last_log_id, "last_expired_at": last_expired_at, "time_range_days": days, "as_of": NOW}
+
+
+def test_first_run_computes():
+    assert needs_recompute(history(7), None)
+
+
+def test_nothing_changed_skips():
+    assert not needs_recompute(history(7), (7, NOW - timedelta(days=1)))
+    # A log that had already left the window last time changes nothing
+    assert not needs_recompute(history(7, last_expired_at=NOW - timedelta(days=40)), (7, NOW - timedelta(days=1)))
+
+
+def test_new_log_recomputes():
+    assert needs_recompute(history(8), (7, NOW - timedelta(hours=1)))
+
+
+def test_log_sliding_out_of_the_window_recomputes():
+    # In the window when computed 10 days ago (window start 40 days back), outside it now
+    assert needs_recompute(history(7, last_expired_at=NOW - timedelta(days=35)), (7, NOW - timedelta(days=10)))
+
+
+@pytest.fixture
+def athlete(db, make_user, make_exercise, make_log, monkeypatch):
+    # The job opens and closes its own session on the test database
+    monkeypatch.setattr(insights_job, "SessionLocal", sessionmaker(bind=db.get_bind()))
+    user = make_user()
+    exercise = make_exercise("Bench Press")
+    for n in range(12):
+        make_log(user, exercise, days_ago=n * 2, difficulty_rating=8)
+    db.commit()
+    return user
+
+
+def run_job(capsys, **options) -> int:
+    """Run the job in-process; returns how many users it recomputed"""
+    capsys.readouterr()
+    insights_job.run(workers=0, **options)
+    summary = capsys.readouterr().out
+    return int(summary.split("Users recomputed: ")[1].split()[0])
+
+
+def insights(db, user) -> dict:
+    db.expire_all()
+    return {
+        insight.insight_type: insight.id
+        for insight in db.query(models.AIAdaptationInsight).filter(models.AIAdaptationInsight.user_id == user.id)
+    }
+
+
+def test_rerun_without_changes_skips_the_user(db, athlete, capsys):
+    assert run_job(capsys) == 1
+    first = insights(db, athlete)
+    assert set(first) == {"recovery_needed", "progression_detected"}
+
+    assert run_job(capsys) == 0
+    assert insights(db, athlete) == first
+
+
+def test_runs_keep_one_row_per_insight_type(db, athlete, make_exercise, make_log, capsys):
+    run_job(capsys)
+    first = insights(db, athlete)
+
+    make_log(athlete, make_exercise("Squat"), difficulty_rating=9)
+    db.commit()
+    assert run_job(capsys) == 1
+    assert run_job(capsys, full=True) == 1
+
+    assert insights(db, athlete) == first
+    assert db.query(models.AIAdaptationInsight).count() == 2
+
+
+def test_insights_expire_when_logs_leave_the_window(db, athlete, capsys):
+    run_job(capsys)
+
+    # Ten days later: the oldest log is now outside the window, and no log was added
+    watermark = db.get(models.InsightWatermark, athlete.id)
+    watermark.computed_at = watermark.computed_at - timedelta(days=10)
+    oldest = db.query(models.WorkoutLog).order_by(models.WorkoutLog.date).first()
+    oldest.date = oldest.date - timedelta(days=10)
+    db.commit()
+
+    assert run_job(capsys) == 1
+    # 11 logs in the window: no longer consistent enough for progression_detected
+    assert set(insights(db, athlete)) == {"recovery_needed"}
@@ -0,0 +1,61 @@
+from app import models, schemas
+from app.config import settings
+from app.services.ai_trainer import AITrainerService
+from app.services.program_cache import CatalogCache, skeleton_key
+
+MUSCLES = [["quadriceps", "glutes"], ["chest", "triceps"], ["back", "biceps"], ["hamstrings"], ["shoulders"], ["abs"]]
+
+
+def key(equipment=None, eligible_ids=None):
+    return skeleton_key(3, "intermediate", equipment, 3, 4, ["strength"], 60, eligible_ids)
+
+
+def test_key_tells_catalog_sources_apart():
+    assert key(["Dumbbell", "bench"]) == key(["bench", "dumbbells"])
+    assert key(None) != key([])
+    assert key([]) != key([], eligible_ids=frozenset())
+    assert key(["dumbbells"], eligible_ids=frozenset({1, 2})) != key(["dumbbells"], eligible_ids=frozenset({1, 3}))
+    assert key(["barbell"], eligible_ids=frozenset({1, 2})) == key(["dumbbells"], eligible_ids={2, 1})
+
+
+def test_clear_forgets_the_catalog_version():
+    cache = CatalogCache(max_entries=10)
+    cache.put((5, "old"), "stale")
+    cache.clear()
+
+    cache.put((0, "a"), "first")
+    cache.put((1, "b"), "second")
+
+    # A newer version than the last one seen since clear() still drops older entries
+    assert cache.get((0, "a")) is None
+    assert cache.get((1, "b")) == "second"
+
+
+def program_exercise_ids(program):
+    return {
+        exercise.exercise_id
+        for week in program.weekly_plans
+        for workout in week.daily_workouts
+        for exercise in workout.exercises
+    }
+
+
+def test_gym_profile_and_plain_request_do_not_share_a_skeleton(db, make_user, make_exercise, monkeypatch):
+    monkeypatch.setattr(settings, "TRAINER_ENGINE", "rules")
+    user = make_user(fitness_level="intermediate", fitness_goals=["strength"])
+    bodyweight, barbell = set(), set()
+    for muscles in MUSCLES:
+        for n in range(3):
+            bodyweight.add(make_exercise(f"{muscles[0]} bodyweight {n}", muscles).id)
+            barbell.add(make_exercise(f"{muscles[0]} barbell {n}", muscles, ["barbell"]).id)
+    profile = models.GymProfile(user_id=user.id, name="Home", equipment=[])
+    db.add(profile)
+    db.commit()
+    request = schemas.TrainerProgramRequest(program_type="multi_week", duration_weeks=4, days_per_week=3)
+
+    # Both requests used to map to the same key: no equipment listed
+    from_profile = AITrainerService(db, user).generate_program(request, gym_profile=profile)
+    unfiltered = AITrainerService(db, user).generate_program(request)
+
+    assert program_exercise_ids(from_profile) <= bodyweight
+    assert program_exercise_ids(unfiltered) & barbell
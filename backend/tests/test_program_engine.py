@@ -0,0 +1,155 @@
+import pytest
+
+from app import schemas
+from app.config import settings
+from app.services import program_engine
+from app.services.ai_trainer import AITrainerService
+from app.services.exercise_candidates import ExerciseCandidate, get_exercise_candidates
+
+CATALOG_MUSCLES = [
+    ["quadriceps", "glutes"], ["chest", "triceps"], ["back", "biceps"], ["hamstrings"], ["shoulders"],
+    ["abs"], ["biceps"], ["triceps"], ["calves"], ["lower back"], ["forearms"], ["cardiovascular"],
+]
+
+
+def catalog(per_muscle: int = 6):
+    """Several exercises per muscle group, enough for accessories to rotate"""
+    exercises = []
+    for muscles in CATALOG_MUSCLES:
+        for n in range(per_muscle):
+            exercises.append(ExerciseCandidate(
+                id=len(exercises) + 1,
+                name=f"{muscles[0]} {n}",
+                category="cardio" if muscles == ["cardiovascular"] else "strength",
+                muscle_groups=muscles,
+                equipment=[],
+                difficulty=["beginner", "intermediate"][n % 2]
+            ))
+    return exercises
+
+
+def session_ids(week, day_index):
+    return [exercise["exercise_id"] for exercise in week["workouts"][day_index]["exercises"]]
+
+
+@pytest.mark.parametrize("days_per_week,fitness_level,split", [
+    (2, "intermediate", ["full_body", "full_body"]),
+    (3, "beginner", ["full_body"] * 3),
+    (3, "intermediate", ["push", "pull", "legs"]),
+    (4, "beginner", ["upper", "lower", "upper", "lower"]),
+    (5, "advanced", ["push", "pull", "legs", "upper", "lower"]),
+    (6, "expert", ["push", "pull", "legs", "push", "pull", "legs"]),
+    (7, "intermediate", ["push", "pull", "legs", "push", "pull", "legs", "conditioning"]),
+])
+def test_choose_split(days_per_week, fitness_level, split):
+    assert program_engine.choose_split(days_per_week, fitness_level) == split
+
+
+def test_training_days_are_spread_over_the_week():
+    assert program_engine.training_day_offsets(3) == [0, 2, 4]
+    assert program_engine.training_day_offsets(0) == [0]
+    assert program_engine.training_day_offsets(9) == list(range(7))
+
+
+def test_primary_goal_follows_priority():
+    assert program_engine.primary_goal(["weight_loss", "strength"]) == "strength"
+    assert program_engine.primary_goal(["unknown"]) == "general_fitness"
+
+
+def test_every_fourth_week_is_a_deload():
+    program = program_engine.generate_multi_week_program(
+        catalog(), "intermediate", ["muscle_gain"], duration_weeks=8, days_per_week=3
+    )
+    weeks = program["weeks"]
+
+    assert [week["week_number"] for week in weeks] == list(range(1, 9))
+    for week in weeks:
+        exercises = [exercise for workout in week["workouts"] for exercise in workout["exercises"]]
+        if week["week_number"] % 4 == 0:
+            assert week["theme"] == "Deload week"
+            assert {exercise["intensity_level"] for exercise in exercises} == {"deload"}
+        else:
+            assert "deload" not in {exercise["intensity_level"] for exercise in exercises}
+
+    loading, deload = weeks[2]["workouts"][0]["exercises"], weeks[3]["workouts"][0]["exercises"]
+    assert all(after["sets"] < before["sets"] for before, after in zip(loading, deload))
+
+
+def test_exercises_are_fixed_within_a_block_and_accessories_rotate_between_blocks():
+    program = program_engine.generate_multi_week_program(
+        catalog(), "intermediate", ["strength"], duration_weeks=8, days_per_week=3
+    )
+    weeks = program["weeks"]
+
+    for day in range(3):
+        assert session_ids(weeks[0], day) == session_ids(weeks[3], day)
+        # Main lifts (first two slots) carry over so load can progress
+        assert session_ids(weeks[0], day)[:2] == session_ids(weeks[4], day)[:2]
+    assert any(session_ids(weeks[0], day)[2:] != session_ids(weeks[4], day)[2:] for day in range(3))
+
+
+def test_program_only_uses_catalog_exercises_once_per_session():
+    exercises = catalog()
+    program = program_engine.generate_multi_week_program(
+        exercises, "advanced", ["strength"], duration_weeks=4, days_per_week=5, time_per_session_minutes=60
+    )
+    known = {exercise.id for exercise in exercises}
+
+    for week in program["weeks"]:
+        assert len(week["workouts"]) == 5
+        for day in range(5):
+            ids = session_ids(week, day)
+            assert len(ids) == program_engine.exercises_per_session(60)
+            assert set(ids) <= known
+            assert len(set(ids)) == len(ids)
+
+
+def test_daily_workout_avoids_recently_trained_muscles():
+    workout = program_engine.generate_daily_workout(
+        catalog(), "intermediate", ["strength"], recent_muscles=["chest", "shoulders", "triceps"]
+    )
+    assert not workout["workout_name"].startswith("Push")
+
+
+def test_candidates_are_filtered_by_available_equipment(db, make_exercise):
+    push_up = make_exercise("Push Up", ["chest"])
+    dumbbell_press = make_exercise("Dumbbell Press", ["chest"], ["dumbbells"])
+    bench_press = make_exercise("Barbell Bench Press", ["chest"], ["barbell", "bench"])
+    sled_push = make_exercise("Sled Push", ["quadriceps"], ["sled"])
+    db.commit()
+
+    def ids(equipment):
+        return {candidate.id for candidate in get_exercise_candidates(db, equipment=equipment)}
+
+    # No equipment list means no filter; listing only bodyweight leaves bodyweight exercises
+    assert ids(None) == ids([]) == {push_up.id, dumbbell_press.id, bench_press.id, sled_push.id}
+    assert ids(["bodyweight"]) == {push_up.id}
+    assert ids(["Dumbbell"]) == {push_up.id, dumbbell_press.id}
+    # Every piece of required equipment must be available
+    assert ids(["barbell"]) == {push_up.id}
+    # Equipment outside the taxonomy can't be matched, so it is never assumed available
+    assert ids(["barbell", "bench", "dumbbells", "sled"]) == {push_up.id, dumbbell_press.id, bench_press.id}
+
+
+def test_rule_based_program_respects_equipment(db, make_user, make_exercise, monkeypatch):
+    monkeypatch.setattr(settings, "TRAINER_ENGINE", "rules")
+    user = make_user(fitness_level="intermediate", fitness_goals=["strength"])
+    allowed = set()
+    for muscles in CATALOG_MUSCLES:
+        allowed.add(make_exercise(f"{muscles[0]} bodyweight", muscles).id)
+        allowed.add(make_exercise(f"{muscles[0]} dumbbell", muscles, ["dumbbells"]).id)
+        make_exercise(f"{muscles[0]} machine", muscles, ["cable machine"])
+    db.commit()
+
+    program = AITrainerService(db, user).generate_program(schemas.TrainerProgramRequest(
+        program_type="multi_week", duration_weeks=4, days_per_week=3, available_equipment=["dumbbells"]
+    ))
+
+    used = {
+        exercise.exercise_id
+        for week in program.weekly_plans
+        for workout in week.daily_workouts
+        for exercise in workout.exercises
+    }
+    assert program.generation_model == "rule_engine"
+    assert used and used <= allowed
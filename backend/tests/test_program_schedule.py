@@ -0,0 +1,107 @@
+from datetime import date, datetime, timedelta, timezone
+
+from app import models
+from app.services.program_schedule import build_program_schedule, rebuild_active_schedule, to_user_date
+from tests.conftest import auth_headers
+
+
+def schedule(db, user):
+    return db.query(models.AIProgramScheduleEntry).filter(
+        models.AIProgramScheduleEntry.user_id == user.id
+    ).order_by(models.AIProgramScheduleEntry.scheduled_date).all()
+
+
+def test_schedule_has_a_row_for_every_day(db, make_user, make_program):
+    user = make_user()
+    program = make_program(user, weeks=2, days_per_week=3)
+    start = date(2026, 3, 2)
+
+    assert build_program_schedule(db, program, start) == 14
+
+    rows = schedule(db, user)
+    assert [row.scheduled_date for row in rows] == [start + timedelta(days=n) for n in range(14)]
+    assert [row.week_number for row in rows] == [1] * 7 + [2] * 7
+    # Sessions land on the rule engine's day offsets, the other days are rest rows
+    assert [row.day_number for row in rows[:7]] == [1, None, 2, None, 3, None, None]
+    workouts = {workout.id: workout for week in program.weekly_plans for workout in week.daily_workouts}
+    for row in rows:
+        if row.day_number is None:
+            assert row.daily_workout_id is None
+        else:
+            workout = workouts[row.daily_workout_id]
+            assert (workout.weekly_plan.week_number, workout.day_number) == (row.week_number, row.day_number)
+
+
+def test_schedule_covers_the_program_duration(db, make_user, make_program):
+    user = make_user()
+    # A program stored with fewer weeks than its duration still gets rest rows for the missing weeks
+    program = make_program(user, weeks=1, days_per_week=2)
+    program.duration_weeks = 2
+
+    assert build_program_schedule(db, program, date(2026, 3, 2)) == 14
+    rows = schedule(db, user)
+    assert [row.day_number for row in rows[:7]] == [1, None, None, 2, None, None, None]
+    assert all(row.daily_workout_id is None for row in rows[7:])
+
+
+def test_rebuilding_replaces_the_previous_schedule(db, make_user, make_program):
+    user = make_user()
+    old = make_program(user, weeks=2)
+    build_program_schedule(db, old, date(2026, 3, 2))
+    new = make_program(user, weeks=1)
+
+    build_program_schedule(db, new, date(2026, 4, 6))
+
+    rows = schedule(db, user)
+    assert len(rows) == 7
+    assert {row.training_program_id for row in rows} == {new.id}
+    assert rows[0].scheduled_date == date(2026, 4, 6)
+
+
+def test_start_date_is_the_local_calendar_date(make_user):
+    started_at = datetime(2026, 1, 10, 2, 0, tzinfo=timezone.utc)
+
+    assert to_user_date(make_user("utc"), started_at) == date(2026, 1, 10)
+    assert to_user_date(make_user("toronto", timezone="America/Toronto"), started_at) == date(2026, 1, 9)
+    # Naive timestamps are taken as UTC; unknown timezones fall back to UTC
+    assert to_user_date(make_user("naive", timezone="Mars/Olympus"), started_at.replace(tzinfo=None)) == date(2026, 1, 10)
+
+
+def test_rebuild_active_schedule_ignores_users_without_a_started_program(db, make_user, make_program):
+    user = make_user()
+    assert rebuild_active_schedule(db, user) == 0
+
+    make_program(user, status="active")
+    assert rebuild_active_schedule(db, user) == 0
+    assert schedule(db, user) == []
+
+
+def test_changing_timezone_moves_the_schedule(db, client, make_user, make_program):
+    user = make_user(timezone="UTC")
+    program = make_program(user, status="active", started_at=datetime(2026, 1, 10, 2, 0, tzinfo=timezone.utc))
+    build_program_schedule(db, program, date(2026, 1, 10))
+    db.commit()
+
+    response = client.put("/api/auth/me", json={"timezone": "America/Toronto"}, headers=auth_headers(user))
+
+    assert response.status_code == 200
+    assert response.json()["timezone"] == "America/Toronto"
+    rows = schedule(db, user)
+    assert len(rows) == 7
+    assert rows[0].scheduled_date == date(2026, 1, 9)
+    assert rows[0].day_number == 1
+
+
+def test_unchanged_timezone_keeps_the_schedule(db, client, make_user, make_program):
+    user = make_user(timezone="America/Toronto")
+    program = make_program(user, status="active", started_at=datetime(2026, 1, 10, 2, 0, tzinfo=timezone.utc))
+    # Deliberately not the date the timezone gives, so a rebuild would show
+    build_program_schedule(db, program, date(2026, 2, 1))
+    db.commit()
+
+    response = client.put(
+        "/api/auth/me", json={"timezone": "America/Toronto", "full_name": "A. Thlete"}, headers=auth_headers(user)
+    )
+
+    assert response.status_code == 200
+    assert schedule(db, user)[0].scheduled_date == date(2026, 2, 1)
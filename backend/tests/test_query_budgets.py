@@ -0,0 +1,52 @@
+import pytest
+
+from app import models
+from tests.conftest import auth_headers
+
+
+@pytest.fixture
+def athlete(db, make_user, make_exercise):
+    user = make_user()
+    for n in range(20):
+        make_exercise(f"Exercise {n}", ["chest"] if n % 2 else ["back"])
+    db.commit()
+    return user
+
+
+def test_exercise_list_is_one_query(client, query_budget, athlete):
+    with query_budget(max_queries=2, max_repeats=1) as requests:
+        response = client.get("/api/exercises/", headers=auth_headers(athlete))
+
+    assert response.status_code == 200
+    assert len(response.json()) == 20
+    assert [route for route, _, _ in requests] == ["/api/exercises/"]
+
+
+@pytest.mark.parametrize("programs", [1, 5])
+def test_program_list_does_not_grow_with_programs(db, client, query_budget, athlete, make_program, programs):
+    exercise_ids = [exercise.id for exercise in db.query(models.Exercise).limit(4)]
+    for _ in range(programs):
+        make_program(athlete, weeks=4, days_per_week=3, exercise_ids=exercise_ids)
+    db.commit()
+
+    # First read renders and stores the snapshots in bulk, later reads only fetch them
+    with query_budget(max_queries=8, max_repeats=1):
+        rendered = client.get("/api/trainer/programs", headers=auth_headers(athlete))
+    with query_budget(max_queries=2, max_repeats=1):
+        stored = client.get("/api/trainer/programs", headers=auth_headers(athlete))
+
+    assert rendered.status_code == stored.status_code == 200
+    assert len(stored.json()) == programs
+    assert rendered.json() == stored.json()
+
+
+def test_budget_fails_when_exceeded(client, query_budget, athlete):
+    with pytest.raises(pytest.fail.Exception, match="2 queries, budget is 1"):
+        with query_budget(max_queries=1):
+            client.get("/api/exercises/", headers=auth_headers(athlete))
+
+
+def test_budget_fails_without_instrumented_requests(query_budget):
+    with pytest.raises(pytest.fail.Exception, match="observed no requests"):
+        with query_budget(max_queries=1):
+            pass
@@ -0,0 +1,57 @@
+import pytest
+
+from app import schemas
+from app.config import settings
+from app.services.ai_trainer import AITrainerService
+from tests.test_program_engine import CATALOG_MUSCLES
+
+
+@pytest.fixture
+def history(db, make_user, make_exercise, make_log):
+    user = make_user(fitness_level="intermediate", fitness_goals=["strength"])
+    bench = make_exercise("Bench Press", ["chest", "triceps"])
+    press = make_exercise("Overhead Press", ["shoulders", "triceps"])
+    squat = make_exercise("Squat", ["quadriceps", "glutes"])
+    make_log(user, bench, days_ago=1, difficulty_rating=8)
+    make_log(user, press, days_ago=1.5, difficulty_rating=6)
+    make_log(user, bench, days_ago=10)
+    make_log(user, squat, days_ago=40, difficulty_rating=9)
+    db.commit()
+    return user
+
+
+def test_history_counts_logs_per_muscle_in_the_window(db, history):
+    analysis = AITrainerService(db, history)._analyze_workout_history(days=30)
+
+    assert analysis["total_workouts"] == 3
+    # Unrated logs count as 5
+    assert analysis["avg_difficulty_rating"] == round((8 + 6 + 5) / 3, 1)
+    assert analysis["muscle_group_frequency"] == {"chest": 2, "triceps": 3, "shoulders": 1}
+
+
+def test_history_without_logs(db, make_user):
+    analysis = AITrainerService(db, make_user())._analyze_workout_history(days=30)
+
+    assert analysis == {"total_workouts": 0, "summary": "No recent workout history"}
+
+
+def test_recent_muscles_only_cover_the_last_days(db, history):
+    assert AITrainerService(db, history)._get_recent_muscles(days=2) == ["chest", "shoulders", "triceps"]
+    assert AITrainerService(db, history)._get_recent_muscles(days=0.5) == []
+
+
+def test_rule_based_daily_workout_rests_recently_trained_muscles(db, history, make_exercise, monkeypatch):
+    monkeypatch.setattr(settings, "TRAINER_ENGINE", "rules")
+    for muscles in CATALOG_MUSCLES:
+        for n in range(3):
+            make_exercise(f"{muscles[0]} {n}", muscles, difficulty=["beginner", "intermediate"][n % 2])
+    db.commit()
+
+    program = AITrainerService(db, history).generate_program(schemas.TrainerProgramRequest(program_type="daily"))
+
+    assert program.program_type == "daily"
+    assert program.generation_model == "rule_engine"
+    (workout,) = program.daily_workouts
+    assert workout.exercises
+    # Chest, shoulders and triceps were trained yesterday, so no push session today
+    assert not workout.workout_name.startswith("Push")
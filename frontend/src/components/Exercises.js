@@ -200,9 +200,11 @@ function Exercises({ token }) {
               <span className="badge badge-primary">{selectedExercise.category}</span>
             </div>
 
-            {selectedExercise.image_url && (
+            {(selectedExercise.local_image_url || selectedExercise.image_url) && (
               <img
-                src={selectedExercise.image_url}
+                src={selectedExercise.local_image_url
+                  ? `http://localhost:8000${selectedExercise.local_image_url}`
+                  : selectedExercise.image_url}
                 alt={selectedExercise.name}
                 style={{
                   width: '100%',
@@ -215,11 +217,13 @@ function Exercises({ token }) {
               />
             )}
 
-            {selectedExercise.video_url && (
+            {(selectedExercise.local_video_url || selectedExercise.video_url) && (
               <div style={{ marginBottom: '20px' }}>
                 <h3>Video Demonstration</h3>
                 <a
-                  href={selectedExercise.video_url}
+                  href={selectedExercise.local_video_url
+                    ? `http://localhost:8000${selectedExercise.local_video_url}`
+                    : selectedExercise.video_url}
                   target="_blank"
                   rel="noopener noreferrer"
                   className="btn btn-primary"